@@ -1,26 +1,82 @@
 """
 Módulo de autenticação para o Banco de Projetos DWG
 
-Gerencia login e senha de usuários com segurança
+Gerencia login e senha de usuários com segurança:
+- Senhas com PBKDF2-SHA256 e salt por usuário (hashes SHA-256 antigos são
+  convertidos no primeiro login bem-sucedido)
+- Sessão assinada (HMAC) e com validade, guardada na pasta do usuário do
+  sistema (não na pasta do programa, que pode estar num drive compartilhado),
+  para reabrir o programa sem digitar a senha de novo
+- Alterações em transação (trava entre processos, uma gravação atômica) e
+  importação/exportação em lote
 """
 
 import json
 import hashlib
+import hmac
+import base64
 import os
-from typing import Optional, Dict
+import copy
+import secrets
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional, Dict, Iterable, List
+
+from file_lock import TravaArquivo
+
+# Custo do PBKDF2: propositalmente alto (verificação fora da thread da interface)
+ALGORITMO = "pbkdf2_sha256"
+ITERACOES = 600_000
+TAMANHO_SALT = 16
+
+TIPOS_USUARIO = ("admin", "user")
+
+ARQUIVO_SESSAO = "sessao"
+ARQUIVO_CHAVE = "sessao.key"
+
+
+def pasta_sessao() -> str:
+    """
+    Pasta das sessões do usuário do sistema
+
+    %APPDATA%\\BancoProjetos no Windows, ~/.banco_projetos nos demais.
+    """
+    base = os.environ.get("APPDATA")
+    if base:
+        return os.path.join(base, "BancoProjetos")
+    return os.path.join(os.path.expanduser("~"), ".banco_projetos")
+
+
+def _b64(dados: bytes) -> str:
+    return base64.urlsafe_b64encode(dados).decode('ascii').rstrip('=')
+
+
+def _b64_decode(texto: str) -> bytes:
+    return base64.urlsafe_b64decode(texto + '=' * (-len(texto) % 4))
 
 
 class AuthManager:
     """Gerenciador de autenticação de usuários"""
     
-    def __init__(self, users_file: str = "users.json"):
+    def __init__(self, users_file: str = "users.json", session_dir: str = None):
         """
         Inicializa gerenciador de autenticação
         
         Args:
             users_file: Caminho do arquivo de usuários
+            session_dir: Pasta da sessão salva e da sua chave (padrão:
+                pasta_sessao(), do usuário do sistema)
         """
         self.users_file = users_file
+        self.session_dir = session_dir or pasta_sessao()
+        # Uma sessão por users.json: cópias do programa em pastas diferentes não se misturam
+        sufixo = hashlib.sha256(os.path.abspath(users_file).encode('utf-8')).hexdigest()[:12]
+        self.session_file = os.path.join(self.session_dir, f"{ARQUIVO_SESSAO}_{sufixo}")
+        self.key_file = os.path.join(self.session_dir, ARQUIVO_CHAVE)
+        self._trava = TravaArquivo(os.path.abspath(users_file))
+        self._em_transacao = False
         self.users_data = self._load_users()
         
         # Criar usuário padrão se não existir nenhum
@@ -38,24 +94,99 @@ class AuthManager:
         return {}
     
     def _save_users(self):
-        """Salva dados de usuários no arquivo"""
+        """
+        Salva dados de usuários no arquivo
+        
+        Gravação atômica (arquivo temporário + os.replace). Dentro de uma
+        transação, fica para o fim dela.
+        """
+        if self._em_transacao:
+            return
         try:
-            with open(self.users_file, 'w', encoding='utf-8') as f:
-                json.dump(self.users_data, f, indent=2, ensure_ascii=False)
+            with self._trava:
+                self._write_users()
         except Exception as e:
             print(f"Erro ao salvar usuários: {e}")
     
-    def _hash_password(self, password: str) -> str:
+    def _write_users(self):
+        """Grava users_data de uma vez (chamar com a trava adquirida)"""
+        pasta = os.path.dirname(os.path.abspath(self.users_file))
+        fd, temporario = tempfile.mkstemp(dir=pasta, prefix=".users.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.users_data, f, indent=2, ensure_ascii=False)
+            os.replace(temporario, self.users_file)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+    
+    @contextmanager
+    def transaction(self):
         """
-        Cria hash SHA-256 da senha
+        Agrupa alterações em uma única gravação
+        
+        Trava users.json entre processos, relê o arquivo (preserva alterações
+        feitas por outro processo) e grava uma vez ao final. Se o bloco
+        levantar exceção, nada é gravado e os dados em memória voltam ao
+        estado anterior.
+        
+        Exemplo:
+            with auth.transaction():
+                auth.add_user("ana", "senha1")
+                auth.add_user("beto", "senha2")
+        """
+        if self._em_transacao:
+            # Aninhada: a transação externa grava
+            yield self
+            return
+        
+        with self._trava:
+            anterior = self.users_data
+            self.users_data = self._load_users() or copy.deepcopy(anterior)
+            self._em_transacao = True
+            try:
+                yield self
+            except BaseException:
+                self.users_data = anterior
+                raise
+            finally:
+                self._em_transacao = False
+            self._write_users()
+    
+    def _hash_password(self, password: str, salt: bytes = None, iteracoes: int = ITERACOES) -> str:
+        """
+        Cria hash PBKDF2-SHA256 da senha com salt aleatório
         
         Args:
             password: Senha em texto plano
+            salt: Salt (padrão: novo salt aleatório)
+            iteracoes: Iterações do PBKDF2
             
         Returns:
-            Hash da senha
+            Hash no formato "pbkdf2_sha256$iterações$salt$hash" (base64)
         """
-        return hashlib.sha256(password.encode('utf-8')).hexdigest()
+        salt = salt or secrets.token_bytes(TAMANHO_SALT)
+        derivada = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iteracoes)
+        return f"{ALGORITMO}${iteracoes}${_b64(salt)}${_b64(derivada)}"
+    
+    def _verify_password(self, password: str, password_hash: str) -> bool:
+        """Confere a senha com o hash salvo (PBKDF2 ou SHA-256 antigo)"""
+        if password_hash.startswith(ALGORITMO + "$"):
+            try:
+                _, iteracoes, salt, _ = password_hash.split("$")
+                esperado = self._hash_password(password, _b64_decode(salt), int(iteracoes))
+            except ValueError:
+                return False
+        else:
+            # Formato antigo: SHA-256 sem salt
+            esperado = hashlib.sha256(password.encode('utf-8')).hexdigest()
+        return hmac.compare_digest(esperado, password_hash)
+    
+    @staticmethod
+    def _needs_rehash(password_hash: str) -> bool:
+        """Hash antigo (SHA-256) ou com menos iterações que o padrão atual"""
+        partes = password_hash.split("$")
+        return partes[0] != ALGORITMO or len(partes) != 4 or int(partes[1]) < ITERACOES
     
     def _create_default_user(self):
         """Cria usuário padrão admin/admin"""
@@ -76,6 +207,9 @@ class AuthManager:
         """
         Autentica usuário
         
+        A verificação é lenta de propósito (PBKDF2): na interface, chame fora
+        da thread do Tk. Hashes antigos são regravados no formato atual.
+        
         Args:
             username: Nome de usuário
             password: Senha
@@ -90,8 +224,17 @@ class AuthManager:
         if username not in users:
             return False
         
-        password_hash = self._hash_password(password)
-        return users[username]["password_hash"] == password_hash
+        password_hash = users[username]["password_hash"]
+        if not self._verify_password(password, password_hash):
+            return False
+        
+        if self._needs_rehash(password_hash):
+            novo_hash = self._hash_password(password)
+            with self.transaction():
+                user = self.users_data.get("users", {}).get(username)
+                if user and user["password_hash"] == password_hash:
+                    user["password_hash"] = novo_hash
+        return True
     
     def add_user(self, username: str, password: str, nome: str = "", tipo: str = "user") -> bool:
         """
@@ -106,19 +249,18 @@ class AuthManager:
         Returns:
             True se adicionado, False se já existe
         """
-        users = self.users_data.get("users", {})
-        
-        if username in users:
-            return False
-        
-        users[username] = {
-            "password_hash": self._hash_password(password),
-            "nome": nome or username,
-            "tipo": tipo
-        }
+        password_hash = self._hash_password(password)
         
-        self.users_data["users"] = users
-        self._save_users()
+        with self.transaction():
+            users = self.users_data.setdefault("users", {})
+            if username in users:
+                return False
+            
+            users[username] = {
+                "password_hash": password_hash,
+                "nome": nome or username,
+                "tipo": tipo
+            }
         return True
     
     def change_password(self, username: str, old_password: str, new_password: str) -> bool:
@@ -136,11 +278,196 @@ class AuthManager:
         if not self.authenticate(username, old_password):
             return False
         
-        users = self.users_data.get("users", {})
-        users[username]["password_hash"] = self._hash_password(new_password)
-        self._save_users()
+        password_hash = self._hash_password(new_password)
+        with self.transaction():
+            users = self.users_data.get("users", {})
+            if username not in users:
+                return False
+            users[username]["password_hash"] = password_hash
+        # A sessão salva deixa de valer (assinatura inclui o hash da senha)
         return True
     
+    def import_users(self, registros: Iterable[Dict], atualizar: bool = False) -> Dict[str, int]:
+        """
+        Importa usuários em lote, em uma única transação
+        
+        Cada registro tem 'username' e 'password' (texto plano) ou
+        'password_hash' (de export_users), e opcionalmente 'nome' e 'tipo'.
+        Todos os registros são validados antes: se algum for inválido, nada
+        é alterado. As senhas são derivadas em paralelo, fora da trava.
+        
+        Args:
+            registros: Registros a importar
+            atualizar: Atualizar usuários existentes (senão são ignorados)
+            
+        Returns:
+            Estatísticas: {'added': n, 'updated': n, 'skipped': n}
+            
+        Raises:
+            ValueError: Registros inválidos (mensagem lista os problemas)
+        """
+        lote, erros, vistos = [], [], set()
+        for linha, registro in enumerate(registros, 1):
+            username = str(registro.get("username") or "").strip()
+            password = registro.get("password") or ""
+            password_hash = registro.get("password_hash") or ""
+            tipo = str(registro.get("tipo") or "user").strip()
+            if not username:
+                erros.append(f"registro {linha}: usuário vazio")
+            elif username in vistos:
+                erros.append(f"registro {linha}: '{username}' repetido")
+            elif not password and not password_hash:
+                erros.append(f"registro {linha}: '{username}' sem senha")
+            elif password and len(password) < 4:
+                erros.append(f"registro {linha}: senha de '{username}' com menos de 4 caracteres")
+            elif tipo not in TIPOS_USUARIO:
+                erros.append(f"registro {linha}: tipo '{tipo}' inválido")
+            vistos.add(username)
+            lote.append((username, password, password_hash, str(registro.get("nome") or "").strip(), tipo))
+        if erros:
+            raise ValueError("; ".join(erros))
+        
+        # Sem atualizar, usuários que já existem não precisam de hash novo
+        if not atualizar:
+            existentes = (self._load_users() or self.users_data).get("users", {})
+            lote = [item for item in lote if item[0] not in existentes]
+        
+        # PBKDF2 libera o GIL: derivar em paralelo antes de travar o arquivo
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+            hashes = list(executor.map(
+                lambda item: self._hash_password(item[1]) if item[1] else item[2], lote))
+        
+        stats = {'added': 0, 'updated': 0, 'skipped': len(vistos) - len(lote)}
+        with self.transaction():
+            users = self.users_data.setdefault("users", {})
+            for (username, _, _, nome, tipo), password_hash in zip(lote, hashes):
+                if username in users:
+                    if not atualizar:
+                        stats['skipped'] += 1
+                        continue
+                    users[username].update(password_hash=password_hash, tipo=tipo,
+                                           nome=nome or users[username].get("nome", username))
+                    stats['updated'] += 1
+                else:
+                    users[username] = {"password_hash": password_hash,
+                                       "nome": nome or username, "tipo": tipo}
+                    stats['added'] += 1
+        return stats
+    
+    def export_users(self) -> List[Dict]:
+        """
+        Exporta todos os usuários com o hash da senha (para import_users)
+        
+        Returns:
+            Lista de registros {'username', 'nome', 'tipo', 'password_hash'}
+        """
+        with self._trava:
+            self.users_data = self._load_users() or self.users_data
+        return [{"username": username,
+                 "nome": data.get("nome", username),
+                 "tipo": data.get("tipo", "user"),
+                 "password_hash": data["password_hash"]}
+                for username, data in self.users_data.get("users", {}).items()]
+    
+    def _session_key(self) -> bytes:
+        """Chave HMAC local das sessões (criada na primeira vez, só para o dono)"""
+        try:
+            with open(self.key_file, 'rb') as f:
+                chave = f.read()
+            if len(chave) >= 32:
+                return chave
+        except FileNotFoundError:
+            pass
+        chave = secrets.token_bytes(32)
+        os.makedirs(self.session_dir, mode=0o700, exist_ok=True)
+        fd = os.open(self.key_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(chave)
+        return chave
+    
+    def _session_fingerprint(self, username: str) -> str:
+        """Resumo do hash da senha atual: trocar a senha invalida a sessão"""
+        password_hash = self.users_data.get("users", {})[username]["password_hash"]
+        return hashlib.sha256(password_hash.encode('utf-8')).hexdigest()[:16]
+    
+    def create_session(self, username: str, validade: float) -> bool:
+        """
+        Salva uma sessão assinada para reabrir sem login
+        
+        Args:
+            username: Usuário já autenticado
+            validade: Segundos até a sessão expirar
+            
+        Returns:
+            True se salva, False se não foi possível
+        """
+        agora = int(time.time())
+        dados = {
+            "usuario": username,
+            "criada": agora,
+            "expira": int(agora + validade),
+            "senha": self._session_fingerprint(username)
+        }
+        try:
+            carga = _b64(json.dumps(dados, separators=(',', ':')).encode('utf-8'))
+            assinatura = _b64(hmac.new(self._session_key(), carga.encode('ascii'), hashlib.sha256).digest())
+            fd = os.open(self.session_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='ascii') as f:
+                f.write(f"{carga}.{assinatura}")
+            return True
+        except (OSError, KeyError) as e:
+            print(f"Erro ao salvar sessão: {e}")
+            return False
+    
+    def resume_session(self, validade: float) -> Optional[str]:
+        """
+        Retoma a sessão salva, se ainda for válida
+        
+        Confere assinatura, validade e se o usuário e a senha não mudaram.
+        A validade atual também vale para sessões antigas: reduzir o prazo
+        (ou zerá-lo) invalida as já criadas. Sessões inválidas são apagadas.
+        
+        Args:
+            validade: Idade máxima da sessão em segundos (configuração atual)
+        
+        Returns:
+            Nome do usuário da sessão ou None
+        """
+        if validade <= 0:
+            self.end_session()
+            return None
+
+        try:
+            with open(self.session_file, 'r', encoding='ascii') as f:
+                carga, assinatura = f.read().strip().split(".")
+            with open(self.key_file, 'rb') as f:
+                chave = f.read()
+        except (OSError, ValueError):
+            return None
+        
+        esperada = _b64(hmac.new(chave, carga.encode('ascii'), hashlib.sha256).digest())
+        try:
+            if not hmac.compare_digest(esperada, assinatura):
+                raise ValueError("assinatura inválida")
+            dados = json.loads(_b64_decode(carga))
+            username = dados["usuario"]
+            agora = time.time()
+            if dados["expira"] < agora or not dados["criada"] <= agora < dados["criada"] + validade:
+                raise ValueError("expirada")
+            if not hmac.compare_digest(dados["senha"], self._session_fingerprint(username)):
+                raise ValueError("senha alterada")
+        except (ValueError, KeyError, TypeError):
+            self.end_session()
+            return None
+        return username
+    
+    def end_session(self):
+        """Apaga a sessão salva (próxima abertura pede login)"""
+        try:
+            os.remove(self.session_file)
+        except FileNotFoundError:
+            pass
+    
     def get_user_info(self, username: str) -> Optional[Dict]:
         """
         Retorna informações do usuário (sem senha)
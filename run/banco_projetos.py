@@ -1,3 +1,4 @@
+import startup_probe  # Primeiro import: marca o início quando a sonda está ativa
 import os
 import tkinter as tk
 from tkinter import messagebox, ttk
@@ -7,8 +8,18 @@ import shutil
 import subprocess
 import sys
 import json
-import re
 import threading
+import queue
+import importlib.util
+import time
+from bisect import bisect_right
+from concurrent.futures import Future
+from datetime import datetime
+
+import logging
+
+import metrics
+from log_config import configurar_logging
 
 # Importações específicas do Windows (só carrega se estiver no Windows)
 if sys.platform == "win32":
@@ -21,13 +32,9 @@ if sys.platform == "win32":
 else:
     HAS_WIN32 = False
 
-# Importar módulo Firebase Sync
-try:
-    from firebase_sync import FirebaseSync
-    FIREBASE_AVAILABLE = True
-except ImportError:
-    FIREBASE_AVAILABLE = False
-    print("⚠️ Firebase não disponível. Usando modo local.")
+# Módulo Firebase Sync: importado sob demanda (firebase_admin e os clientes
+# google-cloud custam segundos na inicialização). Aqui só verificamos se existe.
+FIREBASE_AVAILABLE = importlib.util.find_spec("firebase_admin") is not None
 
 # Importar módulo de autenticação
 try:
@@ -35,7 +42,10 @@ try:
     AUTH_AVAILABLE = True
 except ImportError:
     AUTH_AVAILABLE = False
-    print("⚠️ Módulo de autenticação não disponível.")
+
+from catalog import Catalogo, TIPOS, TODOS, obter_arquivo_local
+from file_watcher import FolderWatcher, EVENTO_CRIADO, EVENTO_REMOVIDO, EVENTO_RESSINCRONIZAR
+from scanner import varrer_pasta
 
 # ======= CONFIGURAÇÕES =======
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -48,7 +58,16 @@ DEFAULT_CONFIG = {
     "mostrar_todos_ao_iniciar": True,
     "nome_arquivo_copia": "PROJETO.dwg",
     "usar_firebase": True,  # Usar Firebase Storage por padrão
-    "sincronizar_ao_iniciar": True
+    "sincronizar_ao_iniciar": True,
+    "observar_pasta": True,  # Atualiza a lista local automaticamente (sem F5)
+    "servidor_catalogo": "",  # Ex.: "http://servidor:8765" (ver catalog_server.py)
+    "reconectar_offline_s": 30,  # Sem rede: intervalo entre tentativas de reconexão
+    "sessao_horas": 0,  # Reabrir sem login dentro deste prazo (0 = sempre pedir senha)
+    "verificar_cache_min": 60,  # Conferir o cache com o md5 remoto a cada N min (0 = nunca)
+    "nivel_log": "INFO",  # DEBUG mostra uma linha por arquivo na sincronização
+    "pasta_logs": os.path.join(SCRIPT_DIR, "logs"),
+    "perfil": "",  # "cprofile" ou "amostragem" para capturar perfil (ver metrics.py)
+    "pasta_diagnostico": os.path.join(SCRIPT_DIR, "diagnostico")
 }
 
 def carregar_config():
@@ -77,18 +96,122 @@ PASTA_DWGS = CONFIG["pasta_dwgs"]
 if not os.path.exists(PASTA_DWGS):
     PASTA_DWGS = CONFIG["pasta_dwgs_windows"]
 
+logger = logging.getLogger("banco_projetos")
+
 # =============================
 
+def em_background(funcao, nome=None) -> Future:
+    """Executa funcao numa thread daemon e retorna o Future do resultado"""
+    futuro = Future()
+    
+    def executar():
+        if not futuro.set_running_or_notify_cancel():
+            return
+        try:
+            futuro.set_result(funcao())
+        except BaseException as e:
+            futuro.set_exception(e)
+    
+    threading.Thread(target=executar, name=nome, daemon=True).start()
+    return futuro
+
+
+def montar_catalogo_local():
+    """Catálogo da pasta local, ou None se não existe ou falhou (fora da thread do Tk)"""
+    if not os.path.exists(PASTA_DWGS):
+        return None
+    try:
+        catalogo = Catalogo()
+        catalogo.carregar_local(PASTA_DWGS)
+        return catalogo
+    except Exception as e:
+        logger.warning("Pré-carga da pasta local falhou: %s", e)
+        return None
+
+
+def ler_listagem_salva():
+    """
+    Última listagem da nuvem salva no cache, com o conteúdo do cache
+    
+    Returns:
+        Tupla (pasta_cache, arquivos, salva_em, em_cache, catalogo) ou None
+        se não há listagem salva
+    """
+    from firebase_sync import pasta_cache, carregar_listagem
+    pasta = pasta_cache()
+    salva = carregar_listagem(pasta)
+    if salva is None:
+        return None
+    arquivos, salva_em = salva
+    em_cache = set(varrer_pasta(str(pasta))) if pasta.is_dir() else set()
+    catalogo = Catalogo()
+    catalogo.carregar_firebase(arquivos)
+    return pasta, arquivos, salva_em, em_cache, catalogo
+
+
+def conectar_firebase():
+    """
+    Conecta ao Firebase, lista e monta o catálogo (fora da thread do Tk)
+    
+    Returns:
+        Tupla (firebase_sync, arquivos, catalogo)
+    
+    Raises:
+        Exception: se a conexão ou a listagem falhar
+    """
+    # Import tardio: firebase_admin só é carregado aqui
+    from firebase_sync import FirebaseSync
+    firebase_sync = FirebaseSync()
+    arquivos = firebase_sync.list_files(campos=("name",))
+    if not firebase_sync.online:
+        raise ConnectionError("listagem do Firebase Storage falhou")
+    # A tela vai mostrar esta listagem: as sincronizações aplicam o que mudar depois dela
+    firebase_sync.marcar_base(arquivos)
+    catalogo = Catalogo()
+    catalogo.carregar_firebase(arquivos)
+    return firebase_sync, arquivos, catalogo
+
+
+class PreCarregamento:
+    """
+    Catálogo e conexão preparados em background enquanto o login está aberto
+    
+    Cada etapa é um Future: a janela principal usa o que já terminou e
+    recebe o restante quando ficar pronto (ver BuscaDWG.__init__).
+    """
+    
+    def __init__(self):
+        self.local = None
+        self.salva = None    # None quando o Firebase não será usado
+        self.conexao = None
+        self.iniciado = False
+    
+    def iniciar(self):
+        """Dispara as etapas (chamadas repetidas não fazem nada)"""
+        if self.iniciado:
+            return
+        self.iniciado = True
+        self.local = em_background(montar_catalogo_local, "precarga-local")
+        if (not CONFIG.get("servidor_catalogo")
+                and CONFIG.get("usar_firebase", True) and FIREBASE_AVAILABLE):
+            self.salva = em_background(ler_listagem_salva, "precarga-listagem")
+            self.conexao = em_background(conectar_firebase, "precarga-firebase")
+
+
 class BuscaDWG:
-    def __init__(self, root, username=None):
+    def __init__(self, root, username=None, precarga=None, auth_manager=None):
         self.root = root
         self.username = username
+        self.auth_manager = auth_manager
+        self.saiu = False  # "Sair": volta para a janela de login
         titulo = "Banco de Projetos"
         if username:
             titulo += f" [👤 {username}]"
         self.root.title(titulo)
         self.root.geometry("850x550")
         self.root.minsize(650, 450)
+        startup_probe.marcar_ao_mapear(self.root, startup_probe.PRINCIPAL_VISIVEL)
+        startup_probe.agendar_encerramento(self.root)
         
         # Configurar tema
         self.style = ttk.Style()
@@ -98,56 +221,414 @@ class BuscaDWG:
             pass
         
         # Variáveis
-        self.arquivos_cache = []
+        self.catalogo = Catalogo()
+        self.registros_tree = {}  # iid do Treeview (nome do arquivo) -> Projeto da linha
         self.ordem_atual = {"coluna": None, "reverso": False}
         self.firebase_sync = None
         self.usando_firebase = False
+        self.servidor = None
+        self.observador = None
+        self.verificador = None  # VerificadorCache (integridade do cache em segundo plano)
+        self.eventos_pasta = queue.Queue()
+        
+        # Modo offline: última listagem da nuvem salva no cache
+        self.offline = False
+        self.listagem_offline = None
+        self.em_cache = None  # nomes com cópia no cache (só no modo offline)
+        self.pasta_cache = None
+        self.conectando = False
+        self.reconexao = None  # id do after() da próxima tentativa
         
         # Configurar interface primeiro (para criar label_status)
         self.criar_interface()
         self.configurar_atalhos()
         
-        # Inicializar Firebase se configurado (após interface criada)
-        if CONFIG.get("usar_firebase", True) and FIREBASE_AVAILABLE:
-            self.inicializar_firebase()
+        conexao = precarga.conexao if precarga else None
+        if conexao is not None and conexao.done() and conexao.exception() is None:
+            # A conexão terminou durante o login: abre direto com o catálogo da nuvem
+            self._firebase_conectado(*conexao.result())
+        else:
+            # Arquivos locais primeiro: a janela aparece sem esperar a nuvem
+            # nem a varredura da pasta (que entra quando terminar)
+            if precarga:
+                self.mostrar_status("⏳ Carregando projetos...", "blue")
+                self._ao_concluir(precarga.local, self._catalogo_local_pronto)
+            else:
+                self._abrir_catalogo_local(None)
+            
+            # Conectar ao servidor de catálogo ou ao Firebase em background
+            if CONFIG.get("servidor_catalogo"):
+                self.conectar_servidor(CONFIG["servidor_catalogo"])
+            elif CONFIG.get("usar_firebase", True) and FIREBASE_AVAILABLE:
+                self.abrir_listagem_salva(precarga.salva if precarga else None)
+                self.inicializar_firebase(conexao)
         
-        # Carregar arquivos
-        self.carregar_arquivos()
+        # Focar no campo de busca
+        self.entrada.focus_set()
+    
+    def _catalogo_local_pronto(self, futuro):
+        """Varredura da pasta local concluída em background (roda na thread do Tk)"""
+        if self.usando_firebase or self.offline:
+            return  # A nuvem (ou a listagem salva) já está na tela
+        self._abrir_catalogo_local(futuro.result() if futuro.exception() is None else None)
+    
+    def _abrir_catalogo_local(self, catalogo):
+        """Mostra o catálogo local e, no modo local, passa a observar a pasta"""
+        self.carregar_arquivos(catalogo=catalogo)
         
         # Mostrar todos ao iniciar se configurado
         if CONFIG.get("mostrar_todos_ao_iniciar", True):
             self.buscar_arquivos()
         
-        # Focar no campo de busca
-        self.entrada.focus_set()
+        if (not CONFIG.get("servidor_catalogo")
+                and not (CONFIG.get("usar_firebase", True) and FIREBASE_AVAILABLE)
+                and CONFIG.get("observar_pasta", True)):
+            # No modo local, observar a pasta em vez de depender do F5
+            self.iniciar_observador()
+    
+    def conectar_servidor(self, url):
+        """Usa o servidor de catálogo da rede local (cliente fino)"""
+        self.mostrar_status("🖧 Conectando ao servidor de catálogo...", "blue")
+        
+        def conectar_thread():
+            try:
+                from catalog_server import CatalogClient
+                cliente = CatalogClient(url)
+                arquivos = cliente.list_files()
+            except Exception as e:
+                self.root.after(0, lambda erro=e: self._servidor_indisponivel(erro))
+                return
+            self.root.after(0, lambda: self._servidor_conectado(cliente, arquivos))
+        
+        threading.Thread(target=conectar_thread, daemon=True).start()
+    
+    def _servidor_indisponivel(self, erro):
+        """Sem servidor: conecta direto ao Firebase ou fica no modo local"""
+        logger.warning("Servidor de catálogo indisponível: %s", erro)
+        if CONFIG.get("usar_firebase", True) and FIREBASE_AVAILABLE:
+            self.abrir_listagem_salva()
+            self.inicializar_firebase()
+        else:
+            self._firebase_indisponivel(erro)
+    
+    def _servidor_conectado(self, cliente, arquivos):
+        """Catálogo e downloads passam a vir do servidor (roda na thread do Tk)"""
+        self.servidor = cliente
+        # O cliente implementa list_files/download_file como o FirebaseSync
+        self.firebase_sync = cliente
+        self.usando_firebase = True
+        self.carregar_arquivos(arquivos)
+        self.buscar_arquivos()
     
-    def inicializar_firebase(self):
-        """Inicializa conexão com Firebase"""
+    def _ao_concluir(self, futuro, callback):
+        """Chama callback(futuro) na thread do Tk quando o Future terminar"""
+        if futuro.done():
+            callback(futuro)
+        else:
+            futuro.add_done_callback(lambda f: self._na_thread_tk(lambda: callback(f)))
+    
+    def _na_thread_tk(self, funcao):
+        """Agenda funcao na thread do Tk; ignora se a janela já foi fechada"""
+        try:
+            self.root.after(0, funcao)
+        except (RuntimeError, tk.TclError):
+            pass
+    
+    def abrir_listagem_salva(self, futuro=None):
+        """
+        Lê em background a última listagem da nuvem e o conteúdo do cache
+        
+        Args:
+            futuro: Leitura já iniciada (pré-carga do login)
+        """
+        if futuro is None:
+            futuro = em_background(ler_listagem_salva)
+        self._ao_concluir(futuro, self._listagem_salva_lida)
+    
+    def _listagem_salva_lida(self, futuro):
+        if futuro.exception() is not None:
+            logger.warning("Listagem salva indisponível: %s", futuro.exception())
+        elif futuro.result() is not None:
+            self._aplicar_listagem_salva(*futuro.result())
+    
+    def _aplicar_listagem_salva(self, pasta, arquivos, salva_em, em_cache, catalogo=None):
+        """Mostra a listagem salva enquanto a nuvem não responde (thread do Tk)"""
+        if self.usando_firebase:
+            return  # A nuvem respondeu antes: vale a listagem atual
+        
+        self.offline = True
+        self.pasta_cache = pasta
+        self.listagem_offline = arquivos
+        self.em_cache = em_cache
+        if self.observador:
+            # A pasta local não é a origem da lista no modo offline
+            self.observador.stop()
+            self.observador = None
+        
+        self.carregar_arquivos(catalogo=catalogo)
+        self.buscar_arquivos()
+        
         try:
-            self.firebase_sync = FirebaseSync()
-            self.usando_firebase = True
+            quando = datetime.fromisoformat(salva_em).strftime("%d/%m %H:%M")
+        except (TypeError, ValueError):
+            quando = "?"
+        self.label_pasta.config(text=f"📴 Offline — listagem de {quando}")
+        if not self.conectando:
+            self._agendar_reconexao()
+    
+    def _agendar_reconexao(self):
+        """Tenta conectar de novo mais tarde (modo offline)"""
+        if self.reconexao:
+            self.root.after_cancel(self.reconexao)
+        intervalo = max(1, int(CONFIG.get("reconectar_offline_s", 30)))
+        self.reconexao = self.root.after(intervalo * 1000, self._reconectar)
+    
+    def _reconectar(self):
+        self.reconexao = None
+        if not self.usando_firebase and not self.conectando:
+            self.inicializar_firebase()
+    
+    def inicializar_firebase(self, futuro=None):
+        """
+        Conecta ao Firebase em background e troca para o catálogo da nuvem
+        
+        Args:
+            futuro: Conexão já iniciada (pré-carga do login)
+        """
+        if not self.offline:
+            self.mostrar_status("☁️ Conectando ao Firebase...", "blue")
+        self.conectando = True
+        
+        if futuro is None:
+            futuro = em_background(conectar_firebase)
+        self._ao_concluir(futuro, self._conexao_concluida)
+    
+    def _conexao_concluida(self, futuro):
+        if futuro.exception() is not None:
+            self._firebase_indisponivel(futuro.exception())
+        else:
+            self._firebase_conectado(*futuro.result())
+    
+    def _firebase_indisponivel(self, erro):
+        """Permanece no modo local (ou offline) quando a conexão falha"""
+        self.conectando = False
+        self.usando_firebase = False
+        logger.warning("Firebase não inicializado: %s", erro)
+        if self.offline:
+            # Listagem salva na tela: tentar de novo e reconciliar depois
+            self._agendar_reconexao()
+            return
+        
+        self.mostrar_status(f"⚠ Firebase offline: {str(erro)[:40]}", "orange")
+        if CONFIG.get("observar_pasta", True) and self.observador is None:
+            self.iniciar_observador()
+    
+    def _firebase_conectado(self, firebase_sync, arquivos, catalogo=None):
+        """Aplica a listagem (e o catálogo) obtidos em background (roda na thread do Tk)"""
+        self.conectando = False
+        self.firebase_sync = firebase_sync
+        self.usando_firebase = True
+        self.pasta_cache = firebase_sync.cache_dir
+        
+        # Saindo do modo offline: a listagem nova substitui a salva
+        antes = self.catalogo.nomes() if self.offline else None
+        self.offline = False
+        self.listagem_offline = None
+        self.em_cache = None
+        self.label_pasta.config(text=f"📂 {PASTA_DWGS}")
+        
+        self.carregar_arquivos(arquivos, catalogo)
+        self.buscar_arquivos()
+        
+        if antes is not None:
+            depois = self.catalogo.nomes()
+            novos, removidos = len(depois - antes), len(antes - depois)
+            logger.info("Conexão restabelecida: %d novos, %d removidos desde a listagem salva",
+                        novos, removidos)
+            self.mostrar_status(f"☁️ Online: {novos} novos, {removidos} removidos", "green")
+        
+        # Sincronizar ao iniciar se configurado
+        if CONFIG.get("sincronizar_ao_iniciar", True):
+            self.mostrar_status("🔄 Sincronizando com Firebase...", "blue")
             
-            # Sincronizar ao iniciar se configurado
-            if CONFIG.get("sincronizar_ao_iniciar", True):
-                self.mostrar_status("🔄 Sincronizando com Firebase...", "blue")
-                
-                # Fazer sync em thread separada para não travar a UI
-                def sync_thread():
-                    try:
-                        self.firebase_sync.download_all()
-                        self.root.after(0, lambda: self.mostrar_status("✓ Sincronizado com Firebase", "green"))
-                        # Recarregar lista após sincronização (sem baixar novamente)
-                        self.root.after(0, self.carregar_arquivos)
-                        self.root.after(0, self.buscar_arquivos)
-                    except Exception as e:
-                        self.root.after(0, lambda: self.mostrar_status(f"⚠ Erro sync: {str(e)[:30]}", "orange"))
-                
-                threading.Thread(target=sync_thread, daemon=True).start()
+            # Fazer sync em thread separada para não travar a UI
+            def sync_thread():
+                try:
+                    _, mudancas = self.firebase_sync.download_all()
+                    self.root.after(0, lambda: self.mostrar_status("✓ Sincronizado com Firebase", "green"))
+                    # Só o que mudou desde a listagem da conexão (sem listar de novo)
+                    self.root.after(0, lambda: self._aplicar_sincronizacao(mudancas))
+                except Exception as e:
+                    logger.error("Erro na sincronização inicial: %s", e)
+                    self.root.after(0, lambda erro=e: self.mostrar_status(f"⚠ Erro sync: {str(erro)[:30]}", "orange"))
             
-        except Exception as e:
-            self.mostrar_status(f"⚠ Firebase offline: {str(e)[:40]}", "orange")
-            self.usando_firebase = False
-            print(f"Firebase não inicializado: {e}")
+            threading.Thread(target=sync_thread, daemon=True).start()
+        
+        self.iniciar_auto_sync()
+        self.iniciar_verificacao_cache()
+    
+    def iniciar_verificacao_cache(self):
+        """Conferência do cache nos momentos ociosos (verificar_cache_min; 0 desativa)"""
+        intervalo = float(CONFIG.get("verificar_cache_min", 60) or 0) * 60
+        if self.servidor or self.verificador or intervalo <= 0:
+            return
+        from cache_scrubber import VerificadorCache
+        self.verificador = VerificadorCache(self.firebase_sync)
+        self.verificador.iniciar(intervalo)
+    
+    def iniciar_auto_sync(self):
+        """Sincronização automática adaptativa (SYNC_INTERVAL no .env; 0 desativa)"""
+        if self.servidor or self.firebase_sync.running:
+            return
+        try:
+            intervalo = int(os.getenv("SYNC_INTERVAL", "300"))
+        except ValueError:
+            intervalo = 300
+        if intervalo <= 0:
+            return
+        
+        def ao_mudar(stats, mudancas):
+            self.root.after(0, lambda: self._aplicar_sincronizacao(mudancas, automatica=True))
+        
+        self.firebase_sync.start_auto_sync(intervalo, ao_mudar=ao_mudar)
+    
+    def _aplicar_sincronizacao(self, mudancas, automatica=False):
+        """Aplica as Mudancas de uma sincronização (roda na thread do Tk)"""
+        if not self.usando_firebase or self.servidor:
+            return
+        alterados = self.aplicar_mudancas(mudancas.adicionados, mudancas.removidos,
+                                          prefixo_remoto=mudancas.prefixo)
+        if alterados and automatica:
+            self.mostrar_status(f"🔄 Lista atualizada: {len(mudancas.adicionados)} novos, "
+                                f"{len(mudancas.removidos)} removidos", "green")
+    
+    def aplicar_mudancas(self, adicionados, removidos, prefixo_remoto=None):
+        """
+        Aplica mudanças ao catálogo e só às linhas afetadas da tabela
+        
+        Seleção, rolagem e ordenação atuais são mantidas. Nomes já presentes
+        (ou já ausentes) são ignorados, então aplicar duas vezes não faz mal.
+        
+        Args:
+            adicionados: Nomes (caminhos relativos) que passaram a existir
+            removidos: Nomes que deixaram de existir
+            prefixo_remoto: Prefixo no bucket para arquivos do Firebase
+                (None = arquivos da pasta local)
+        
+        Returns:
+            Quantidade de arquivos adicionados + removidos de fato
+        """
+        existentes = self.catalogo.nomes()
+        removidos = set(removidos) & existentes
+        adicionados = sorted(set(adicionados) - existentes)
+        if not (removidos or adicionados):
+            return 0
+        
+        firebase = prefixo_remoto is not None
+        with metrics.medir("interface.aplicar_mudancas"):
+            self.catalogo.remover(removidos)
+            novos = Catalogo()  # só os adicionados, para testar contra o filtro atual
+            for nome in adicionados:
+                caminho = prefixo_remoto + nome if firebase else None
+                self.catalogo.adicionar(nome, firebase=firebase, caminho_remoto=caminho)
+                novos.adicionar(nome, firebase=firebase, caminho_remoto=caminho)
+            
+            visiveis = [nome for nome in removidos if nome in self.registros_tree]
+            if visiveis:
+                self.tree.delete(*visiveis)
+                for nome in visiveis:
+                    del self.registros_tree[nome]
+            self._inserir_linhas(novos.buscar(self.entrada.get(), self.combo_filtro.get()))
+        
+        self._atualizar_contador()
+        return len(removidos) + len(adicionados)
+    
+    def _inserir_linhas(self, registros):
+        """Insere registros na posição da ordenação atual da tabela"""
+        if not len(registros):
+            return
+        em_cache = self.em_cache
+        coluna = self.ordem_atual["coluna"]
+        if coluna is None:
+            # Sem ordenação por coluna a tabela segue o catálogo, onde os novos vão para o fim
+            for info in registros:
+                self._inserir_linha(info, tk.END, em_cache)
+            return
+        
+        reverso = self.ordem_atual["reverso"]
+        # Chaves em ordem crescente (invertidas se a tabela estiver decrescente)
+        chaves = [getattr(self.registros_tree[iid], coluna).lower() for iid in self.tree.get_children()]
+        if reverso:
+            chaves.reverse()
+        
+        for info in registros:
+            chave = getattr(info, coluna).lower()
+            posicao = bisect_right(chaves, chave)
+            chaves.insert(posicao, chave)
+            indice = len(chaves) - 1 - posicao if reverso else posicao
+            self._inserir_linha(info, indice, em_cache)
+    
+    def _inserir_linha(self, info, indice, em_cache):
+        """Uma linha da tabela; o iid é o nome (único e estável no catálogo)"""
+        self.registros_tree[info.arquivo] = info
+        # Offline, linhas sem cópia no cache aparecem em cinza
+        tags = ("indisponivel",) if em_cache is not None and info.arquivo not in em_cache else ()
+        self.tree.insert("", indice, iid=info.arquivo, tags=tags, values=(
+            info.arquivo, 
+            info.tipo, 
+            info.potencia, 
+            info.modulos
+        ))
+    
+    def _janela_minimizada(self, event):
+        """Sem ninguém olhando, a sincronização automática espera"""
+        if event.widget is self.root and self.firebase_sync and not self.servidor:
+            self.firebase_sync.pausar_auto_sync()
+    
+    def _janela_restaurada(self, event):
+        if event.widget is self.root and self.firebase_sync and not self.servidor:
+            self.firebase_sync.retomar_auto_sync()
+    
+    def iniciar_observador(self):
+        """Inicia o observador da pasta local (inotify ou polling)"""
+        if not os.path.isdir(PASTA_DWGS):
+            return
+        
+        self.observador = FolderWatcher(
+            PASTA_DWGS,
+            lambda evento, nome: self.eventos_pasta.put((evento, nome))
+        )
+        self.observador.start()
+        self.root.after(250, self._processar_eventos_pasta)
+    
+    def _processar_eventos_pasta(self):
+        """Aplica eventos do observador ao catálogo (roda na thread do Tk)"""
+        criados, removidos = set(), set()
+        ressincronizar = False
+        
+        while True:
+            try:
+                evento, nome = self.eventos_pasta.get_nowait()
+            except queue.Empty:
+                break
+            if evento == EVENTO_RESSINCRONIZAR:
+                ressincronizar = True
+            elif evento == EVENTO_CRIADO:
+                criados.add(nome)
+                removidos.discard(nome)
+            elif evento == EVENTO_REMOVIDO:
+                removidos.add(nome)
+                criados.discard(nome)
+        
+        if ressincronizar:
+            self.carregar_arquivos()
+            self.buscar_arquivos()
+        elif criados or removidos:
+            # Atualização incremental: nada de listar a pasta inteira novamente
+            self.aplicar_mudancas(criados, removidos)
+        
+        if self.observador and self.observador.running:
+            self.root.after(250, self._processar_eventos_pasta)
     
     def criar_interface(self):
         """Cria toda a interface gráfica"""
@@ -168,11 +649,11 @@ class BuscaDWG:
         ttk.Label(frame_busca, text="Tipo:").pack(side=tk.LEFT, padx=(10, 3))
         self.combo_filtro = ttk.Combobox(
             frame_busca,
-            values=["Todos", "Bifásico", "Trifásico", "Trafo", "Rural", "Indefinido"],
+            values=[TODOS] + TIPOS,
             state="readonly", 
             width=12
         )
-        self.combo_filtro.set("Todos")
+        self.combo_filtro.set(TODOS)
         self.combo_filtro.pack(side=tk.LEFT, padx=3)
         
         # Botão limpar
@@ -188,6 +669,9 @@ class BuscaDWG:
                    command=self.copiar_para_clipboard).pack(side=tk.LEFT, padx=3)
         ttk.Button(frame_acoes, text=" Atualizar", 
                    command=self.atualizar_lista).pack(side=tk.LEFT, padx=3)
+        if self.auth_manager:
+            ttk.Button(frame_acoes, text="🚪 Sair",
+                       command=self.sair).pack(side=tk.RIGHT, padx=3)
         
         # Contador de resultados
         self.label_contador = ttk.Label(frame_acoes, text="", font=("Arial", 9))
@@ -222,6 +706,8 @@ class BuscaDWG:
         scrollbar_y.grid(row=0, column=1, sticky="ns")
         scrollbar_x.grid(row=1, column=0, sticky="ew")
         
+        self.tree.tag_configure("indisponivel", foreground="gray")
+        
         frame_tabela.grid_rowconfigure(0, weight=1)
         frame_tabela.grid_columnconfigure(0, weight=1)
         
@@ -241,6 +727,8 @@ class BuscaDWG:
         self.tree.bind("<Button-3>", self.menu_contexto)
         self.entrada.bind("<KeyRelease>", self.buscar_arquivos)
         self.combo_filtro.bind("<<ComboboxSelected>>", self.buscar_arquivos)
+        self.root.bind("<Unmap>", self._janela_minimizada, add="+")
+        self.root.bind("<Map>", self._janela_restaurada, add="+")
     
     def configurar_atalhos(self):
         """Configura atalhos de teclado"""
@@ -249,125 +737,104 @@ class BuscaDWG:
         self.root.bind("<Escape>", lambda e: self.limpar_busca())
         self.root.bind("<F5>", lambda e: self.atualizar_lista())
         self.root.bind("<Return>", self.copiar_para_clipboard)
+        # Janela de diagnóstico (oculta, para suporte)
+        self.root.bind("<Control-Shift-D>", lambda e: JanelaDiagnostico(self.root))
     
-    def carregar_arquivos(self):
-        """Carrega lista de arquivos DWG da pasta ou Firebase"""
-        self.arquivos_cache = []
+    def carregar_arquivos(self, arquivos_firebase=None, catalogo=None):
+        """
+        Carrega lista de arquivos DWG da pasta ou Firebase
+        
+        Args:
+            arquivos_firebase: Listagem já obtida em background (evita listar de novo)
+            catalogo: Catálogo já montado em background para a mesma origem
+        """
+        with metrics.medir("catalogo.carregar"):
+            self._carregar_arquivos(arquivos_firebase, catalogo)
+    
+    def _carregar_arquivos(self, arquivos_firebase=None, catalogo=None):
+        """Implementação de carregar_arquivos (medida como catalogo.carregar)"""
+        if catalogo is not None:
+            # Índice de busca já construído fora da thread do Tk
+            self.catalogo = catalogo
+            pronto = True
+        else:
+            self.catalogo.limpar()
+            pronto = False
         
         # Verificar se está usando Firebase
         if self.usando_firebase and self.firebase_sync:
             try:
                 # Listar arquivos do Firebase
-                arquivos_firebase = self.firebase_sync.list_files()
-                
-                for arq_info in arquivos_firebase:
-                    info = self.extrair_info(arq_info['nome'])
-                    info['firebase'] = True
-                    info['caminho_remoto'] = arq_info['caminho']
-                    self.arquivos_cache.append(info)
+                if not pronto:
+                    if arquivos_firebase is None:
+                        arquivos_firebase = self.firebase_sync.list_files(campos=("name",))
+                        if not self.servidor:
+                            # Recarga completa: sincronizações seguintes partem desta listagem
+                            self.firebase_sync.marcar_base(arquivos_firebase)
+                    self.catalogo.carregar_firebase(arquivos_firebase)
                 
-                self.mostrar_status(f"✓ {len(self.arquivos_cache)} arquivos (Firebase Cloud)", "green")
+                total = len(self.catalogo)
+                origem = "Servidor" if self.servidor else "Firebase Cloud"
+                self.mostrar_status(f"✓ {total} arquivos ({origem})", "green")
                 return
             except Exception as e:
                 self.mostrar_status(f"⚠ Erro Firebase, usando local: {str(e)[:30]}", "orange")
         
+        # Sem conexão: última listagem da nuvem salva no cache
+        if self.offline:
+            if not pronto:
+                self.catalogo.carregar_firebase(self.listagem_offline)
+            total = len(self.catalogo)
+            disponiveis = len(self.em_cache.intersection(self.catalogo.nomes()))
+            self.mostrar_status(f"📴 {total} arquivos (offline, {disponiveis} no cache)", "orange")
+            return
+        
         # Modo local (fallback)
         if not os.path.exists(PASTA_DWGS):
             self.mostrar_status(f"⚠ Pasta não encontrada: {PASTA_DWGS}", "red")
             return
         
         try:
-            for arquivo in os.listdir(PASTA_DWGS):
-                if arquivo.lower().endswith(".dwg") and not arquivo.endswith(".bak"):
-                    info = self.extrair_info(arquivo)
-                    info['firebase'] = False
-                    self.arquivos_cache.append(info)
-            
-            self.mostrar_status(f"✓ {len(self.arquivos_cache)} arquivos carregados (Local)", "green")
+            # Varredura recursiva (subpastas por ano/cliente), caminhos relativos
+            total = len(self.catalogo) if pronto else self.catalogo.carregar_local(PASTA_DWGS)
+            self.mostrar_status(f"✓ {total} arquivos carregados (Local)", "green")
         except Exception as e:
             self.mostrar_status(f"✗ Erro ao carregar: {e}", "red")
     
-    def extrair_info(self, nome_arquivo):
-        """Extrai informações do nome do arquivo"""
-        nome_lower = nome_arquivo.lower()
-        
-        # Identificar tipo
-        tipo = "Indefinido"
-        if any(k in nome_lower for k in ['trafo', 'transformador', 'cabine']):
-            tipo = "Trafo"
-        elif any(k in nome_lower for k in ['rural']):
-            tipo = "Rural"
-        elif nome_lower.startswith('tri') or any(k in nome_lower for k in ['3f', 'trifasico', 'trifásico', '380v']):
-            tipo = "Trifásico"
-        elif nome_lower.startswith('bi') or any(k in nome_lower for k in ['2f', 'bifasico', 'bifásico']):
-            tipo = "Bifásico"
-        
-        # Extrair potência (números seguidos de kW ou kWp, ou padrão SIW seguido de número)
-        potencia = ""
-        # Padrão: SIW200G 10,5 ou SIW400G 37,5
-        match = re.search(r'SIW\d+[GH]?\s*(\d+[,.]?\d*)', nome_arquivo, re.IGNORECASE)
-        if match:
-            potencia = match.group(1).replace(',', '.') + " kW"
-        
-        # Extrair quantidade de módulos (número antes de TW, TRINA, JA, ASTRO)
-        modulos = ""
-        match = re.search(r'[-\s](\d+)\s*(TW|TRINA|JA|ASTRO)', nome_arquivo, re.IGNORECASE)
-        if match:
-            modulos = match.group(1) + " mód"
-        
-        return {
-            "arquivo": nome_arquivo,
-            "tipo": tipo,
-            "potencia": potencia,
-            "modulos": modulos
-        }
-    
     def buscar_arquivos(self, event=None):
         """Busca arquivos com base nos filtros"""
-        termo = self.entrada.get().strip().lower()
+        termo = self.entrada.get()
         tipo_filtro = self.combo_filtro.get()
         
-        # Limpar tabela
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Filtrar arquivos
-        resultados = []
-        termos = termo.split()  # Suporta múltiplos termos
+        # Filtrar arquivos (suporta múltiplos termos)
+        with metrics.medir("busca.filtrar"):
+            resultados = self.catalogo.buscar(termo, tipo_filtro)
         
-        for info in self.arquivos_cache:
-            arquivo_lower = info["arquivo"].lower()
+        with metrics.medir("interface.renderizar"):
+            # Limpar tabela
+            self.tree.delete(*self.tree.get_children())
+            self.registros_tree = {}
             
-            # Verificar se todos os termos estão no nome
-            if termos:
-                if not all(t in arquivo_lower for t in termos):
-                    continue
-            
-            # Verificar filtro de tipo
-            if tipo_filtro != "Todos" and info["tipo"] != tipo_filtro:
-                continue
-            
-            resultados.append(info)
-        
-        # Inserir na tabela
-        for info in resultados:
-            self.tree.insert("", tk.END, values=(
-                info["arquivo"], 
-                info["tipo"], 
-                info["potencia"], 
-                info["modulos"]
-            ))
+            # Inserir na tabela: o registro fica guardado por iid para
+            # seleção/cópia sem procurar no catálogo
+            em_cache = self.em_cache
+            for info in resultados:
+                self._inserir_linha(info, tk.END, em_cache)
+        metrics.contar("busca.consultas")
         
-        # Atualizar contador
-        total = len(self.arquivos_cache)
-        encontrados = len(resultados)
-        self.label_contador.config(text=f"📊 {encontrados} de {total} projetos")
+        self._atualizar_contador()
         
         # Selecionar primeiro item se houver resultados
         children = self.tree.get_children()
         if children:
             self.tree.selection_set(children[0])
             self.tree.focus(children[0])
+            startup_probe.resultados_exibidos(self.root)
+    
+    def _atualizar_contador(self):
+        total = len(self.catalogo)
+        encontrados = len(self.registros_tree)
+        self.label_contador.config(text=f"📊 {encontrados} de {total} projetos")
     
     def ordenar_coluna(self, coluna):
         """Ordena a tabela por coluna clicada"""
@@ -378,43 +845,78 @@ class BuscaDWG:
             self.ordem_atual["coluna"] = coluna
             self.ordem_atual["reverso"] = False
         
-        # Obter dados
-        dados = [(self.tree.set(item, coluna), item) for item in self.tree.get_children()]
-        
-        # Ordenar
-        dados.sort(key=lambda x: x[0].lower(), reverse=self.ordem_atual["reverso"])
-        
-        # Reorganizar
-        for index, (val, item) in enumerate(dados):
-            self.tree.move(item, "", index)
+        with metrics.medir("interface.ordenar"):
+            # Obter dados (dos registros, sem consultar cada célula no Tk)
+            dados = [(getattr(self.registros_tree[item], coluna), item)
+                     for item in self.tree.get_children()]
+            
+            # Ordenar
+            dados.sort(key=lambda x: x[0].lower(), reverse=self.ordem_atual["reverso"])
+            
+            # Reorganizar
+            for index, (val, item) in enumerate(dados):
+                self.tree.move(item, "", index)
+    
+    def sair(self):
+        """Encerra a sessão salva e volta para o login (trocar de usuário)"""
+        self.auth_manager.end_session()
+        self.saiu = True
+        if self.reconexao:
+            self.root.after_cancel(self.reconexao)
+        if self.observador:
+            self.observador.stop()
+        if self.verificador:
+            self.verificador.parar()
+        if self.firebase_sync and not self.servidor:
+            self.firebase_sync.stop_auto_sync()
+        self.root.destroy()
     
     def limpar_busca(self):
         """Limpa o campo de busca e reseta filtros"""
         self.entrada.delete(0, tk.END)
-        self.combo_filtro.set("Todos")
+        self.combo_filtro.set(TODOS)
         self.buscar_arquivos()
         self.entrada.focus_set()
     
     def atualizar_lista(self):
         """Recarrega a lista de arquivos"""
-        if self.usando_firebase and self.firebase_sync:
+        if self.servidor:
+            # Cliente fino: só revalida a listagem (304 se nada mudou)
+            def recarregar():
+                try:
+                    arquivos = self.servidor.list_files()
+                    self.root.after(0, lambda: self._atualizar_interface(arquivos))
+                except Exception as e:
+                    self.root.after(0, lambda erro=e: self.mostrar_status(f"✗ Erro: {str(erro)[:30]}", "red"))
+            
+            threading.Thread(target=recarregar, daemon=True).start()
+        elif self.offline:
+            # Offline: F5 tenta reconectar agora (a listagem salva continua na tela)
+            if not self.conectando:
+                self.mostrar_status("☁️ Tentando reconectar...", "blue")
+                self.inicializar_firebase()
+        elif self.usando_firebase and self.firebase_sync:
             self.mostrar_status("🔄 Sincronizando...", "blue")
             
             # Sincronizar em thread separada
             def sync_and_reload():
                 try:
-                    self.firebase_sync.download_all()
-                    self.root.after(0, self._atualizar_interface)
+                    _, mudancas = self.firebase_sync.download_all()
+                    self.root.after(0, lambda: self._aplicar_sincronizacao(mudancas))
+                    self.root.after(0, lambda: self.mostrar_status(
+                        f"✓ Lista atualizada: {len(mudancas.adicionados)} novos, "
+                        f"{len(mudancas.removidos)} removidos", "green"))
                 except Exception as e:
-                    self.root.after(0, lambda: self.mostrar_status(f"✗ Erro: {str(e)[:30]}", "red"))
+                    logger.error("Erro ao sincronizar: %s", e)
+                    self.root.after(0, lambda erro=e: self.mostrar_status(f"✗ Erro: {str(erro)[:30]}", "red"))
             
             threading.Thread(target=sync_and_reload, daemon=True).start()
         else:
             self._atualizar_interface()
     
-    def _atualizar_interface(self):
+    def _atualizar_interface(self, arquivos_firebase=None):
         """Atualiza interface após sincronização"""
-        self.carregar_arquivos()
+        self.carregar_arquivos(arquivos_firebase)
         self.buscar_arquivos()
         self.mostrar_status("✓ Lista atualizada", "green")
     
@@ -426,50 +928,50 @@ class BuscaDWG:
         self.root.after(4000, lambda: self.label_status.config(text=""))
     
     def obter_arquivo_selecionado(self):
-        """Retorna o arquivo selecionado ou None"""
+        """Retorna o registro (Projeto) selecionado ou None"""
         selecao = self.tree.selection()
         if not selecao:
             self.mostrar_status("⚠ Selecione um arquivo primeiro", "orange")
             return None
         
-        item = self.tree.item(selecao[0])
-        return item['values'][0]
+        return self.registros_tree.get(selecao[0])
     
     def copiar_para_clipboard(self, event=None):
         """Copia o arquivo selecionado para a área de transferência"""
-        arquivo = self.obter_arquivo_selecionado()
-        if not arquivo:
+        with metrics.medir("copiar"):
+            self._copiar_para_clipboard()
+    
+    def _copiar_para_clipboard(self):
+        """Implementação de copiar_para_clipboard (medida como copiar)"""
+        info_arquivo = self.obter_arquivo_selecionado()
+        if info_arquivo is None:
             return
         
         nome_copia = CONFIG.get("nome_arquivo_copia", "PROJETO.dwg")
         
         try:
             # Verificar se é arquivo do Firebase
-            info_arquivo = next((info for info in self.arquivos_cache if info['arquivo'] == arquivo), None)
-            
-            if info_arquivo and info_arquivo.get('firebase', False):
+            if info_arquivo.firebase:
+                if self.offline and info_arquivo.arquivo not in self.em_cache:
+                    self.mostrar_status("📴 Arquivo indisponível offline (não está no cache)", "orange")
+                    return
                 # Baixar do Firebase se necessário
                 self.mostrar_status("🔍 Verificando arquivo...", "blue")
-                
-                result = self.firebase_sync.download_file(info_arquivo['caminho_remoto'])
-                if not result:
-                    self.mostrar_status("✗ Erro ao obter arquivo", "red")
-                    return
-                
-                # download_file agora retorna tupla (path, status)
-                if isinstance(result, tuple):
-                    caminho_local, status = result
-                    if status == 'cached':
-                        self.mostrar_status("✓ Usando cache local", "green")
-                    else:
-                        self.mostrar_status("✓ Arquivo baixado", "green")
-                else:
-                    caminho_local = result
-                
-                caminho_arquivo = caminho_local
-            else:
-                # Arquivo local
-                caminho_arquivo = os.path.join(PASTA_DWGS, arquivo)
+            
+            caminho_arquivo, status = obter_arquivo_local(
+                info_arquivo, PASTA_DWGS,
+                None if self.offline else self.firebase_sync,
+                None if self.servidor else self.pasta_cache
+            )
+            if not caminho_arquivo:
+                self.mostrar_status("✗ Erro ao obter arquivo", "red")
+                return
+            if status == 'cached':
+                self.mostrar_status("✓ Usando cache local", "green")
+            elif status == 'offline':
+                self.mostrar_status("📴 Usando cache local (offline)", "orange")
+            elif status == 'downloaded':
+                self.mostrar_status("✓ Arquivo baixado", "green")
             
             # Copiar para pasta temporária
             pasta_temp = tempfile.gettempdir()
@@ -521,10 +1023,70 @@ class BuscaDWG:
             menu.grab_release()
 
 
+class JanelaDiagnostico:
+    """Métricas de desempenho em tempo real (Ctrl+Shift+D na janela principal)"""
+    
+    INTERVALO_MS = 1000
+    
+    def __init__(self, parent):
+        self.janela = tk.Toplevel(parent)
+        self.janela.title("Diagnóstico de desempenho")
+        self.janela.geometry("760x420")
+        
+        frame = ttk.Frame(self.janela, padding="8")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        colunas = ("metrica", "contagem", "media", "p50", "p95", "max", "total")
+        titulos = ("Métrica", "Contagem", "Média (ms)", "p50 (ms)", "p95 (ms)", "Máx (ms)", "Total (ms)")
+        self.tree = ttk.Treeview(frame, columns=colunas, show="headings", height=14)
+        for coluna, titulo in zip(colunas, titulos):
+            self.tree.heading(coluna, text=titulo)
+            self.tree.column(coluna, width=90, anchor=tk.E)
+        self.tree.column("metrica", width=200, anchor=tk.W)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        
+        frame_botoes = ttk.Frame(frame)
+        frame_botoes.pack(fill=tk.X, pady=(8, 0))
+        ttk.Button(frame_botoes, text="💾 Salvar JSON", command=self.salvar).pack(side=tk.LEFT, padx=3)
+        ttk.Button(frame_botoes, text="🧹 Zerar", command=self.zerar).pack(side=tk.LEFT, padx=3)
+        self.label_status = ttk.Label(frame_botoes, text="", font=("Arial", 9))
+        self.label_status.pack(side=tk.RIGHT)
+        
+        self.atualizar()
+    
+    def atualizar(self):
+        """Redesenha a tabela com o snapshot atual (repete enquanto aberta)"""
+        if not self.janela.winfo_exists():
+            return
+        dados = metrics.snapshot()
+        self.tree.delete(*self.tree.get_children())
+        for nome, h in dados["histogramas"].items():
+            self.tree.insert("", tk.END, values=(
+                nome, h["contagem"], f"{h['media_ms']:.2f}", f"{h['p50_ms']:.2f}",
+                f"{h['p95_ms']:.2f}", f"{h['max_ms']:.2f}", f"{h['total_ms']:.0f}"
+            ))
+        for nome, valor in dados["contadores"].items():
+            self.tree.insert("", tk.END, values=(nome, f"{valor:g}", "", "", "", "", ""))
+        self.janela.after(self.INTERVALO_MS, self.atualizar)
+    
+    def salvar(self):
+        """Grava as métricas em JSON na pasta de diagnóstico"""
+        nome = f"metricas_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        try:
+            caminho = metrics.salvar_json(os.path.join(CONFIG["pasta_diagnostico"], nome))
+            self.label_status.config(text=f"✓ {caminho}")
+        except OSError as e:
+            self.label_status.config(text=f"✗ {e}")
+    
+    def zerar(self):
+        metrics.zerar()
+        self.atualizar()
+
+
 class LoginWindow:
     """Janela de login para autenticação"""
     
-    def __init__(self, root):
+    def __init__(self, root, auth_manager=None):
         self.root = root
         self.root.title("Banco de Projetos - Login")
         self.root.geometry("400x300")
@@ -536,7 +1098,8 @@ class LoginWindow:
         y = (self.root.winfo_screenheight() // 2) - (300 // 2)
         self.root.geometry(f"400x300+{x}+{y}")
         
-        self.auth_manager = AuthManager()
+        self.auth_manager = auth_manager or AuthManager()
+        self.verificando = False
         self.authenticated = False
         self.username = None
         
@@ -544,6 +1107,19 @@ class LoginWindow:
         
         # Focar no campo de usuário
         self.entry_user.focus_set()
+        
+        # Medição de inicialização (benchmarks/bench_startup.py)
+        startup_probe.marcar_ao_mapear(self.root, startup_probe.LOGIN_VISIVEL)
+        startup_probe.agendar_encerramento(self.root)
+        if startup_probe.credenciais():
+            self.root.after(50, self._login_sonda)
+    
+    def _login_sonda(self):
+        """Preenche o login com as credenciais da sonda e autentica normalmente"""
+        usuario, senha = startup_probe.credenciais()
+        self.entry_user.insert(0, usuario)
+        self.entry_pass.insert(0, senha)
+        self.fazer_login()
     
     def criar_interface(self):
         """Cria interface de login"""
@@ -583,12 +1159,12 @@ class LoginWindow:
         self.entry_pass.bind("<Return>", lambda e: self.fazer_login())
         
         # Botão de login
-        btn_login = ttk.Button(
+        self.btn_login = ttk.Button(
             campos_frame,
             text="🔓 Entrar",
             command=self.fazer_login
         )
-        btn_login.pack(fill=tk.X, ipady=8)
+        self.btn_login.pack(fill=tk.X, ipady=8)
         
         # Label de status
         self.label_status = ttk.Label(
@@ -616,24 +1192,90 @@ class LoginWindow:
         if not username or not password:
             self.mostrar_erro("Preencha usuário e senha")
             return
+        if self.verificando:
+            return
+        
+        # A verificação (PBKDF2) é lenta de propósito: roda fora da thread do Tk
+        self.verificando = True
+        self.btn_login.state(["disabled"])
+        self.label_status.config(text="⏳ Verificando...", foreground="gray")
         
-        if self.auth_manager.authenticate(username, password):
+        # O resultado volta por uma fila lida pela própria thread do Tk: a
+        # worker nunca toca na janela (que pode ter sido fechada nesse meio tempo)
+        resultado = queue.Queue()
+        
+        def verificar_thread():
+            try:
+                resultado.put((self.auth_manager.authenticate(username, password), None))
+            except (TimeoutError, OSError) as e:
+                logger.error("Erro ao acessar o cadastro de usuários: %s", e)
+                resultado.put((False, "Cadastro de usuários indisponível, tente novamente"))
+            except Exception as e:
+                logger.error("Erro na autenticação: %s", e)
+                resultado.put((False, "Erro na autenticação, veja o log"))
+        
+        threading.Thread(target=verificar_thread, daemon=True).start()
+        self._aguardar_login(username, resultado)
+    
+    def _aguardar_login(self, username, resultado):
+        """Consulta a fila da verificação até chegar a resposta (thread do Tk)"""
+        try:
+            ok, erro = resultado.get_nowait()
+        except queue.Empty:
+            self.root.after(50, lambda: self._aguardar_login(username, resultado))
+            return
+        self._login_verificado(username, ok, erro)
+    
+    def _login_verificado(self, username, ok, erro=None):
+        """
+        Resultado da verificação da senha (roda na thread do Tk)
+        
+        Args:
+            username: Usuário digitado
+            ok: Se a senha confere
+            erro: Mensagem quando a verificação falhou por outro motivo
+                  (cadastro travado/ilegível), distinta de senha incorreta
+        """
+        self.verificando = False
+        if ok:
+            startup_probe.marcar(startup_probe.LOGIN_OK)
             self.authenticated = True
             self.username = username
             self.root.destroy()
+        elif erro:
+            self.btn_login.state(["!disabled"])
+            self.mostrar_erro(erro)
         else:
+            self.btn_login.state(["!disabled"])
             self.mostrar_erro("Usuário ou senha incorretos")
             self.entry_pass.delete(0, tk.END)
             self.entry_pass.focus_set()
     
     def mostrar_erro(self, mensagem):
         """Mostra mensagem de erro"""
-        self.label_status.config(text=f"❌ {mensagem}")
+        self.label_status.config(text=f"❌ {mensagem}", foreground="red")
         self.root.after(3000, lambda: self.label_status.config(text=""))
 
 
 def main():
     """Função principal"""
+    configurar_logging(CONFIG.get("pasta_logs"), CONFIG.get("nivel_log", "INFO"))
+    # Avisos da importação, registrados só agora para chegarem ao arquivo de log
+    if not FIREBASE_AVAILABLE:
+        logger.warning("⚠️ Firebase não disponível. Usando modo local.")
+    if not AUTH_AVAILABLE:
+        logger.warning("⚠️ Módulo de autenticação não disponível.")
+    
+    # Modo sem interface: banco_projetos search "tri siw400" --json
+    if len(sys.argv) > 1 and sys.argv[1] == "search":
+        import cli
+        return cli.main(sys.argv[2:], PASTA_DWGS)
+    
+    # Servidor de catálogo na rede local: banco_projetos serve --firebase
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        import catalog_server
+        return catalog_server.main(sys.argv[2:], PASTA_DWGS)
+    
     # Verificar se autenticação está disponível
     if not AUTH_AVAILABLE:
         messagebox.showerror(
@@ -643,21 +1285,75 @@ def main():
         )
         return
     
-    # Janela de login
-    login_root = tk.Tk()
-    login_window = LoginWindow(login_root)
-    login_root.mainloop()
+    # Captura de perfil opcional (app_config.json: "perfil": "cprofile" ou "amostragem")
+    perfilador = None
+    if CONFIG.get("perfil"):
+        try:
+            perfilador = metrics.Perfilador(CONFIG["perfil"], CONFIG["pasta_diagnostico"])
+            perfilador.iniciar()
+        except ValueError as e:
+            print(f"⚠️ {e}", file=sys.stderr)
+            perfilador = None
+    try:
+        return _executar_interface()
+    finally:
+        if perfilador:
+            caminho = perfilador.parar()
+            metrics.salvar_json(os.path.join(CONFIG["pasta_diagnostico"], "metricas_ultima_sessao.json"))
+            print(f"✓ Perfil gravado em {caminho}", file=sys.stderr)
+
+
+def _executar_interface():
+    """Login (ou sessão salva) seguido da janela principal"""
+    auth_manager = AuthManager()
+    precarga = PreCarregamento()
+    
+    # Sessão ainda válida: vai direto para a janela principal (a sonda de
+    # inicialização sempre mede o login completo). Com prazo 0, a sessão
+    # que existir é apagada
+    validade = float(CONFIG.get("sessao_horas", 0) or 0) * 3600
+    username = None
+    if not startup_probe.ativa():
+        username = auth_manager.resume_session(validade)
     
-    # Verificar se foi autenticado
-    if not login_window.authenticated:
-        return
+    # "Sair" na janela principal volta para o login, com uma pré-carga nova
+    while _abrir_janelas(auth_manager, precarga, validade, username):
+        precarga = PreCarregamento()
+        username = None
+
+
+def _abrir_janelas(auth_manager, precarga, validade, username):
+    """
+    Login (se não há sessão) e janela principal
+    
+    Returns:
+        True se o usuário clicou em "Sair", False se fechou o programa
+    """
+    if username is None:
+        # Janela de login
+        login_root = tk.Tk()
+        login_window = LoginWindow(login_root, auth_manager)
+        # Depois que a janela de login for pintada, preparar catálogo e conexão
+        # em background enquanto a senha é digitada
+        login_root.after(200, precarga.iniciar)
+        login_root.mainloop()
+        
+        # Verificar se foi autenticado
+        if not login_window.authenticated:
+            return False
+        username = login_window.username
+        if validade > 0 and not startup_probe.ativa():
+            auth_manager.create_session(username, validade)
+    else:
+        logger.info("Sessão retomada: %s", username)
     
-    # Abrir aplicação principal
-    username = login_window.username
+    # Abrir aplicação principal (sessão retomada ou login em menos de 200 ms: inicia agora)
+    precarga.iniciar()
     root = tk.Tk()
-    app = BuscaDWG(root, username)
+    app = BuscaDWG(root, username, precarga, auth_manager)
     root.mainloop()
+    return app.saiu
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
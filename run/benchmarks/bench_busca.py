@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Benchmark da busca e da latência da interface
+
+Monta catálogos sintéticos com nomes no formato dos reais
+("TRI 1 SIW400G 30 - 80 TW 610.dwg") e mede:
+    extrair_info            µs por nome
+    carregar catálogo       Catalogo.carregar_firebase (listagem pronta)
+    buscar (motor)          Catalogo.buscar a cada tecla, p50/p95
+e, se houver display (ou Xvfb para criar um virtual), a janela real:
+    carregar_arquivos       BuscaDWG.carregar_arquivos
+    buscar_arquivos         filtro + reconstrução do Treeview a cada tecla, p50/p95
+    ordenar_coluna          clique em cada cabeçalho com a lista completa
+
+Uso:
+    python benchmarks/bench_busca.py                              # 1k, 10k e 50k nomes
+    python benchmarks/bench_busca.py --tamanhos 1000 200000 --json resultados/busca.json
+    python benchmarks/bench_busca.py --sem-tk                     # só o motor de busca
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+
+RUN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RUN_DIR)
+
+from catalog import Catalogo, extrair_info, TODOS  # noqa: E402
+
+MODELOS = [
+    "TRI 1 SIW400G {p} - {m} TW 610.dwg",
+    "BI 1 SIW200G {p} + {m} TW 610.dwg",
+    "TRAFO {p} - SIW500H ST040 M3 - {m} TW 610.dwg",
+    "TRI {p} HOYMILES - {m} TW 610.dwg",
+    "RURAL BI 1 SIW200G {p} - {m} JA 550.dwg",
+]
+POTENCIAS = ["3", "5", "6", "8", "9", "10,5", "12", "15", "20", "30", "37,5", "50", "75"]
+
+# Consultas digitadas letra a letra (cada prefixo é uma tecla)
+CONSULTAS = ["tri siw400 30", "bi 5", "trafo 75", "hoymiles", "rural ja", "siw200g 10,5 22 tw"]
+
+COLUNAS = ("arquivo", "tipo", "potencia", "modulos")
+
+
+def gerar_nomes(quantidade: int, semente: int = 42) -> list:
+    """Caminhos relativos ano/cliente/arquivo.dwg com nomes realistas"""
+    aleatorio = random.Random(semente)
+    nomes = []
+    for i in range(quantidade):
+        modelo = MODELOS[i % len(MODELOS)]
+        nome = modelo.format(p=aleatorio.choice(POTENCIAS), m=aleatorio.randint(8, 200))
+        nomes.append(f"{2015 + i % 10}/CLIENTE {i // 50:05d}/{nome}")
+    return nomes
+
+
+def teclas(consultas=CONSULTAS) -> list:
+    """Sequência de textos do campo de busca, uma entrada por tecla"""
+    return [consulta[:n] for consulta in consultas for n in range(1, len(consulta) + 1)]
+
+
+def percentis(amostras_ms: list) -> dict:
+    """p50/p95/máximo em milissegundos"""
+    if len(amostras_ms) < 2:
+        valor = amostras_ms[0] if amostras_ms else 0.0
+        return {"p50": valor, "p95": valor, "max": valor}
+    cortes = statistics.quantiles(amostras_ms, n=100, method="inclusive")
+    return {"p50": round(cortes[49], 3), "p95": round(cortes[94], 3),
+            "max": round(max(amostras_ms), 3)}
+
+
+def _cronometrar(funcao) -> float:
+    inicio = time.perf_counter()
+    funcao()
+    return (time.perf_counter() - inicio) * 1000
+
+
+def medir_motor(nomes: list) -> list:
+    """Etapas sem interface: extrair_info, carga do catálogo e busca por tecla"""
+    listagem = [{"nome": n, "caminho": "CONTROLE/" + n} for n in nomes]
+    catalogo = Catalogo()
+
+    ms_extrair = _cronometrar(lambda: [extrair_info(n) for n in nomes])
+    ms_carregar = _cronometrar(lambda: catalogo.carregar_firebase(listagem))
+    por_tecla = [_cronometrar(lambda t=texto: catalogo.buscar(t, TODOS)) for texto in teclas()]
+
+    return [
+        {"etapa": "extrair_info", "ms": round(ms_extrair, 3),
+         "us_por_nome": round(ms_extrair * 1000 / len(nomes), 3)},
+        {"etapa": "carregar catálogo", "ms": round(ms_carregar, 3)},
+        {"etapa": "buscar (motor)", "teclas": len(por_tecla), **percentis(por_tecla)},
+    ]
+
+
+class _ListagemPronta:
+    """Faz o papel do FirebaseSync com uma listagem já em memória"""
+
+    def __init__(self, listagem):
+        self.listagem = listagem
+
+    def list_files(self):
+        return self.listagem
+
+
+def iniciar_display_virtual():
+    """
+    Garante um display para o Tk
+
+    Returns:
+        Processo do Xvfb iniciado (ou None se já havia display);
+        False se não há display nem Xvfb
+    """
+    if sys.platform == "win32" or sys.platform == "darwin" or os.environ.get("DISPLAY"):
+        return None
+    xvfb = shutil.which("Xvfb")
+    if not xvfb:
+        return False
+    for numero in range(99, 110):
+        if os.path.exists(f"/tmp/.X11-unix/X{numero}"):
+            continue
+        processo = subprocess.Popen([xvfb, f":{numero}", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for _ in range(50):
+            if os.path.exists(f"/tmp/.X11-unix/X{numero}"):
+                os.environ["DISPLAY"] = f":{numero}"
+                return processo
+            time.sleep(0.05)
+        processo.terminate()
+    return False
+
+
+class BancadaTk:
+    """Janela BuscaDWG real, sem Firebase, observador ou servidor"""
+
+    def __init__(self):
+        import tkinter as tk
+        import banco_projetos
+
+        banco_projetos.CONFIG.update({
+            "usar_firebase": False,
+            "observar_pasta": False,
+            "servidor_catalogo": "",
+            "mostrar_todos_ao_iniciar": False,
+        })
+        self.tk = tk
+        self.root = tk.Tk()
+        self.app = banco_projetos.BuscaDWG(self.root)
+        self.root.update()
+
+    def _digitar(self, texto: str):
+        self.app.entrada.delete(0, self.tk.END)
+        self.app.entrada.insert(0, texto)
+
+    def _com_redesenho(self, funcao) -> float:
+        """Tempo da chamada até a janela processar o redesenho"""
+        def executar():
+            funcao()
+            self.root.update_idletasks()
+        return _cronometrar(executar)
+
+    def medir(self, nomes: list) -> list:
+        listagem = [{"nome": n, "caminho": "CONTROLE/" + n} for n in nomes]
+        self.app.usando_firebase = True
+        self.app.firebase_sync = _ListagemPronta(listagem)
+        self.app.combo_filtro.set(TODOS)
+
+        ms_carregar = self._com_redesenho(lambda: self.app.carregar_arquivos(arquivos_firebase=listagem))
+
+        por_tecla = []
+        for texto in teclas():
+            self._digitar(texto)
+            por_tecla.append(self._com_redesenho(self.app.buscar_arquivos))
+
+        # Ordenação com a lista completa (pior caso)
+        self._digitar("")
+        self._com_redesenho(self.app.buscar_arquivos)
+        ordenar = {}
+        for coluna in COLUNAS:
+            ordenar[coluna] = round(self._com_redesenho(lambda c=coluna: self.app.ordenar_coluna(c)), 3)
+
+        return [
+            {"etapa": "carregar_arquivos", "ms": round(ms_carregar, 3)},
+            {"etapa": "buscar_arquivos (tecla)", "teclas": len(por_tecla), **percentis(por_tecla)},
+            {"etapa": "ordenar_coluna", "ms": round(max(ordenar.values()), 3), "por_coluna": ordenar},
+        ]
+
+    def fechar(self):
+        self.root.destroy()
+
+
+def imprimir(tamanho: int, etapas: list):
+    print(f"\n📊 {tamanho} projetos")
+    for e in etapas:
+        if "p50" in e:
+            detalhe = f"p50 {e['p50']:8.2f} ms   p95 {e['p95']:8.2f} ms   máx {e['max']:8.2f} ms"
+        else:
+            detalhe = f"{e['ms']:10.2f} ms"
+            if "us_por_nome" in e:
+                detalhe += f"   ({e['us_por_nome']:.2f} µs/nome)"
+        print(f"  {e['etapa']:<26} {detalhe}")
+
+
+def _versao() -> str:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=RUN_DIR,
+                              capture_output=True, text=True).stdout.strip() or "?"
+    except OSError:
+        return "?"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da busca e da latência da interface")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1000, 10000, 50000],
+                        help="Quantidade de projetos no catálogo sintético")
+    parser.add_argument("--sem-tk", action="store_true", help="Medir só o motor de busca")
+    parser.add_argument("--json", help="Grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    bancada = None
+    xvfb = None
+    if not args.sem_tk:
+        xvfb = iniciar_display_virtual()
+        if xvfb is False:
+            print("⚠️ Sem display e sem Xvfb: medindo só o motor de busca", file=sys.stderr)
+        else:
+            try:
+                bancada = BancadaTk()
+            except Exception as e:
+                print(f"⚠️ Tk indisponível ({e}): medindo só o motor de busca", file=sys.stderr)
+
+    resultados = []
+    try:
+        for tamanho in args.tamanhos:
+            nomes = gerar_nomes(tamanho)
+            etapas = medir_motor(nomes)
+            if bancada:
+                etapas += bancada.medir(nomes)
+            imprimir(tamanho, etapas)
+            resultados.append({"projetos": tamanho, "etapas": etapas})
+    finally:
+        if bancada:
+            bancada.fechar()
+        if xvfb:
+            xvfb.terminate()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "versao": _versao(),
+                "data": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "plataforma": f"{platform.system()} {platform.release()}",
+                "interface": bancada is not None,
+                "resultados": resultados,
+            }, f, indent=2, ensure_ascii=False)
+        print(f"\n✓ Resultados em {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Medição do custo de importação na inicialização (python -X importtime)
+
+Executa cada cenário num processo novo, repetidas vezes, e resume:
+- tempo total até o módulo estar importado (mediana)
+- módulos mais caros (tempo cumulativo, da última execução)
+
+Cenários:
+    banco_projetos   - o que roda antes da janela de login aparecer
+    firebase_sync    - importar o módulo de sincronização (firebase_admin é tardio)
+    firebase_admin   - custo do SDK, pago em background após o login aparecer
+
+Uso:
+    python benchmarks/bench_importtime.py
+    python benchmarks/bench_importtime.py --top 25 --saida benchmarks/resultados/importtime.txt
+"""
+
+import os
+import sys
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+
+RUN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CENARIOS = {
+    "banco_projetos": "import banco_projetos",
+    "firebase_sync": "import firebase_sync",
+    "firebase_admin": "import firebase_admin; from firebase_admin import credentials, storage",
+}
+
+
+def executar(codigo: str):
+    """Roda `codigo` com -X importtime e retorna [(modulo, self_us, cumulativo_us)]"""
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=RUN_DIR, capture_output=True, text=True
+    )
+    if resultado.returncode != 0:
+        return None
+
+    modulos = []
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        campos = linha[len("import time:"):].split("|")
+        if len(campos) != 3:
+            continue
+        modulos.append((campos[2].rstrip(), int(campos[0]), int(campos[1])))
+    return modulos
+
+
+def total_us(modulos) -> int:
+    """Soma dos módulos de nível superior (indentação mínima)"""
+    return sum(cumulativo for nome, _, cumulativo in modulos
+               if not nome.startswith("  "))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o custo de importação na inicialização")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Módulos mais caros a listar")
+    parser.add_argument("--saida", help="Também grava o relatório neste arquivo")
+    args = parser.parse_args()
+
+    linhas = [
+        f"# importtime - {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+        f"# Python {platform.python_version()} ({platform.system()} {platform.machine()})",
+        f"# mediana de {args.repeticoes} processos novos por cenário",
+        "",
+    ]
+
+    for nome, codigo in CENARIOS.items():
+        execucoes = [executar(codigo) for _ in range(args.repeticoes)]
+        if any(e is None for e in execucoes):
+            linhas.append(f"{nome:<16} indisponível neste ambiente (import falhou)")
+            linhas.append("")
+            continue
+
+        mediana = statistics.median(total_us(e) for e in execucoes)
+        linhas.append(f"{nome:<16} {mediana / 1000:8.1f} ms  ({len(execucoes[-1])} módulos)")
+        mais_caros = sorted(execucoes[-1], key=lambda m: m[2], reverse=True)[:args.top]
+        for modulo, _, cumulativo in mais_caros:
+            linhas.append(f"    {cumulativo / 1000:8.1f} ms  {modulo.strip()}")
+        linhas.append("")
+
+    relatorio = "\n".join(linhas)
+    print(relatorio)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(relatorio + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memória do catálogo
+
+Compara o catálogo em colunas (catalog.Catalogo) com o formato anterior,
+uma lista de dicionários por arquivo (arquivo, tipo, potencia, modulos,
+firebase, caminho_remoto) mais a lista paralela de nomes em minúsculas.
+A memória é medida com tracemalloc (só o que o catálogo mantém alocado).
+
+Uso:
+    python benchmarks/bench_memoria.py                       # 10k, 100k e 200k
+    python benchmarks/bench_memoria.py --tamanhos 500000
+"""
+
+import os
+import gc
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog import Catalogo, extrair_info  # noqa: E402
+from bench_busca import gerar_nomes  # noqa: E402
+
+
+def catalogo_dicionarios(listagem):
+    """Formato anterior: um dicionário por arquivo + nomes em minúsculas"""
+    itens = []
+    nomes_lower = []
+    for arq in listagem:
+        info = extrair_info(arq['nome'])
+        info['firebase'] = True
+        info['caminho_remoto'] = arq['caminho']
+        itens.append(info)
+        nomes_lower.append(arq['nome'].lower())
+    return itens, nomes_lower
+
+
+def catalogo_colunas(listagem):
+    catalogo = Catalogo()
+    catalogo.carregar_firebase(listagem)
+    return catalogo
+
+
+def medir(construir, listagem):
+    """Memória retida (bytes) e tempo de carga (s) do catálogo construído"""
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = construir(listagem)
+    duracao = time.perf_counter() - inicio
+    gc.collect()
+    retido, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del resultado
+    return retido, duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória do catálogo: dicionários x colunas")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 100_000, 200_000])
+    args = parser.parse_args()
+
+    print(f"{'projetos':>9} {'formato':<14} {'MB':>8} {'bytes/projeto':>14} {'carga (s)':>10}")
+    for tamanho in args.tamanhos:
+        listagem = [{'nome': n, 'caminho': 'CONTROLE/' + n} for n in gerar_nomes(tamanho)]
+        base = None
+        for nome, construir in (("dicionários", catalogo_dicionarios), ("colunas", catalogo_colunas)):
+            retido, duracao = medir(construir, listagem)
+            linha = (f"{tamanho:>9} {nome:<14} {retido / 1e6:>8.1f} "
+                     f"{retido / tamanho:>14.0f} {duracao:>10.2f}")
+            if base:
+                linha += f"   ({base / retido:.1f}x menor)"
+            base = base or retido
+            print(linha)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
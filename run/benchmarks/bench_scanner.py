@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark da varredura recursiva da pasta de projetos
+
+Cria uma árvore sintética no formato do arquivo real (ano/cliente/arquivo.dwg)
+e compara os.walk sequencial com scanner.varrer_pasta (1 thread e paralelo).
+
+Uso:
+    python benchmarks/bench_scanner.py                     # 100k arquivos
+    python benchmarks/bench_scanner.py --arquivos 20000
+    python benchmarks/bench_scanner.py --pasta /mnt/rede/CONTROLE   # árvore real
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import arquivo_relevante, varrer_pasta  # noqa: E402
+
+MODELOS = [
+    "TRI 1 SIW400G 30 - {n} TW 610.dwg",
+    "BI 1 SIW200G 9 + {n} TW 610.dwg",
+    "TRAFO 75 - SIW500H ST040 M3 - {n} TW 610.dwg",
+    "TRI {n} HOYMILES - 56 TW 610.dwg",
+    "BI 1 SIW200G 5 - {n} TW 610.bak",
+]
+
+
+def criar_arvore(raiz: str, total: int, clientes_por_ano: int = 100):
+    """Cria árvore ano/cliente/arquivo com `total` arquivos vazios"""
+    anos = list(range(2015, 2025))
+    por_pasta = max(1, total // (len(anos) * clientes_por_ano))
+    criados = 0
+    for ano in anos:
+        for cliente in range(clientes_por_ano):
+            pasta = os.path.join(raiz, str(ano), f"CLIENTE {cliente:04d}")
+            os.makedirs(pasta, exist_ok=True)
+            for i in range(por_pasta):
+                if criados >= total:
+                    return criados
+                nome = MODELOS[i % len(MODELOS)].format(n=i + 10)
+                nome = nome.replace(".", f" v{i}.", 1) if i >= len(MODELOS) else nome
+                open(os.path.join(pasta, nome), "wb").close()
+                criados += 1
+    return criados
+
+
+def com_os_walk(raiz: str):
+    """Referência: os.walk sequencial com o mesmo filtro"""
+    resultado = []
+    for pasta, _, arquivos in os.walk(raiz):
+        rel = os.path.relpath(pasta, raiz).replace(os.sep, "/")
+        prefixo = "" if rel == "." else rel + "/"
+        resultado.extend(prefixo + a for a in arquivos if arquivo_relevante(a))
+    return sorted(resultado)
+
+
+def medir(nome: str, funcao, repeticoes: int):
+    """Executa e imprime o melhor tempo de `repeticoes`"""
+    melhor = None
+    quantidade = 0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        quantidade = len(funcao())
+        duracao = time.perf_counter() - inicio
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    print(f"  {nome:<32} {melhor * 1000:9.1f} ms   ({quantidade} arquivos)")
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da varredura de pastas")
+    parser.add_argument("--arquivos", type=int, default=100_000,
+                        help="Arquivos na árvore sintética (padrão: 100000)")
+    parser.add_argument("--pasta", help="Usar uma árvore existente em vez da sintética")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Threads do varredor paralelo (padrão: automático)")
+    args = parser.parse_args()
+
+    temporaria = None
+    raiz = args.pasta
+    if not raiz:
+        temporaria = tempfile.mkdtemp(prefix="bench_scanner_")
+        raiz = temporaria
+        print(f"🔨 Criando árvore sintética com {args.arquivos} arquivos em {raiz}...")
+        inicio = time.perf_counter()
+        criar_arvore(raiz, args.arquivos)
+        print(f"   pronta em {time.perf_counter() - inicio:.1f} s\n")
+
+    try:
+        print(f"📂 {raiz}")
+        medir("os.walk (sequencial)", lambda: com_os_walk(raiz), args.repeticoes)
+        medir("varrer_pasta (1 thread)", lambda: varrer_pasta(raiz, max_workers=1),
+              args.repeticoes)
+        medir("varrer_pasta (paralelo)", lambda: varrer_pasta(raiz, max_workers=args.workers),
+              args.repeticoes)
+    finally:
+        if temporaria:
+            shutil.rmtree(temporaria, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
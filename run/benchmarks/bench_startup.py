@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark de inicialização: tempo até o login e até os primeiros resultados
+
+Lança a aplicação (código-fonte ou executável gerado pelo build_exe.py) várias
+vezes com a sonda de inicialização ligada (ver startup_probe.py), faz o login
+automático com um users.json temporário e mede, a partir do lançamento:
+
+    login_visivel         janela de login mapeada na tela
+    login_ok              autenticação concluída
+    principal_visivel     janela principal mapeada
+    primeiros_resultados  primeira lista não vazia na tabela
+
+Termina com código 1 se a mediana passar do orçamento, para uso como teste de
+regressão antes de publicar um build.
+
+Uso:
+    python benchmarks/bench_startup.py                               # código-fonte
+    python benchmarks/bench_startup.py --exe BancoProjetosDWG_Portable/BancoProjetosDWG.exe
+    python benchmarks/bench_startup.py --json benchmarks/resultados/startup.json
+
+Requer display (no Linux sem monitor: xvfb-run python benchmarks/bench_startup.py).
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+RUN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MARCOS = ["login_visivel", "login_ok", "principal_visivel", "primeiros_resultados"]
+
+# Orçamento (segundos desde o lançamento, mediana)
+ORCAMENTO = {
+    "login_visivel": 1.0,
+    "primeiros_resultados": 2.5,
+}
+
+
+def executar_uma_vez(comando, timeout: float):
+    """Lança a aplicação uma vez e retorna {marco: segundos desde o lançamento}"""
+    pasta = tempfile.mkdtemp(prefix="bench_startup_")
+    arquivo_sonda = os.path.join(pasta, "sonda.jsonl")
+    env = dict(os.environ)
+    env.update({
+        "BANCO_PROJETOS_SONDA": arquivo_sonda,
+        "BANCO_PROJETOS_SONDA_LOGIN": "admin:admin",  # users.json novo: usuário padrão
+        "BANCO_PROJETOS_SONDA_TIMEOUT": str(timeout),
+    })
+
+    try:
+        lancamento = time.time()
+        processo = subprocess.Popen(comando, cwd=pasta, env=env,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        try:
+            _, erros = processo.communicate(timeout=timeout + 10)
+        except subprocess.TimeoutExpired:
+            processo.kill()
+            _, erros = processo.communicate()
+
+        tempos = {}
+        if os.path.exists(arquivo_sonda):
+            with open(arquivo_sonda, encoding="utf-8") as f:
+                for linha in f:
+                    marco = json.loads(linha)
+                    tempos[marco["evento"]] = marco["t"] - lancamento
+        if not any(m in tempos for m in MARCOS) and erros:
+            print(erros.decode("utf-8", "replace").strip()[-500:], file=sys.stderr)
+        return tempos
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o tempo de inicialização da aplicação")
+    parser.add_argument("--exe", help="Executável congelado (padrão: rodar banco_projetos.py)")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="Segundos até desistir de uma execução")
+    parser.add_argument("--json", help="Grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    if args.exe:
+        comando = [os.path.abspath(args.exe)]
+        alvo = "congelado"
+    else:
+        comando = [sys.executable, os.path.join(RUN_DIR, "banco_projetos.py")]
+        alvo = "fonte"
+
+    print(f"🚀 Inicialização ({alvo}): {' '.join(comando)}")
+    execucoes = []
+    for i in range(args.repeticoes):
+        tempos = executar_uma_vez(comando, args.timeout)
+        execucoes.append(tempos)
+        resumo = "  ".join(f"{m}={tempos[m]:.2f}s" for m in MARCOS if m in tempos)
+        print(f"  #{i + 1}: {resumo or 'sem marcos (sem display?)'}")
+
+    medianas = {}
+    for marco in MARCOS:
+        valores = [e[marco] for e in execucoes if marco in e]
+        if valores:
+            medianas[marco] = statistics.median(valores)
+
+    print("\n📊 Mediana (s desde o lançamento):")
+    estourou = False
+    for marco in MARCOS:
+        if marco not in medianas:
+            print(f"  {marco:<22}      —")
+            continue
+        limite = ORCAMENTO.get(marco)
+        situacao = ""
+        if limite is not None:
+            ok = medianas[marco] <= limite
+            estourou = estourou or not ok
+            situacao = f"  (orçamento {limite:.1f}s {'✓' if ok else '✗ ESTOUROU'})"
+        print(f"  {marco:<22} {medianas[marco]:6.2f}{situacao}")
+
+    faltando = [m for m in ORCAMENTO if m not in medianas]
+    if faltando:
+        print(f"\n⚠️ Marcos não registrados: {', '.join(faltando)}")
+        estourou = True
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "alvo": alvo,
+                "comando": comando,
+                "plataforma": f"{platform.system()} {platform.release()}",
+                "python": platform.python_version(),
+                "orcamento": ORCAMENTO,
+                "mediana": medianas,
+                "execucoes": execucoes,
+            }, f, indent=2, ensure_ascii=False)
+
+    return 1 if estourou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Benchmark de sincronização contra um bucket simulado (LocalBackend)
+
+Para cada combinação de quantidade de arquivos x latência mede:
+    sync_folder (inicial)       bucket vazio, todos os arquivos enviados
+    sync_folder (sem mudanças)  tudo igual, nada enviado
+    sync_folder (estado salvo)  de novo: md5 da rodada anterior, sem ler arquivos
+    sync_folder (tocados)       mtime alterado, conteúdo igual (só impressão)
+    sync_folder (renomeados)    10% salvos com outro nome (cópia no servidor)
+    sync_folder (versionados)   projeto editado e versão antiga salva como _v1
+                                (o bucket precisa terminar igual à origem)
+    list_files                  listagem do prefixo CONTROLE/
+    download_all (frio)         cache vazio
+    download_all (quente)       cache completo e atualizado
+
+Relata tempo de parede, requisições, bytes transferidos e arquivos
+re-hasheados (md5 calculado). Os tamanhos seguem a distribuição dos DWGs
+reais de CONTROLE/ (1,2 a 4,1 MB), divididos por --escala para rodadas rápidas.
+
+Uso:
+    python benchmarks/bench_sync.py                                  # 100 e 1000 arquivos
+    python benchmarks/bench_sync.py --arquivos 100 1000 10000 --latencias 0 0.005 0.02
+    python benchmarks/bench_sync.py --json resultados/sync_v2.json --comparar resultados/sync_v1.json
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+from datetime import datetime
+
+RUN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RUN_DIR)
+
+from firebase_sync import FirebaseSync  # noqa: E402
+from storage_backends import LocalBackend  # noqa: E402
+
+# Tamanhos (bytes) dos DWGs de CONTROLE/ usados como distribuição de referência
+TAMANHOS_REAIS = [
+    1172996, 1204357, 1458496, 1498478, 1591784, 1618892, 2136233, 2254147,
+    2270974, 2282043, 2568311, 2847709, 2934828, 3093446, 3301085, 3338605,
+    3384832, 3394995, 3494450, 3580304, 3697176, 3730114, 3744990, 3930835,
+    4028037, 4091854, 4094748, 4127365,
+]
+
+MODELOS = [
+    "TRI 1 SIW400G {a} - {b} TW 610.dwg",
+    "BI 1 SIW200G {a} + {b} TW 610.dwg",
+    "TRAFO {a} - SIW500H ST040 M3 - {b} TW 610.dwg",
+    "TRI {a} HOYMILES - {b} TW 610.dwg",
+]
+
+
+class FirebaseSyncMedido(FirebaseSync):
+    """FirebaseSync que conta quantos arquivos foram re-hasheados"""
+
+    hashes = 0
+
+    def _calculate_md5(self, file_path):
+        FirebaseSyncMedido.hashes += 1
+        return super()._calculate_md5(file_path)
+
+    def _calcular_hashes(self, file_path):
+        FirebaseSyncMedido.hashes += 1
+        return super()._calcular_hashes(file_path)
+
+
+def criar_origem(pasta: str, quantidade: int, escala: float, semente: int = 42) -> int:
+    """Gera DWGs sintéticos com nomes e tamanhos realistas; retorna bytes totais"""
+    aleatorio = random.Random(semente)
+    total = 0
+    for i in range(quantidade):
+        nome = MODELOS[i % len(MODELOS)].format(a=i // len(MODELOS) + 1, b=aleatorio.randint(8, 200))
+        subpasta = os.path.join(pasta, str(2015 + i % 10))
+        os.makedirs(subpasta, exist_ok=True)
+        tamanho = max(1, int(aleatorio.choice(TAMANHOS_REAIS) / escala))
+        with open(os.path.join(subpasta, nome), "wb") as f:
+            f.write(b"AC1032" + aleatorio.randbytes(max(0, tamanho - 6)))
+        total += tamanho
+    return total
+
+
+def medir(nome: str, backend: LocalBackend, funcao) -> dict:
+    """Executa uma operação com stdout silenciado e coleta as métricas"""
+    backend.zerar_contadores()
+    FirebaseSyncMedido.hashes = 0
+    with open(os.devnull, "w", encoding="utf-8") as nulo, contextlib.redirect_stdout(nulo):
+        inicio = time.perf_counter()
+        funcao()
+        duracao = time.perf_counter() - inicio
+    return {
+        "operacao": nome,
+        "segundos": round(duracao, 4),
+        "requisicoes": backend.contadores["requisicoes"],
+        "bytes_baixados": backend.contadores["bytes_baixados"],
+        "bytes_enviados": backend.contadores["bytes_enviados"],
+        "rehash": FirebaseSyncMedido.hashes,
+    }
+
+
+def tocar(pasta: str):
+    """Atualiza o mtime de todos os arquivos sem mudar o conteúdo"""
+    for raiz, _, arquivos in os.walk(pasta):
+        for nome in arquivos:
+            os.utime(os.path.join(raiz, nome))
+
+
+def renomear(pasta: str, fracao: float = 0.1):
+    """Salva uma fração dos projetos com outro nome (mesmo conteúdo)"""
+    arquivos = sorted(os.path.join(raiz, nome) for raiz, _, nomes in os.walk(pasta) for nome in nomes)
+    for caminho in arquivos[:max(1, int(len(arquivos) * fracao))]:
+        base, extensao = os.path.splitext(caminho)
+        shutil.copy2(caminho, f"{base} REV1{extensao}")
+
+
+def versionar(pasta: str):
+    """Edita um projeto sem cópia REV1 e salva o conteúdo anterior como _v1"""
+    caminho = max(os.path.join(raiz, nome) for raiz, _, nomes in os.walk(pasta) for nome in nomes)
+    base, extensao = os.path.splitext(caminho)
+    shutil.copy2(caminho, f"{base}_v1{extensao}")
+    with open(caminho, "ab") as f:
+        f.write(b"EDITADO")
+
+
+def conferir_bucket(origem: str, bucket: str):
+    """Falha se algum arquivo da origem estiver diferente no bucket"""
+    for raiz, _, nomes in os.walk(origem):
+        for nome in nomes:
+            local = os.path.join(raiz, nome)
+            remoto = os.path.join(bucket, "CONTROLE", os.path.relpath(local, origem))
+            with open(local, "rb") as a, open(remoto, "rb") as b:
+                if a.read() != b.read():
+                    raise AssertionError(f"Bucket divergente da origem: {os.path.relpath(local, origem)}")
+
+
+def executar_cenario(quantidade: int, latencia: float, banda, escala: float) -> list:
+    """Roda todas as operações para uma combinação de parâmetros"""
+    raiz = tempfile.mkdtemp(prefix="bench_sync_")
+    try:
+        origem = os.path.join(raiz, "origem")
+        criar_origem(origem, quantidade, escala)
+
+        backend = LocalBackend(os.path.join(raiz, "bucket"), latencia=latencia, banda=banda)
+        with contextlib.redirect_stdout(io.StringIO()):
+            sync = FirebaseSyncMedido(backend=backend, cache_dir=os.path.join(raiz, "cache"))
+
+        resultados = [
+            medir("sync_folder (inicial)", backend, lambda: sync.sync_folder(origem)),
+            medir("sync_folder (sem mudanças)", backend, lambda: sync.sync_folder(origem)),
+            medir("sync_folder (estado salvo)", backend, lambda: sync.sync_folder(origem)),
+            medir("sync_folder (tocados)", backend, lambda: (tocar(origem), sync.sync_folder(origem))),
+            medir("sync_folder (renomeados)", backend, lambda: (renomear(origem), sync.sync_folder(origem))),
+            medir("sync_folder (versionados)", backend, lambda: (versionar(origem), sync.sync_folder(origem))),
+            medir("list_files", backend, sync.list_files),
+            medir("download_all (frio)", backend, sync.download_all),
+            medir("download_all (quente)", backend, sync.download_all),
+        ]
+        conferir_bucket(origem, backend.raiz)
+        for r in resultados:
+            r.update({"arquivos": quantidade, "latencia": latencia, "banda": banda})
+        return resultados
+    finally:
+        shutil.rmtree(raiz, ignore_errors=True)
+
+
+def _chave(r: dict):
+    return (r["operacao"], r["arquivos"], r["latencia"], r["banda"])
+
+
+def imprimir(resultados: list, base: dict = None):
+    """Tabela legível, com variação em relação à base se informada"""
+    print(f"\n{'operação':<28} {'arqs':>6} {'lat(ms)':>8} {'tempo(s)':>9} "
+          f"{'req':>7} {'MB↓':>8} {'MB↑':>8} {'rehash':>7}")
+    for r in resultados:
+        linha = (f"{r['operacao']:<28} {r['arquivos']:>6} {r['latencia'] * 1000:>8.1f} "
+                 f"{r['segundos']:>9.3f} {r['requisicoes']:>7} "
+                 f"{r['bytes_baixados'] / 1e6:>8.1f} {r['bytes_enviados'] / 1e6:>8.1f} "
+                 f"{r['rehash']:>7}")
+        anterior = (base or {}).get(_chave(r))
+        if anterior and anterior["segundos"] > 0:
+            variacao = (r["segundos"] - anterior["segundos"]) / anterior["segundos"] * 100
+            linha += f"   {variacao:+.0f}% tempo, {r['requisicoes'] - anterior['requisicoes']:+d} req"
+        print(linha)
+
+
+def _versao() -> str:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=RUN_DIR,
+                              capture_output=True, text=True).stdout.strip() or "?"
+    except OSError:
+        return "?"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de sincronização com bucket simulado")
+    parser.add_argument("--arquivos", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--latencias", type=float, nargs="+", default=[0.0, 0.005],
+                        help="Latência por requisição em segundos")
+    parser.add_argument("--banda", type=float, default=None,
+                        help="Banda em MB/s (padrão: ilimitada)")
+    parser.add_argument("--escala", type=float, default=100.0,
+                        help="Divide os tamanhos reais (1 = tamanho real; padrão: 100)")
+    parser.add_argument("--json", help="Grava os resultados neste arquivo")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    banda = args.banda * 1e6 if args.banda else None
+    resultados = []
+    for quantidade in args.arquivos:
+        for latencia in args.latencias:
+            print(f"⏱️ {quantidade} arquivos, latência {latencia * 1000:.1f} ms...", flush=True)
+            resultados.extend(executar_cenario(quantidade, latencia, banda, args.escala))
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = {_chave(r): r for r in json.load(f)["resultados"]}
+    imprimir(resultados, base)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "versao": _versao(),
+                "data": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "plataforma": f"{platform.system()} {platform.release()}",
+                "escala": args.escala,
+                "resultados": resultados,
+            }, f, indent=2, ensure_ascii=False)
+        print(f"\n✓ Resultados em {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,13 +3,49 @@
 Script de build para criar executável .exe do Banco de Projetos DWG
 
 Usa PyInstaller para gerar um executável Windows portátil
+
+Perfis:
+    portatil  - um único .exe (--onefile). Simples de distribuir, mas a cada
+                execução se descompacta numa pasta temporária antes de abrir.
+    rapido    - pasta com .exe + bibliotecas (--onedir), sem UPX e sem módulos
+                que a aplicação não usa. Abre o login bem mais rápido; meça com
+                benchmarks/bench_startup.py --exe ...
+
+Uso:
+    python build_exe.py                  # perfil portatil
+    python build_exe.py --perfil rapido
 """
 
 import os
 import sys
 import shutil
+import argparse
 import subprocess
 
+# Módulos que o PyInstaller arrastaria por dependências opcionais e que a
+# aplicação nunca importa. Cada um aumenta o pacote e o tempo de abertura.
+MODULOS_EXCLUIDOS = [
+    'unittest', 'doctest', 'pydoc', 'pdb', 'lib2to3', 'test', 'tkinter.test',
+    'setuptools', 'pkg_resources', 'pip', 'distutils',
+    'numpy', 'pandas', 'matplotlib', 'PIL', 'IPython',
+    # Do Firebase só usamos o Storage
+    'google.cloud.firestore', 'google.cloud.firestore_v1', 'grpc',
+]
+
+PERFIS = {
+    'portatil': {
+        'descricao': 'um único .exe (--onefile)',
+        'opcoes': ['--onefile'],
+        'upx': True,
+    },
+    'rapido': {
+        'descricao': 'pasta --onedir, sem UPX, módulos não usados excluídos',
+        'opcoes': ['--onedir'] + [f'--exclude-module={m}' for m in MODULOS_EXCLUIDOS],
+        # UPX obriga a descompactar cada DLL ao carregar: pior para a abertura
+        'upx': False,
+    },
+}
+
 
 def verificar_pyinstaller():
     """Verifica se PyInstaller está instalado"""
@@ -48,14 +84,15 @@ def limpar_build():
                 print(f"  ⚠️ Erro ao remover {file}: {e}")
 
 
-def criar_executavel():
+def criar_executavel(perfil='portatil'):
     """Cria o executável usando PyInstaller"""
-    print("\n🔨 Compilando aplicação...\n")
+    config_perfil = PERFIS[perfil]
+    print(f"\n🔨 Compilando aplicação (perfil {perfil}: {config_perfil['descricao']})...\n")
     
     comando = [
         'pyinstaller',
         '--name=BancoProjetosDWG',
-        '--onefile',  # Gera um único arquivo .exe
+        *config_perfil['opcoes'],
         '--windowed',  # Sem console (apenas GUI)
         '--icon=NONE',  # Adicione um ícone .ico se tiver
         '--add-data=firebase_sync.py;.',
@@ -69,14 +106,19 @@ def criar_executavel():
     ]
     
     # Verificar se UPX está disponível
-    try:
-        subprocess.run(['upx', '--version'], capture_output=True, check=True)
-        print("✓ UPX encontrado - executável será compactado\n")
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        print("⚠️ UPX não encontrado - executável não será compactado")
-        print("  Baixe em: https://upx.github.io/\n")
-        # Remover opção --upx-dir se UPX não estiver disponível
+    if not config_perfil['upx']:
+        print("⊘ UPX desativado neste perfil (abertura mais rápida)\n")
         comando = [c for c in comando if not c.startswith('--upx-dir')]
+        comando.insert(-1, '--noupx')
+    else:
+        try:
+            subprocess.run(['upx', '--version'], capture_output=True, check=True)
+            print("✓ UPX encontrado - executável será compactado\n")
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            print("⚠️ UPX não encontrado - executável não será compactado")
+            print("  Baixe em: https://upx.github.io/\n")
+            # Remover opção --upx-dir se UPX não estiver disponível
+            comando = [c for c in comando if not c.startswith('--upx-dir')]
     
     try:
         result = subprocess.run(comando, check=True)
@@ -96,11 +138,15 @@ def criar_pasta_distribuicao():
         shutil.rmtree(dist_dir)
     os.makedirs(dist_dir)
     
-    # Copiar executável
+    # Copiar executável (--onefile) ou a pasta inteira gerada (--onedir)
     exe_src = 'dist/BancoProjetosDWG.exe'
+    onedir_src = 'dist/BancoProjetosDWG'
     if os.path.exists(exe_src):
         shutil.copy2(exe_src, dist_dir)
         print(f"  ✓ {exe_src} → {dist_dir}/")
+    elif os.path.isdir(onedir_src):
+        shutil.copytree(onedir_src, dist_dir, dirs_exist_ok=True)
+        print(f"  ✓ {onedir_src}/ → {dist_dir}/")
     
     # Criar arquivo .env.example
     env_example = os.path.join(dist_dir, '.env.example')
@@ -117,6 +163,10 @@ AUTO_SYNC_ON_START=true
 
 # Intervalo de sincronização em segundos (0 = desabilitado)
 SYNC_INTERVAL=300
+
+# Transferências simultâneas e banda máxima da sincronização (KB/s, 0 = sem limite)
+SYNC_TRANSFERENCIAS=4
+SYNC_LIMITE_KBPS=0
 """)
     print(f"  ✓ Criado: {env_example}")
     
@@ -220,6 +270,15 @@ Versão: 1.0 | 2026 | Firebase Cloud Edition
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Gera o executável do Banco de Projetos DWG')
+    parser.add_argument(
+        '--perfil',
+        choices=sorted(PERFIS),
+        default='portatil',
+        help='portatil = um único .exe; rapido = pasta --onedir com abertura mais rápida'
+    )
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("  BUILD - BANCO DE PROJETOS DWG")
     print("=" * 60)
@@ -232,7 +291,7 @@ def main():
     limpar_build()
     
     # Criar executável
-    if not criar_executavel():
+    if not criar_executavel(args.perfil):
         print("\n❌ Falha ao criar executável")
         return 1
     
@@ -249,6 +308,8 @@ def main():
     print("  3. Configure o .env")
     print("  4. Execute BancoProjetosDWG.exe")
     print("\n✓ O executável é PORTÁTIL - não precisa instalação!")
+    print("\n⏱️ Medir inicialização:")
+    print(f"  python benchmarks/bench_startup.py --exe {dist_dir}/BancoProjetosDWG.exe")
     print()
     
     return 0
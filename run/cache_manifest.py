@@ -0,0 +1,214 @@
+"""
+Manifesto do cache local compartilhado entre processos
+
+Este módulo gerencia:
+- Registro dos arquivos completos no cache (md5 remoto, tamanho e mtime da
+  cópia local), visível para todas as instâncias que usam a mesma pasta
+- Quando cada cópia teve o conteúdo conferido com o md5 remoto pela última
+  vez (verificado_em; ver cache_scrubber.py)
+- Trava por arquivo para downloads: com várias instâncias abertas (ou o
+  programa junto com o sync_inicial.py), só uma baixa cada arquivo e as
+  demais esperam e aproveitam a cópia
+
+O manifesto é um diário (uma linha JSON por registro, só acrescentado sob
+trava) em .manifesto.jsonl; cada instância lê apenas as linhas novas. Quando
+o diário fica muito maior que o número de arquivos, é compactado (reescrita
+atômica). Travas ficam em .travas/ e são liberadas pelo sistema operacional
+se o processo morrer.
+
+Uso:
+    manifesto = ManifestoCache(pasta_cache)
+    with manifesto.trava("2024/arquivo.dwg"):
+        if not manifesto.confere("2024/arquivo.dwg", caminho, md5_remoto):
+            ...baixar para temporário e os.replace...
+            manifesto.registrar("2024/arquivo.dwg", caminho, md5_remoto)
+"""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from file_lock import TravaArquivo
+
+logger = logging.getLogger(__name__)
+
+ARQUIVO_MANIFESTO = ".manifesto.jsonl"
+PASTA_TRAVAS = ".travas"
+ESPERA_DOWNLOAD = 600  # segundos esperando outra instância terminar um download
+FATOR_COMPACTAR = 2    # compacta quando o diário passa de 2× as entradas vivas
+MINIMO_COMPACTAR = 1000
+
+
+class ManifestoCache:
+    """Arquivos completos no cache, compartilhado entre processos"""
+
+    def __init__(self, cache_dir):
+        """
+        Args:
+            cache_dir: Pasta do cache (a mesma de FirebaseSync.cache_dir)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.caminho = self.cache_dir / ARQUIVO_MANIFESTO
+        self._trava = TravaArquivo(str(self.caminho))
+        self._lock = threading.Lock()
+        self._entradas: Dict[str, dict] = {}
+        self._linhas = 0
+        self._lido = (None, 0)  # (inode, bytes já lidos) do diário
+
+    def trava(self, nome: str) -> TravaArquivo:
+        """
+        Trava de download de um arquivo (use com 'with')
+
+        Entre processos e entre threads: cada chamada abre a própria trava.
+        """
+        chave = hashlib.sha1(nome.encode("utf-8")).hexdigest()
+        return TravaArquivo(str(self.cache_dir / PASTA_TRAVAS / chave), timeout=ESPERA_DOWNLOAD)
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def _atualizar(self):
+        """Lê as linhas acrescentadas por qualquer processo (com self._lock)"""
+        try:
+            st = os.stat(self.caminho)
+        except FileNotFoundError:
+            self._entradas.clear()
+            self._linhas = 0
+            self._lido = (None, 0)
+            return
+        inode, lido = self._lido
+        if st.st_ino != inode or st.st_size < lido:
+            # Compactado (ou recriado) por outra instância: reler do início
+            self._entradas.clear()
+            self._linhas = 0
+            lido = 0
+        if st.st_size == lido:
+            self._lido = (st.st_ino, lido)
+            return
+
+        with open(self.caminho, "rb") as f:
+            f.seek(lido)
+            for linha in f:
+                if not linha.endswith(b"\n"):
+                    break  # linha sendo escrita agora: fica para a próxima leitura
+                lido += len(linha)
+                self._linhas += 1
+                try:
+                    registro = json.loads(linha)
+                    nome = registro.pop("nome")
+                except (ValueError, KeyError):
+                    continue
+                if registro:
+                    self._entradas[nome] = registro
+                else:
+                    self._entradas.pop(nome, None)
+        self._lido = (st.st_ino, lido)
+
+    def obter(self, nome: str) -> Optional[dict]:
+        """Entrada do arquivo ({'md5', 'tamanho', 'mtime_ns'[, 'verificado_em']}) ou None"""
+        with self._lock:
+            self._atualizar()
+            return self._entradas.get(nome)
+
+    def entradas(self) -> Dict[str, dict]:
+        """Cópia de todas as entradas (nome -> entrada)"""
+        with self._lock:
+            self._atualizar()
+            return dict(self._entradas)
+
+    def confere(self, nome: str, caminho, md5_remoto: Optional[str]) -> bool:
+        """
+        Cópia local completa e igual ao remoto, sem recalcular o md5
+
+        Verdadeiro se o manifesto registra o mesmo md5 e a cópia tem o mesmo
+        tamanho e data de modificação de quando foi registrada.
+        """
+        entrada = self.obter(nome)
+        if not entrada or not md5_remoto or entrada.get("md5") != md5_remoto:
+            return False
+        try:
+            st = os.stat(caminho)
+        except OSError:
+            return False
+        return st.st_size == entrada.get("tamanho") and st.st_mtime_ns == entrada.get("mtime_ns")
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def _acrescentar(self, registros: Iterable[dict]):
+        """Acrescenta registros ao diário sob a trava entre processos"""
+        dados = "".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n"
+                        for r in registros).encode("utf-8")
+        if not dados:
+            return
+        try:
+            with self._trava, self._lock:
+                self._atualizar()
+                with open(self.caminho, "ab") as f:
+                    f.write(dados)
+                self._atualizar()
+                if self._linhas > max(MINIMO_COMPACTAR, FATOR_COMPACTAR * len(self._entradas)):
+                    self._compactar()
+        except (OSError, TimeoutError) as e:
+            # Sem manifesto o cache continua funcionando (só volta a calcular md5)
+            logger.warning("⚠ Não foi possível atualizar o manifesto do cache: %s", e)
+
+    def registrar(self, nome: str, caminho, md5_remoto: Optional[str], verificado: bool = False,
+                  impressao: Optional[str] = None):
+        """
+        Registra a cópia local completa de um arquivo remoto
+
+        Args:
+            verificado: O md5 do conteúdo acabou de ser calculado e confere
+            impressao: Impressão rápida do conteúdo (fingerprint.py), para
+                reconhecer a cópia se só o mtime mudar
+        """
+        if not md5_remoto:
+            return
+        st = os.stat(caminho)
+        registro = {"nome": nome, "md5": md5_remoto,
+                    "tamanho": st.st_size, "mtime_ns": st.st_mtime_ns}
+        if impressao:
+            registro["impressao"] = impressao
+        if verificado:
+            registro["verificado_em"] = int(time.time())
+        self._acrescentar([registro])
+
+    def atualizar_stat(self, nome: str, caminho):
+        """Conteúdo igual, stat novo (arquivo tocado): mantém md5 e verificação"""
+        entrada = self.obter(nome)
+        if entrada is None:
+            return
+        st = os.stat(caminho)
+        self._acrescentar([{"nome": nome, **entrada,
+                            "tamanho": st.st_size, "mtime_ns": st.st_mtime_ns}])
+
+    def remover(self, nomes: Iterable[str]):
+        """Esquece arquivos (removidos do cache ou substituídos)"""
+        self._acrescentar({"nome": nome} for nome in nomes)
+
+    def _compactar(self):
+        """Reescreve o diário só com as entradas vivas (com as duas travas)"""
+        fd, temporario = tempfile.mkstemp(dir=self.cache_dir, prefix=ARQUIVO_MANIFESTO, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for nome, entrada in self._entradas.items():
+                    f.write(json.dumps({"nome": nome, **entrada}, ensure_ascii=False,
+                                       separators=(",", ":")) + "\n")
+            os.replace(temporario, self.caminho)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+        self._entradas.clear()
+        self._linhas = 0
+        self._lido = (None, 0)
+        self._atualizar()
+        logger.debug("Manifesto do cache compactado: %d entradas", len(self._entradas))
@@ -0,0 +1,256 @@
+"""
+Verificação de integridade do cache local em segundo plano
+
+Este módulo gerencia:
+- Conferência periódica das cópias no cache com o md5 remoto, só quando
+  não há cópia pedida pelo usuário em andamento e com leitura limitada
+  (MB/s), para não disputar disco com o AutoCAD
+- Quarentena de cópias corrompidas ou truncadas (.quarentena/, mantidas por
+  alguns dias para diagnóstico) e novo download em segundo plano
+- Registro de quando cada cópia foi verificada (verificado_em no manifesto
+  do cache): a cópia pedida pelo usuário confia no manifesto e não precisa
+  calcular o md5
+
+Uso:
+    verificador = VerificadorCache(firebase_sync)
+    verificador.iniciar(intervalo=3600)
+    ...
+    verificador.parar()
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import metrics
+import fingerprint
+from firebase_sync import PREFIXO_LISTAGEM
+from transfer_scheduler import SEGUNDO_PLANO
+
+logger = logging.getLogger(__name__)
+
+PASTA_QUARENTENA = ".quarentena"
+VALIDADE_VERIFICACAO = 24 * 3600  # segundos até uma cópia verificada ser conferida de novo
+MANTER_QUARENTENA = 7 * 24 * 3600
+LIMITE_LEITURA = 20 * 1024 * 1024  # bytes/s de leitura para o hash
+BLOCO = 1024 * 1024
+ATRASO_INICIAL = 120  # segundos entre a conexão e a primeira rodada
+ESPERA_OCIOSO = 1.0  # segundos entre checagens enquanto o usuário está copiando
+
+
+def _assinatura(caminho: Path):
+    st = os.stat(caminho)
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class VerificadorCache:
+    """Confere as cópias do cache com o md5 remoto nos momentos ociosos"""
+
+    def __init__(self, firebase_sync, validade: float = VALIDADE_VERIFICACAO,
+                 limite_leitura: Optional[float] = LIMITE_LEITURA):
+        """
+        Args:
+            firebase_sync: FirebaseSync conectado (cache, manifesto e agendador)
+            validade: Segundos em que uma verificação continua valendo
+            limite_leitura: Bytes/s lidos do disco (None = sem limite)
+        """
+        self.sync = firebase_sync
+        self.validade = validade
+        self.limite_leitura = limite_leitura or None
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def quarentena(self) -> Path:
+        return self.sync.cache_dir / PASTA_QUARENTENA
+
+    # ------------------------------------------------------------------
+    # Thread
+    # ------------------------------------------------------------------
+
+    def iniciar(self, intervalo: float = 3600, atraso: float = ATRASO_INICIAL):
+        """
+        Roda uma rodada a cada 'intervalo' segundos
+
+        Args:
+            atraso: Espera antes da primeira rodada (deixa a sincronização
+                inicial terminar antes)
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, args=(intervalo, atraso), daemon=True,
+                                        name="verificador-cache")
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _loop(self, intervalo: float, atraso: float):
+        self._parar.wait(atraso)
+        while not self._parar.is_set():
+            try:
+                self.verificar_rodada()
+            except Exception as e:
+                logger.error("❌ Erro na verificação do cache: %s", e)
+            self._parar.wait(intervalo)
+
+    # ------------------------------------------------------------------
+    # Verificação
+    # ------------------------------------------------------------------
+
+    def verificar_rodada(self) -> Dict[str, int]:
+        """
+        Confere as cópias que nunca foram verificadas ou cuja verificação venceu
+
+        Returns:
+            Dicionário com 'verificados', 'corrompidos', 'reparados' e 'ignorados'
+        """
+        stats = {'verificados': 0, 'corrompidos': 0, 'reparados': 0, 'ignorados': 0}
+        if not self.sync.initialized:
+            return stats
+        inicio = time.perf_counter()
+        self._limpar_quarentena()
+
+        # md5 remoto de todos os arquivos (uma requisição por página)
+        remotos = {arq.nome: arq for arq in self.sync.iter_files(
+            PREFIXO_LISTAGEM, campos=('name', 'md5_hash'), prioridade=SEGUNDO_PLANO)}
+        entradas = self.sync.manifesto.entradas()
+        limite = time.time() - self.validade
+
+        # Mais antigas primeiro (nunca verificadas antes de todas)
+        pendentes = sorted((nome for nome, entrada in entradas.items()
+                            if entrada.get('verificado_em', 0) < limite),
+                           key=lambda nome: entradas[nome].get('verificado_em', 0))
+        for nome in pendentes:
+            if self._parar.is_set():
+                break
+            remoto = remotos.get(nome)
+            if remoto is None or not remoto.md5_hash:
+                stats['ignorados'] += 1  # removido da nuvem: não há com o que comparar
+                continue
+            try:
+                resultado = self._verificar(nome, remoto)
+            except TimeoutError:
+                # Trava presa por um download demorado: fica para a próxima rodada
+                logger.debug("Cache: %s ocupado, verificação adiada", nome)
+                resultado = None
+            if resultado is None:
+                stats['ignorados'] += 1
+            elif resultado:
+                stats['verificados'] += 1
+            else:
+                stats['corrompidos'] += 1
+                if self.sync.download_file(remoto.caminho, verbose=False, prioridade=SEGUNDO_PLANO):
+                    stats['reparados'] += 1
+
+        metrics.registrar("cache.verificar_rodada", (time.perf_counter() - inicio) * 1000)
+        metrics.contar("cache.verificados", stats['verificados'])
+        metrics.contar("cache.corrompidos", stats['corrompidos'])
+        logger.info("🔎 Cache verificado: %d ok, %d corrompidos (%d baixados de novo), %d ignorados",
+                    stats['verificados'], stats['corrompidos'], stats['reparados'], stats['ignorados'])
+        return stats
+
+    def _verificar(self, nome: str, remoto) -> Optional[bool]:
+        """
+        Confere uma cópia (True = íntegra, False = em quarentena, None = não verificada)
+
+        O hash é calculado sem a trava do arquivo (uma cópia pedida pelo
+        usuário não espera por ele); a trava só é tomada para registrar o
+        resultado, e se o arquivo foi trocado nesse meio tempo nada é feito.
+        Uma cópia tocada (mtime mudou) mas íntegra volta a conferir pelo
+        manifesto, sem hash na hora de copiar.
+        """
+        manifesto = self.sync.manifesto
+        entrada = manifesto.obter(nome)
+        if entrada is None or entrada.get('md5') != remoto.md5_hash:
+            return None  # desatualizada: o próximo download resolve
+        caminho = self.sync.caminho_cache(remoto.caminho)
+        try:
+            antes = _assinatura(caminho)
+            hashes = self._calcular_hashes(caminho)
+        except FileNotFoundError:
+            manifesto.remover([nome])
+            return None
+        if hashes is None:
+            return None  # interrompido (parar)
+        md5, impressao = hashes
+
+        with manifesto.trava(nome):
+            try:
+                if _assinatura(caminho) != antes:
+                    return None  # baixada de novo durante o hash
+            except FileNotFoundError:
+                return None
+            if md5 == remoto.md5_hash:
+                manifesto.registrar(nome, caminho, remoto.md5_hash, verificado=True, impressao=impressao)
+                return True
+            self._quarentenar(nome, caminho)
+            return False
+
+    def _esperar_ocioso(self):
+        """Cede a vez enquanto houver cópia pedida pelo usuário"""
+        while not self.sync.agendador.ocioso() and not self._parar.is_set():
+            self._parar.wait(ESPERA_OCIOSO)
+
+    def _calcular_hashes(self, caminho: Path) -> Optional[Tuple[str, str]]:
+        """
+        md5 em base64 (como o Firebase) e impressão rápida, com leitura
+        limitada a limite_leitura
+
+        Pausa entre blocos enquanto o usuário copia arquivos. None se o
+        verificador foi parado no meio.
+        """
+        import base64
+        hash_md5 = hashlib.md5()
+        hash_impressao = fingerprint.novo_hash()
+        inicio = time.monotonic()
+        lidos = 0
+        with metrics.medir("hash.md5"), open(caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(BLOCO), b""):
+                hash_md5.update(bloco)
+                hash_impressao.update(bloco)
+                lidos += len(bloco)
+                if self.limite_leitura:
+                    adiantado = lidos / self.limite_leitura - (time.monotonic() - inicio)
+                    if adiantado > 0:
+                        self._parar.wait(adiantado)
+                if not self.sync.agendador.ocioso():
+                    pausa = time.monotonic()
+                    self._esperar_ocioso()
+                    inicio += time.monotonic() - pausa
+                if self._parar.is_set():
+                    return None
+        metrics.contar("hash.arquivos")
+        return base64.b64encode(hash_md5.digest()).decode('utf-8'), fingerprint.formatar(hash_impressao)
+
+    def _quarentenar(self, nome: str, caminho: Path):
+        """Tira a cópia do cache (fica em .quarentena/, fora da listagem) e do manifesto"""
+        self.quarentena.mkdir(parents=True, exist_ok=True)
+        destino = self.quarentena / f"{nome.replace('/', '__')}.{int(time.time())}.corrompido"
+        try:
+            os.replace(caminho, destino)
+            os.utime(destino)  # prazo da quarentena conta a partir de agora
+        except OSError as e:
+            # Aberta em outro programa (Windows): sai do manifesto e será baixada de novo
+            logger.warning("⚠ Não foi possível mover %s para a quarentena: %s", nome, e)
+        self.sync.manifesto.remover([nome])
+        logger.warning("⚠ Cópia corrompida no cache: %s (md5 não confere)", nome)
+
+    def _limpar_quarentena(self):
+        """Apaga o que está em quarentena há mais de MANTER_QUARENTENA"""
+        if not self.quarentena.is_dir():
+            return
+        limite = time.time() - MANTER_QUARENTENA
+        for arquivo in self.quarentena.iterdir():
+            try:
+                if arquivo.stat().st_mtime < limite:
+                    arquivo.unlink()
+            except OSError:
+                continue
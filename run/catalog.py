@@ -0,0 +1,457 @@
+"""
+Motor de busca do Banco de Projetos (independente da interface)
+
+Este módulo gerencia:
+- Extração de tipo/potência/módulos a partir do nome do arquivo
+- Catálogo em memória (pasta local ou listagem do Firebase), em colunas
+- Busca por múltiplos termos e filtro de tipo
+- Resolução do arquivo local a copiar (cache do Firebase ou pasta local)
+
+Usado pela janela Tk (BuscaDWG) e pela linha de comando (cli.py).
+
+O catálogo guarda os nomes num único texto com deslocamentos e os campos
+numéricos em colunas `array`, em vez de um dicionário por arquivo. Os textos
+exibidos ("10.5 kW", "22 mód") só são montados quando um registro é lido.
+"""
+
+import os
+import re
+import math
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from scanner import varrer_pasta
+
+TIPOS = ["Bifásico", "Trifásico", "Trafo", "Rural", "Indefinido"]
+TODOS = "Todos"
+
+_RE_POTENCIA = re.compile(r'SIW\d+[GH]?\s*(\d+[,.]?\d*)', re.IGNORECASE)
+_RE_MODULOS = re.compile(r'[-\s](\d+)\s*(TW|TRINA|JA|ASTRO)', re.IGNORECASE)
+
+_TIPO_INDICE = {tipo: i for i, tipo in enumerate(TIPOS)}
+_SEM_MODULOS = -1
+_SEM_REMOTO = 0xFFFF
+_SEPARADOR = "\n"  # Não aparece nos termos de busca (split por espaço)
+
+
+def _analisar(nome_arquivo: str) -> Tuple[int, float, int]:
+    """
+    Tipo (índice em TIPOS), potência (kW, NaN se ausente) e módulos
+    (-1 se ausente) a partir do nome base do arquivo
+    """
+    nome_base = nome_arquivo.rsplit('/', 1)[-1]
+    nome_lower = nome_base.lower()
+
+    # Identificar tipo
+    tipo = "Indefinido"
+    if any(k in nome_lower for k in ['trafo', 'transformador', 'cabine']):
+        tipo = "Trafo"
+    elif any(k in nome_lower for k in ['rural']):
+        tipo = "Rural"
+    elif nome_lower.startswith('tri') or any(k in nome_lower for k in ['3f', 'trifasico', 'trifásico', '380v']):
+        tipo = "Trifásico"
+    elif nome_lower.startswith('bi') or any(k in nome_lower for k in ['2f', 'bifasico', 'bifásico']):
+        tipo = "Bifásico"
+
+    # Extrair potência (padrão SIW seguido de número: SIW200G 10,5 ou SIW400G 37,5)
+    potencia = math.nan
+    match = _RE_POTENCIA.search(nome_base)
+    if match:
+        potencia = float(match.group(1).replace(',', '.'))
+
+    # Extrair quantidade de módulos (número antes de TW, TRINA, JA, ASTRO)
+    modulos = _SEM_MODULOS
+    match = _RE_MODULOS.search(nome_base)
+    if match:
+        modulos = int(match.group(1))
+
+    return _TIPO_INDICE[tipo], potencia, modulos
+
+
+def _formatar_potencia(potencia: float) -> str:
+    return "" if math.isnan(potencia) else f"{potencia:g} kW"
+
+
+def _formatar_modulos(modulos: int) -> str:
+    return "" if modulos == _SEM_MODULOS else f"{modulos} mód"
+
+
+def extrair_info(nome_arquivo: str) -> Dict[str, str]:
+    """
+    Extrai informações do nome do arquivo
+
+    Args:
+        nome_arquivo: Nome ou caminho relativo (separador '/'); apenas o
+            nome base é analisado, mas o caminho completo é preservado
+
+    Returns:
+        Dicionário com arquivo, tipo, potencia e modulos
+    """
+    tipo, potencia, modulos = _analisar(nome_arquivo)
+    return {
+        "arquivo": nome_arquivo,
+        "tipo": TIPOS[tipo],
+        "potencia": _formatar_potencia(potencia),
+        "modulos": _formatar_modulos(modulos)
+    }
+
+
+class Projeto:
+    """
+    Registro de um projeto lido do catálogo
+
+    Cópia leve dos valores compactos; tipo, potência e módulos são
+    formatados só quando acessados. Também pode ser lido como dicionário
+    (info['arquivo'], info.get('firebase'), 'caminho_remoto' in info).
+    """
+
+    __slots__ = ('arquivo', 'firebase', '_tipo', '_potencia', '_modulos', '_prefixo', '_caminho')
+
+    CHAVES = ('arquivo', 'tipo', 'potencia', 'modulos', 'firebase', 'caminho_remoto')
+
+    def __init__(self, arquivo: str, tipo: int, potencia: float, modulos: int,
+                 firebase: bool = False, prefixo_remoto: Optional[str] = None,
+                 caminho_remoto: Optional[str] = None):
+        self.arquivo = arquivo
+        self.firebase = firebase
+        self._tipo = tipo
+        self._potencia = potencia
+        self._modulos = modulos
+        self._prefixo = prefixo_remoto
+        self._caminho = caminho_remoto
+
+    @property
+    def caminho_remoto(self) -> Optional[str]:
+        """Caminho no bucket (prefixo + nome), ou None para arquivos locais"""
+        if self._prefixo is not None:
+            return self._prefixo + self.arquivo
+        return self._caminho
+
+    @property
+    def tipo(self) -> str:
+        return TIPOS[self._tipo]
+
+    @property
+    def potencia(self) -> str:
+        return _formatar_potencia(self._potencia)
+
+    @property
+    def modulos(self) -> str:
+        return _formatar_modulos(self._modulos)
+
+    def __contains__(self, chave: str) -> bool:
+        # Como no registro antigo, 'caminho_remoto' só existe em arquivos remotos
+        if chave == 'caminho_remoto':
+            return self.caminho_remoto is not None
+        return chave in self.CHAVES
+
+    def __getitem__(self, chave: str):
+        if chave not in self:
+            raise KeyError(chave)
+        return getattr(self, chave)
+
+    def get(self, chave: str, padrao=None):
+        return self[chave] if chave in self else padrao
+
+    def keys(self):
+        return [chave for chave in self.CHAVES if chave in self]
+
+    def __repr__(self):
+        return f"Projeto({self.arquivo!r})"
+
+
+class Resultados(Sequence):
+    """
+    Resultado de uma busca: índices no catálogo, registros montados sob demanda
+
+    len() não monta nenhum registro e resultados[:50] monta só 50. Vale até
+    a próxima alteração do catálogo (a interface consome na mesma chamada).
+    """
+
+    __slots__ = ('_catalogo', 'indices')
+
+    def __init__(self, catalogo: 'Catalogo', indices):
+        self._catalogo = catalogo
+        self.indices = indices
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, posicao):
+        if isinstance(posicao, slice):
+            return self._catalogo._registros(self.indices[posicao])
+        return self._catalogo.obter(self.indices[posicao])
+
+    def __iter__(self) -> Iterator[Projeto]:
+        return iter(self._catalogo._registros(self.indices))
+
+
+class Catalogo:
+    """
+    Catálogo de projetos em memória com busca por termos
+
+    Armazenamento em colunas:
+        _texto / _inicio              nomes originais num único texto + deslocamentos
+        _texto_lower / _inicio_lower  o mesmo em minúsculas (usado na busca)
+        _tipos, _potencias, _modulos  arrays numéricos
+        _firebase                     bytearray (0/1)
+        _remoto                       índice em _prefixos (caminho_remoto = prefixo + nome)
+    Nomes adicionados ficam numa lista pendente até a próxima leitura.
+    """
+
+    def __init__(self):
+        self.origem = None  # 'local' ou 'firebase'
+        self.limpar()
+
+    def __len__(self) -> int:
+        return len(self._tipos)
+
+    def __iter__(self) -> Iterator[Projeto]:
+        return iter(self._registros(range(len(self))))
+
+    def limpar(self):
+        """Esvazia o catálogo"""
+        self._texto = ""
+        self._texto_lower = ""
+        self._inicio = array('I', [0])
+        self._inicio_lower = array('I', [0])
+        self._pendentes: List[str] = []
+        self._tipos = array('B')
+        self._potencias = array('d')
+        self._modulos = array('i')
+        self._firebase = bytearray()
+        self._remoto = array('H')
+        self._prefixos: List[str] = []
+        self._remoto_avulso: Dict[int, str] = {}  # caminho que não é prefixo + nome
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def adicionar(self, nome: str, firebase: bool = False,
+                  caminho_remoto: Optional[str] = None):
+        """Adiciona um arquivo ao catálogo"""
+        indice = len(self._tipos)
+        tipo, potencia, modulos = _analisar(nome)
+        self._tipos.append(tipo)
+        self._potencias.append(potencia)
+        self._modulos.append(modulos)
+        self._firebase.append(1 if firebase else 0)
+        self._remoto.append(self._indice_remoto(indice, nome, caminho_remoto))
+        self._pendentes.append(nome)
+
+    def _indice_remoto(self, indice: int, nome: str, caminho_remoto: Optional[str]) -> int:
+        """Guarda caminho_remoto como prefixo compartilhado (ex: 'CONTROLE/')"""
+        if caminho_remoto is None:
+            return _SEM_REMOTO
+        if caminho_remoto.endswith(nome):
+            prefixo = caminho_remoto[:len(caminho_remoto) - len(nome)]
+            if prefixo in self._prefixos:
+                return self._prefixos.index(prefixo)
+            if len(self._prefixos) < _SEM_REMOTO - 1:
+                self._prefixos.append(prefixo)
+                return len(self._prefixos) - 1
+        self._remoto_avulso[indice] = caminho_remoto
+        return _SEM_REMOTO
+
+    def _consolidar(self):
+        """Incorpora os nomes pendentes aos textos compactos"""
+        if not self._pendentes:
+            return
+        partes = [self._texto]
+        partes_lower = [self._texto_lower]
+        posicao = self._inicio[-1]
+        posicao_lower = self._inicio_lower[-1]
+        for nome in self._pendentes:
+            nome_lower = nome.lower()  # pode mudar o tamanho (ex: 'İ'), daí dois índices
+            partes.append(nome)
+            partes.append(_SEPARADOR)
+            partes_lower.append(nome_lower)
+            partes_lower.append(_SEPARADOR)
+            posicao += len(nome) + 1
+            posicao_lower += len(nome_lower) + 1
+            self._inicio.append(posicao)
+            self._inicio_lower.append(posicao_lower)
+        self._texto = "".join(partes)
+        self._texto_lower = "".join(partes_lower)
+        self._pendentes = []
+
+    def remover(self, nomes: Iterable[str]):
+        """Remove arquivos pelo nome (caminho relativo)"""
+        nomes = set(nomes)
+        if not nomes:
+            return
+        self._consolidar()
+        manter = [i for i in range(len(self)) if self._nome(i) not in nomes]
+        if len(manter) == len(self):
+            return
+
+        nomes_mantidos = [self._nome(i) for i in manter]
+        avulsos = {novo: self._remoto_avulso[i]
+                   for novo, i in enumerate(manter) if i in self._remoto_avulso}
+        self._tipos = array('B', (self._tipos[i] for i in manter))
+        self._potencias = array('d', (self._potencias[i] for i in manter))
+        self._modulos = array('i', (self._modulos[i] for i in manter))
+        self._firebase = bytearray(self._firebase[i] for i in manter)
+        self._remoto = array('H', (self._remoto[i] for i in manter))
+        self._remoto_avulso = avulsos
+
+        self._texto = ""
+        self._texto_lower = ""
+        self._inicio = array('I', [0])
+        self._inicio_lower = array('I', [0])
+        self._pendentes = nomes_mantidos
+        self._consolidar()
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def _nome(self, i: int) -> str:
+        return self._texto[self._inicio[i]:self._inicio[i + 1] - 1]
+
+    def obter(self, i: int) -> Projeto:
+        """Registro do i-ésimo arquivo (na ordem de inclusão)"""
+        return self._registros([i])[0]
+
+    def _registros(self, indices: Iterable[int]) -> List[Projeto]:
+        """Monta os registros dos índices (laço único, sem chamadas por item)"""
+        self._consolidar()
+        texto, inicio = self._texto, self._inicio
+        tipos, potencias, modulos = self._tipos, self._potencias, self._modulos
+        firebase, remoto = self._firebase, self._remoto
+        prefixos, avulsos = self._prefixos, self._remoto_avulso
+        if len(prefixos) == 1 and not avulsos:
+            # Caso comum (Firebase): todos os arquivos sob o mesmo prefixo
+            prefixo = prefixos[0]
+            return [
+                Projeto(texto[inicio[i]:inicio[i + 1] - 1], tipos[i], potencias[i], modulos[i],
+                        firebase[i] == 1, prefixo if remoto[i] != _SEM_REMOTO else None)
+                for i in indices
+            ]
+        return [
+            Projeto(texto[inicio[i]:inicio[i + 1] - 1], tipos[i], potencias[i], modulos[i],
+                    firebase[i] == 1,
+                    prefixos[remoto[i]] if remoto[i] != _SEM_REMOTO else None,
+                    avulsos.get(i))
+            for i in indices
+        ]
+
+    def nomes(self) -> set:
+        """Conjunto de nomes presentes no catálogo"""
+        self._consolidar()
+        return set(self._texto.split(_SEPARADOR)[:-1])
+
+    def carregar_local(self, pasta: str) -> int:
+        """
+        Carrega o catálogo a partir de uma pasta local (recursivo)
+
+        Returns:
+            Quantidade de arquivos carregados
+        """
+        self.limpar()
+        self.origem = 'local'
+        for arquivo in varrer_pasta(pasta):
+            self.adicionar(arquivo)
+        self._consolidar()
+        return len(self)
+
+    def carregar_firebase(self, arquivos_firebase: Iterable[Dict]) -> int:
+        """
+        Carrega o catálogo a partir da listagem do FirebaseSync
+
+        Aceita a lista de list_files ou o gerador de iter_files (os itens
+        são consumidos à medida que as páginas chegam).
+
+        Returns:
+            Quantidade de arquivos carregados
+        """
+        self.limpar()
+        self.origem = 'firebase'
+        for arq_info in arquivos_firebase:
+            self.adicionar(arq_info['nome'], firebase=True, caminho_remoto=arq_info['caminho'])
+        self._consolidar()
+        return len(self)
+
+    def _indices_com_termo(self, termo: str) -> List[int]:
+        """Índices cujo nome contém o termo (varre o texto único com find)"""
+        inicio = self._inicio_lower
+        encontrar = self._texto_lower.find
+        indices = []
+        posicao = encontrar(termo)
+        i = 0
+        while posicao != -1:
+            i = bisect_right(inicio, posicao, i) - 1
+            indices.append(i)
+            posicao = encontrar(termo, inicio[i + 1])
+        return indices
+
+    def buscar(self, termo: str = "", tipo: str = TODOS) -> Resultados:
+        """
+        Busca arquivos com base nos filtros
+
+        Args:
+            termo: Um ou mais termos separados por espaço (todos devem aparecer)
+            tipo: Tipo de projeto ou "Todos"
+
+        Returns:
+            Registros encontrados (Resultados), na ordem do catálogo
+        """
+        self._consolidar()
+        termos = termo.strip().lower().split()
+
+        # O termo mais longo costuma ser o mais seletivo: varre o texto por ele
+        # e confere os demais só nos nomes candidatos
+        if termos:
+            termos.sort(key=len, reverse=True)
+            indices = self._indices_com_termo(termos[0])
+            if len(termos) > 1:
+                texto = self._texto_lower
+                inicio = self._inicio_lower
+                indices = [i for i in indices
+                           if all(texto.find(t, inicio[i], inicio[i + 1]) != -1 for t in termos[1:])]
+        else:
+            indices = range(len(self))
+
+        # Verificar filtro de tipo
+        if tipo and tipo != TODOS:
+            codigo = _TIPO_INDICE.get(tipo)
+            tipos = self._tipos
+            indices = [i for i in indices if tipos[i] == codigo]
+
+        return Resultados(self, indices)
+
+
+def obter_arquivo_local(info, pasta_local: str, firebase_sync=None,
+                        pasta_cache: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Resolve o caminho local de um registro do catálogo
+
+    Arquivos do Firebase são baixados para o cache se necessário. Sem
+    firebase_sync (offline) ou se o download falhar, usa a cópia que já
+    estiver em pasta_cache.
+
+    Returns:
+        Tupla (caminho, status) com status 'local', 'cached', 'downloaded'
+        ou 'offline'; (None, None) se o arquivo não pôde ser obtido
+    """
+    if not info.get('firebase', False):
+        return os.path.join(pasta_local, info['arquivo']), 'local'
+
+    if firebase_sync is not None:
+        result = firebase_sync.download_file(info['caminho_remoto'])
+        if result:
+            # download_file retorna tupla (path, status)
+            if isinstance(result, tuple):
+                return result
+            return result, 'downloaded'
+
+    if pasta_cache is not None:
+        # Mesmo layout de FirebaseSync.caminho_cache (caminho relativo ao prefixo)
+        caminho = os.path.join(pasta_cache, *info['arquivo'].split('/'))
+        if os.path.isfile(caminho):
+            return caminho, 'offline'
+
+    return None, None
@@ -0,0 +1,502 @@
+"""
+Servidor de catálogo na rede local (opcional)
+
+Uma única máquina lista o Firebase (ou a pasta local), mantém o catálogo em
+memória e atende as estações por HTTP. As estações deixam de listar o bucket
+cada uma por conta própria e baixam os DWGs do cache do servidor.
+
+Endpoints (GET):
+    /status                      versão do catálogo, total e origem
+    /catalogo                    listagem no formato de FirebaseSync.list_files
+    /buscar?termo=...&tipo=...   busca no servidor (para scripts)
+    /arquivo?caminho=...         bytes do DWG (do cache do servidor)
+
+Todas as respostas levam ETag; If-None-Match igual devolve 304 sem corpo.
+
+Os DWGs não podem ficar abertos para toda a rede: o servidor escuta só em
+127.0.0.1, a menos que receba --host. Com CATALOGO_TOKEN no .env (ou
+--token), toda requisição precisa de "Authorization: Bearer <token>"; para
+escutar fora da própria máquina o token é obrigatório.
+
+Uso:
+    python banco_projetos.py serve --firebase --host 0.0.0.0 --porta 8765
+    # Nas estações, em app_config.json:
+    #   "servidor_catalogo": "http://servidor:8765"
+    # e no .env, o mesmo CATALOGO_TOKEN do servidor
+"""
+
+import os
+import sys
+import json
+import hmac
+import asyncio
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from catalog import Catalogo, TODOS, obter_arquivo_local
+from scanner import varrer_pasta
+
+logger = logging.getLogger(__name__)
+
+PORTA_PADRAO = 8765
+HOST_PADRAO = "127.0.0.1"
+_HOSTS_LOCAIS = ("127.0.0.1", "localhost", "::1")
+_STATUS_HTTP = {200: "OK", 304: "Not Modified", 400: "Bad Request", 401: "Unauthorized",
+                404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+def _etag(dados: bytes) -> str:
+    """ETag forte a partir do conteúdo"""
+    return '"' + hashlib.md5(dados).hexdigest() + '"'
+
+
+def _gravar_json(caminho: Path, dados):
+    """Grava JSON por um temporário exclusivo + os.replace (seguro entre instâncias)"""
+    fd, temporario = tempfile.mkstemp(dir=caminho.parent, prefix=caminho.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+
+def token_do_ambiente() -> str:
+    """CATALOGO_TOKEN do .env (ou do ambiente); vazio se não configurado"""
+    if 'CATALOGO_TOKEN' not in os.environ:
+        from firebase_sync import _carregar_env
+        _carregar_env()
+    return os.getenv('CATALOGO_TOKEN', '').strip()
+
+
+class CatalogServer:
+    """Servidor HTTP assíncrono do catálogo"""
+
+    def __init__(self, pasta_local: str, firebase_sync=None, intervalo: int = 300,
+                 token: str = ""):
+        """
+        Inicializa o servidor
+
+        Args:
+            pasta_local: Pasta de DWGs (usada quando não há Firebase)
+            firebase_sync: Instância de FirebaseSync (opcional)
+            intervalo: Segundos entre recargas do catálogo (0 = nunca)
+            token: Token exigido em toda requisição (vazio = sem autenticação)
+        """
+        self.pasta_local = pasta_local
+        self.token = token
+        self.firebase_sync = firebase_sync
+        self.intervalo = intervalo
+        self.catalogo = Catalogo()
+        self.listagem: List[Dict] = []
+        self._por_caminho: Dict[str, Dict] = {}
+        self.versao = 0
+        self._corpo_catalogo = None  # (versao, corpo, etag)
+
+    # ------------------------------------------------------------------
+    # Catálogo
+    # ------------------------------------------------------------------
+
+    def _listar(self) -> List[Dict]:
+        """Lista a origem (bloqueante: roda no executor)"""
+        if self.firebase_sync:
+            return self.firebase_sync.list_files()
+        return [{'nome': nome, 'caminho': nome} for nome in varrer_pasta(self.pasta_local)]
+
+    def _aplicar_listagem(self, listagem: List[Dict]):
+        """Troca o catálogo se a listagem mudou"""
+        chave_nova = [(a['nome'], a['caminho'], a.get('md5_hash')) for a in listagem]
+        chave_atual = [(a['nome'], a['caminho'], a.get('md5_hash')) for a in self.listagem]
+        if self.versao and chave_nova == chave_atual:
+            return
+
+        self.listagem = listagem
+        if self.firebase_sync:
+            self.catalogo.carregar_firebase(listagem)
+        else:
+            self.catalogo.limpar()
+            self.catalogo.origem = 'local'
+            for arq in listagem:
+                self.catalogo.adicionar(arq['nome'])
+        self._por_caminho = {info.get('caminho_remoto', info['arquivo']): info
+                             for info in self.catalogo}
+        self.versao += 1
+        logger.info("✓ Catálogo v%d: %d arquivos", self.versao, len(self.catalogo))
+
+    async def _recarregar_periodicamente(self):
+        """Recarrega o catálogo em intervalos (tarefa de fundo)"""
+        loop = asyncio.get_running_loop()
+        while self.intervalo > 0:
+            await asyncio.sleep(self.intervalo)
+            try:
+                self._aplicar_listagem(await loop.run_in_executor(None, self._listar))
+            except Exception as e:
+                logger.error("❌ Erro ao recarregar catálogo: %s", e)
+
+    def _encontrar(self, caminho: str) -> Optional[Dict]:
+        """Registro do catálogo pelo caminho remoto (ou nome, no modo local)"""
+        return self._por_caminho.get(caminho)
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Atende uma conexão (com keep-alive)"""
+        try:
+            while True:
+                linha = await reader.readline()
+                if not linha:
+                    break
+                partes = linha.decode('latin-1').split()
+                if len(partes) != 3:
+                    await self._responder(writer, 400, b"", manter=False)
+                    break
+                metodo, alvo, versao_http = partes
+
+                headers = {}
+                while True:
+                    cabecalho = await reader.readline()
+                    if cabecalho in (b"\r\n", b"\n", b""):
+                        break
+                    nome, _, valor = cabecalho.decode('latin-1').partition(':')
+                    headers[nome.strip().lower()] = valor.strip()
+
+                manter = (versao_http == "HTTP/1.1"
+                          and headers.get('connection', '').lower() != 'close')
+                if not self._autorizado(headers):
+                    await self._responder(writer, 401, b"", manter=manter)
+                elif metodo != "GET":
+                    await self._responder(writer, 405, b"", manter=manter)
+                else:
+                    await self._rotear(alvo, headers, writer, manter)
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.exception("❌ Erro ao atender requisição: %s", e)
+        finally:
+            writer.close()
+
+    def _autorizado(self, headers: Dict) -> bool:
+        """Confere o token (comparação em tempo constante)"""
+        if not self.token:
+            return True
+        esquema, _, valor = headers.get('authorization', '').partition(' ')
+        return esquema.lower() == 'bearer' and hmac.compare_digest(valor.strip(), self.token)
+
+    async def _responder(self, writer, status: int, corpo: bytes, tipo: str = "application/json",
+                         etag: Optional[str] = None, manter: bool = True):
+        """Envia uma resposta completa"""
+        cabecalhos = [
+            f"HTTP/1.1 {status} {_STATUS_HTTP.get(status, '')}",
+            f"Content-Length: {len(corpo)}",
+            f"Connection: {'keep-alive' if manter else 'close'}",
+        ]
+        if corpo or status == 200:
+            cabecalhos.append(f"Content-Type: {tipo}")
+        if etag:
+            cabecalhos.append(f"ETag: {etag}")
+        writer.write(("\r\n".join(cabecalhos) + "\r\n\r\n").encode('latin-1') + corpo)
+        await writer.drain()
+
+    async def _responder_json(self, writer, headers: Dict, dados, manter: bool,
+                              corpo: bytes = None, etag: str = None):
+        """Resposta JSON com suporte a If-None-Match"""
+        if corpo is None:
+            corpo = json.dumps(dados, ensure_ascii=False).encode('utf-8')
+            etag = _etag(corpo)
+        if headers.get('if-none-match') == etag:
+            await self._responder(writer, 304, b"", etag=etag, manter=manter)
+        else:
+            await self._responder(writer, 200, corpo, etag=etag, manter=manter)
+
+    async def _rotear(self, alvo: str, headers: Dict, writer, manter: bool):
+        """Despacha a requisição para o endpoint"""
+        url = urllib.parse.urlsplit(alvo)
+        params = {k: v[0] for k, v in urllib.parse.parse_qs(url.query).items()}
+
+        if url.path == "/status":
+            await self._responder_json(writer, headers, {
+                "versao": self.versao,
+                "total": len(self.catalogo),
+                "origem": self.catalogo.origem,
+            }, manter)
+
+        elif url.path == "/catalogo":
+            if not self._corpo_catalogo or self._corpo_catalogo[0] != self.versao:
+                corpo = json.dumps([dict(a) for a in self.listagem], ensure_ascii=False).encode('utf-8')
+                self._corpo_catalogo = (self.versao, corpo, _etag(corpo))
+            _, corpo, etag = self._corpo_catalogo
+            await self._responder_json(writer, headers, None, manter, corpo=corpo, etag=etag)
+
+        elif url.path == "/buscar":
+            limite = int(params['limite']) if params.get('limite', '').isdigit() else None
+            resultados = self.catalogo.buscar(params.get('termo', ''), params.get('tipo', TODOS))
+            await self._responder_json(writer, headers, {
+                "total": len(resultados),
+                "resultados": [dict(info) for info in (resultados[:limite] if limite else resultados)],
+            }, manter)
+
+        elif url.path == "/arquivo":
+            await self._enviar_arquivo(params.get('caminho', ''), headers, writer, manter)
+
+        else:
+            await self._responder(writer, 404, b"", manter=manter)
+
+    async def _enviar_arquivo(self, caminho: str, headers: Dict, writer, manter: bool):
+        """Envia os bytes do DWG, baixando para o cache do servidor se preciso"""
+        info = self._encontrar(caminho)
+        if info is None:
+            await self._responder(writer, 404, b"", manter=manter)
+            return
+
+        loop = asyncio.get_running_loop()
+        local, _ = await loop.run_in_executor(
+            None, obter_arquivo_local, info, self.pasta_local, self.firebase_sync)
+        if not local or not os.path.exists(local):
+            await self._responder(writer, 404, b"", manter=manter)
+            return
+
+        st = os.stat(local)
+        etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+        if headers.get('if-none-match') == etag:
+            await self._responder(writer, 304, b"", etag=etag, manter=manter)
+            return
+
+        writer.write((
+            "HTTP/1.1 200 OK\r\n"
+            "Content-Type: application/acad\r\n"
+            f"Content-Length: {st.st_size}\r\n"
+            f"ETag: {etag}\r\n"
+            f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n"
+        ).encode('latin-1'))
+        with open(local, 'rb') as f:
+            while True:
+                bloco = await loop.run_in_executor(None, f.read, 256 * 1024)
+                if not bloco:
+                    break
+                writer.write(bloco)
+                await writer.drain()
+
+    async def servir(self, host: str, porta: int):
+        """Carrega o catálogo e atende até ser interrompido"""
+        loop = asyncio.get_running_loop()
+        self._aplicar_listagem(await loop.run_in_executor(None, self._listar))
+
+        servidor = await asyncio.start_server(self._atender, host, porta)
+        logger.info("✓ Servidor de catálogo em http://%s:%d", host, porta)
+        recarga = asyncio.create_task(self._recarregar_periodicamente())
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            recarga.cancel()
+
+
+class CatalogClient:
+    """
+    Cliente do servidor de catálogo
+
+    Implementa o subconjunto de FirebaseSync usado pela interface
+    (list_files e download_file), com revalidação por ETag. A última
+    listagem fica no cache junto com a ETag, para revalidar já na
+    primeira requisição depois de reabrir.
+    """
+
+    def __init__(self, url: str, cache_dir: str = None, timeout: float = 10.0,
+                 token: str = None):
+        """
+        Args:
+            url: Endereço do servidor (ex: http://servidor:8765)
+            cache_dir: Pasta do cache do cliente
+            timeout: Segundos de espera por resposta
+            token: Token do servidor (padrão: CATALOGO_TOKEN do .env)
+        """
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.token = token_do_ambiente() if token is None else token
+        self.cache_dir = Path(cache_dir or Path(tempfile.gettempdir()) / "banco_projetos_dwg_cliente")
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._etags_file = self.cache_dir / "etags.json"
+        self._etags = self._carregar_etags()
+        self._listagem_file = self.cache_dir / "catalogo.json"
+        self._listagem, self._etag_listagem = self._carregar_listagem()
+        self._lock = threading.Lock()
+
+    def _carregar_etags(self) -> Dict[str, str]:
+        try:
+            with open(self._etags_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _salvar_etags(self):
+        try:
+            _gravar_json(self._etags_file, self._etags)
+        except OSError:
+            pass
+
+    def _carregar_listagem(self):
+        """Última listagem recebida e sua ETag, ou (None, None)"""
+        try:
+            with open(self._listagem_file, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+            return dados['listagem'], dados['etag']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, None
+
+    def _salvar_listagem(self):
+        """Grava listagem e ETag juntas (troca atômica do arquivo)"""
+        try:
+            _gravar_json(self._listagem_file, {'etag': self._etag_listagem, 'listagem': self._listagem})
+        except OSError:
+            pass
+
+    def _get(self, caminho: str, etag: Optional[str] = None):
+        """GET condicional; retorna (status, etag, resposta ou None)"""
+        requisicao = urllib.request.Request(self.url + caminho)
+        if self.token:
+            requisicao.add_header("Authorization", f"Bearer {self.token}")
+        if etag:
+            requisicao.add_header("If-None-Match", etag)
+        try:
+            resposta = urllib.request.urlopen(requisicao, timeout=self.timeout)
+            return resposta.status, resposta.headers.get("ETag"), resposta
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return 304, etag, None
+            raise
+
+    def status(self) -> Dict:
+        """Versão e tamanho do catálogo no servidor"""
+        _, _, resposta = self._get("/status")
+        with resposta:
+            return json.load(resposta)
+
+    def list_files(self, prefix: str = None, campos=None) -> List[Dict]:
+        """
+        Listagem do servidor (304 reaproveita a última recebida, mesmo de
+        uma execução anterior)
+
+        prefix e campos existem pela compatibilidade com FirebaseSync: o
+        servidor sempre envia a listagem completa, já em cache.
+        """
+        with self._lock:
+            etag = self._etag_listagem if self._listagem is not None else None
+            status, etag, resposta = self._get("/catalogo", etag)
+            if status == 304:
+                return self._listagem
+            with resposta:
+                self._listagem = json.load(resposta)
+            self._etag_listagem = etag
+            self._salvar_listagem()
+            return self._listagem
+
+    def buscar(self, termo: str, tipo: str = TODOS, limite: int = None) -> Dict:
+        """Busca executada no servidor"""
+        query = {"termo": termo, "tipo": tipo}
+        if limite:
+            query["limite"] = limite
+        _, _, resposta = self._get("/buscar?" + urllib.parse.urlencode(query))
+        with resposta:
+            return json.load(resposta)
+
+    def download_file(self, remote_path: str, force: bool = False, verbose: bool = True):
+        """
+        Baixa o DWG do servidor para o cache do cliente
+
+        Returns:
+            Tupla (caminho_local, status) com status 'downloaded' ou 'cached',
+            ou None se falhar
+        """
+        local_file = self.cache_dir.joinpath(*remote_path.split('/'))
+        chave = "arquivo:" + remote_path
+        etag = self._etags.get(chave) if local_file.exists() and not force else None
+        try:
+            status, etag, resposta = self._get(
+                "/arquivo?" + urllib.parse.urlencode({"caminho": remote_path}), etag)
+            if status == 304:
+                return (str(local_file), 'cached')
+
+            local_file.parent.mkdir(parents=True, exist_ok=True)
+            # Temporário exclusivo: dois downloads do mesmo arquivo não se misturam
+            fd, temporario = tempfile.mkstemp(dir=local_file.parent, prefix=local_file.name,
+                                              suffix=".tmp")
+            try:
+                with resposta, os.fdopen(fd, 'wb') as f:
+                    while True:
+                        bloco = resposta.read(256 * 1024)
+                        if not bloco:
+                            break
+                        f.write(bloco)
+                os.replace(temporario, local_file)
+            except BaseException:
+                os.unlink(temporario)
+                raise
+
+            with self._lock:
+                self._etags[chave] = etag
+                self._salvar_etags()
+            return (str(local_file), 'downloaded')
+        except (OSError, urllib.error.URLError) as e:
+            logger.log(logging.ERROR if verbose else logging.DEBUG,
+                       "❌ Erro ao baixar %s do servidor: %s", remote_path, e)
+            return None
+
+
+def main(argv: List[str], pasta_padrao: str) -> int:
+    """
+    Ponto de entrada do subcomando serve
+
+    Args:
+        argv: Argumentos após 'serve'
+        pasta_padrao: Pasta local de DWGs da configuração
+    """
+    parser = argparse.ArgumentParser(
+        prog="banco_projetos serve",
+        description="Servidor de catálogo compartilhado na rede local"
+    )
+    parser.add_argument("--host", default=HOST_PADRAO,
+                        help="Endereço de escuta (padrão: só esta máquina; 0.0.0.0 = toda a rede)")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--token", default=None,
+                        help="Token exigido dos clientes (padrão: CATALOGO_TOKEN do .env)")
+    parser.add_argument("--pasta", default=pasta_padrao, help="Pasta local com os DWGs")
+    parser.add_argument("--firebase", action="store_true",
+                        help="Servir a listagem e os arquivos do Firebase")
+    parser.add_argument("--intervalo", type=int, default=300,
+                        help="Segundos entre recargas do catálogo (0 = nunca)")
+    args = parser.parse_args(argv)
+
+    token = token_do_ambiente() if args.token is None else args.token
+    if not token and args.host not in _HOSTS_LOCAIS:
+        print(f"❌ Para escutar em {args.host}, defina CATALOGO_TOKEN no .env (ou use --token): "
+              "sem ele qualquer máquina da rede baixaria os DWGs", file=sys.stderr)
+        return 2
+
+    firebase_sync = None
+    if args.firebase:
+        try:
+            from firebase_sync import FirebaseSync
+            firebase_sync = FirebaseSync()
+        except Exception as e:
+            print(f"❌ Erro ao conectar ao Firebase: {e}", file=sys.stderr)
+            return 1
+
+    servidor = CatalogServer(args.pasta, firebase_sync, args.intervalo, token)
+    try:
+        asyncio.run(servidor.servir(args.host, args.porta))
+    except KeyboardInterrupt:
+        print("\n✓ Servidor encerrado")
+    return 0
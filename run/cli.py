@@ -0,0 +1,164 @@
+"""
+Linha de comando do Banco de Projetos (sem interface gráfica)
+
+Uso:
+    python banco_projetos.py search "tri siw400"
+    python banco_projetos.py search "tri siw400" --tipo Trifásico --json
+    python banco_projetos.py search --batch --json < consultas.txt
+    python banco_projetos.py search "bi 5" --firebase --caminho
+
+No modo --batch cada linha da entrada é uma consulta (texto simples ou JSON
+{"termo": ..., "tipo": ...}); o catálogo é carregado uma única vez e cada
+resposta sai numa linha. Ao final, um resumo de vazão vai para stderr.
+"""
+
+import sys
+import json
+import time
+import argparse
+from typing import Dict, List, Optional
+
+from catalog import Catalogo, TIPOS, TODOS, obter_arquivo_local
+
+CAMPOS = ("arquivo", "tipo", "potencia", "modulos", "caminho_remoto")
+
+
+def _registro_publico(info: Dict) -> Dict:
+    """Campos expostos na saída JSON"""
+    return {campo: info[campo] for campo in CAMPOS if campo in info}
+
+
+def carregar_catalogo(pasta: str, usar_firebase: bool):
+    """
+    Carrega o catálogo da pasta local ou do Firebase
+
+    Returns:
+        Tupla (catalogo, firebase_sync ou None)
+    """
+    catalogo = Catalogo()
+    if usar_firebase:
+        from firebase_sync import FirebaseSync
+        firebase_sync = FirebaseSync()
+        # Páginas vão direto para o catálogo, só com o nome de cada objeto
+        catalogo.carregar_firebase(firebase_sync.iter_files(campos=("name",)))
+        return catalogo, firebase_sync
+
+    catalogo.carregar_local(pasta)
+    return catalogo, None
+
+
+def responder(catalogo: Catalogo, termo: str, tipo: str, limite: Optional[int]) -> Dict:
+    """Executa uma consulta e monta a resposta"""
+    inicio = time.perf_counter()
+    resultados = catalogo.buscar(termo, tipo)
+    duracao_ms = (time.perf_counter() - inicio) * 1000
+    exibidos = resultados[:limite] if limite else resultados
+    return {
+        "termo": termo,
+        "tipo": tipo,
+        "total": len(resultados),
+        "ms": round(duracao_ms, 3),
+        "resultados": [_registro_publico(info) for info in exibidos],
+    }
+
+
+def _imprimir_texto(resposta: Dict, caminhos: Optional[List[str]] = None):
+    """Saída legível para terminal"""
+    for i, info in enumerate(resposta["resultados"]):
+        linha = f"{info['arquivo']:<60} {info['tipo']:<11} {info['potencia']:<9} {info['modulos']}"
+        if caminhos:
+            linha += f"\n    → {caminhos[i]}"
+        print(linha)
+    print(f"📊 {resposta['total']} projetos ({resposta['ms']:.2f} ms)", file=sys.stderr)
+
+
+def _ler_consulta(linha: str, tipo_padrao: str):
+    """Interpreta uma linha do modo --batch"""
+    linha = linha.strip()
+    if linha.startswith("{"):
+        dados = json.loads(linha)
+        return dados.get("termo", ""), dados.get("tipo", tipo_padrao)
+    return linha, tipo_padrao
+
+
+def executar_batch(catalogo: Catalogo, args) -> int:
+    """Responde uma consulta por linha da entrada padrão"""
+    consultas = 0
+    inicio = time.perf_counter()
+
+    for linha in sys.stdin:
+        if not linha.strip():
+            continue
+        try:
+            termo, tipo = _ler_consulta(linha, args.tipo)
+        except ValueError as e:
+            print(json.dumps({"erro": f"consulta inválida: {e}"}, ensure_ascii=False))
+            continue
+        resposta = responder(catalogo, termo, tipo, args.limite)
+        consultas += 1
+        if args.json:
+            print(json.dumps(resposta, ensure_ascii=False))
+        else:
+            print(f"# {termo} [{tipo}]")
+            _imprimir_texto(resposta)
+
+    duracao = time.perf_counter() - inicio
+    if consultas:
+        print(f"✓ {consultas} consultas em {duracao:.3f} s "
+              f"({consultas / duracao:.0f} consultas/s, {len(catalogo)} projetos)",
+              file=sys.stderr)
+    return 0
+
+
+def main(argv: List[str], pasta_padrao: str) -> int:
+    """
+    Ponto de entrada do subcomando search
+
+    Args:
+        argv: Argumentos após 'search'
+        pasta_padrao: Pasta local de DWGs da configuração
+    """
+    parser = argparse.ArgumentParser(
+        prog="banco_projetos search",
+        description="Busca projetos DWG sem abrir a interface gráfica"
+    )
+    parser.add_argument("termo", nargs="?", default="",
+                        help="Termos separados por espaço (todos devem aparecer no nome)")
+    parser.add_argument("--tipo", default=TODOS, choices=[TODOS] + TIPOS,
+                        help="Filtrar por tipo de projeto")
+    parser.add_argument("--json", action="store_true", help="Saída em JSON")
+    parser.add_argument("--limite", type=int, default=None, help="Máximo de resultados exibidos")
+    parser.add_argument("--batch", action="store_true",
+                        help="Ler uma consulta por linha da entrada padrão")
+    parser.add_argument("--pasta", default=pasta_padrao, help="Pasta local com os DWGs")
+    parser.add_argument("--firebase", action="store_true",
+                        help="Usar a listagem do Firebase em vez da pasta local")
+    parser.add_argument("--caminho", action="store_true",
+                        help="Incluir o caminho local de cada resultado (baixa do Firebase se preciso)")
+    args = parser.parse_args(argv)
+
+    try:
+        catalogo, firebase_sync = carregar_catalogo(args.pasta, args.firebase)
+    except Exception as e:
+        print(f"❌ Erro ao carregar catálogo: {e}", file=sys.stderr)
+        return 1
+
+    if args.batch:
+        return executar_batch(catalogo, args)
+
+    resposta = responder(catalogo, args.termo, args.tipo, args.limite)
+
+    caminhos = None
+    if args.caminho:
+        caminhos = []
+        exibidos = catalogo.buscar(args.termo, args.tipo)[:len(resposta["resultados"])]
+        for info, publico in zip(exibidos, resposta["resultados"]):
+            caminho, _ = obter_arquivo_local(info, args.pasta, firebase_sync)
+            publico["caminho_local"] = caminho
+            caminhos.append(caminho)
+
+    if args.json:
+        print(json.dumps(resposta, ensure_ascii=False, indent=2))
+    else:
+        _imprimir_texto(resposta, caminhos)
+    return 0
@@ -0,0 +1,102 @@
+"""
+Trava de arquivo entre processos
+
+Este módulo gerencia:
+- Trava exclusiva por arquivo auxiliar (<arquivo>.lock), válida entre
+  processos e estações que compartilham a pasta
+- fcntl.flock no Linux/macOS e msvcrt.locking no Windows
+- Espera com tempo limite (TimeoutError se outro processo não liberar)
+
+O sistema operacional libera a trava se o processo morrer, então não há
+arquivos de trava "órfãos" a limpar.
+"""
+
+import os
+import sys
+import time
+import threading
+from typing import Optional
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+INTERVALO_ESPERA = 0.05  # segundos entre tentativas
+
+
+class TravaArquivo:
+    """
+    Trava exclusiva entre processos (use com 'with')
+
+    Reentrante dentro da mesma instância: chamadas aninhadas na mesma
+    thread não travam a si mesmas.
+    """
+
+    def __init__(self, caminho: str, timeout: Optional[float] = 10.0):
+        """
+        Args:
+            caminho: Arquivo protegido (a trava fica em caminho + ".lock")
+            timeout: Segundos de espera (None = esperar indefinidamente)
+        """
+        self.caminho = caminho + ".lock"
+        self.timeout = timeout
+        self._fd = None
+        self._nivel = 0
+        self._local = threading.RLock()
+
+    def _tentar(self) -> bool:
+        try:
+            if sys.platform == "win32":
+                msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def adquirir(self):
+        """Espera pela trava (TimeoutError se passar do tempo limite)"""
+        self._local.acquire()
+        if self._nivel:
+            self._nivel += 1
+            return
+        try:
+            pasta = os.path.dirname(self.caminho)
+            if pasta:
+                os.makedirs(pasta, exist_ok=True)
+            self._fd = os.open(self.caminho, os.O_RDWR | os.O_CREAT, 0o644)
+            limite = None if self.timeout is None else time.monotonic() + self.timeout
+            while not self._tentar():
+                if limite is not None and time.monotonic() >= limite:
+                    raise TimeoutError(f"Arquivo em uso por outro processo: {self.caminho}")
+                time.sleep(INTERVALO_ESPERA)
+        except BaseException:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            self._local.release()
+            raise
+        self._nivel = 1
+
+    def liberar(self):
+        self._nivel -= 1
+        if self._nivel == 0:
+            try:
+                if sys.platform == "win32":
+                    os.lseek(self._fd, 0, os.SEEK_SET)
+                    msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        self._local.release()
+
+    def __enter__(self):
+        self.adquirir()
+        return self
+
+    def __exit__(self, *exc):
+        self.liberar()
+        return False
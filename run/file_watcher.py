@@ -0,0 +1,373 @@
+"""
+Módulo de monitoramento da pasta local de arquivos DWG
+
+Este módulo gerencia:
+- Observação recursiva da pasta sem varreduras periódicas: inotify (Linux)
+  e ReadDirectoryChangesW (Windows)
+- Fallback por polling (comparação dos nomes, intervalo longo) onde nenhum
+  dos dois está disponível
+- Entrega de eventos incrementais (criado/removido) para o catálogo em memória,
+  com caminhos relativos à pasta observada (separador '/')
+"""
+
+import os
+import sys
+import logging
+import struct
+import threading
+import time
+from typing import Callable, Optional, Set
+
+from scanner import arquivo_relevante, listar_subpastas, varrer_pasta
+
+logger = logging.getLogger(__name__)
+
+# Tipos de evento entregues ao callback
+EVENTO_CRIADO = "criado"
+EVENTO_REMOVIDO = "removido"
+EVENTO_RESSINCRONIZAR = "ressincronizar"  # Perdemos eventos: recarregar tudo
+
+# Constantes do inotify (linux/inotify.h)
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Constantes do ReadDirectoryChangesW (winnt.h / winbase.h)
+_FILE_LIST_DIRECTORY = 0x0001
+_FILE_SHARE_TODOS = 0x0001 | 0x0002 | 0x0004  # leitura, escrita e remoção
+_OPEN_EXISTING = 3
+_FILE_FLAG_BACKUP_SEMANTICS = 0x02000000
+_FILE_FLAG_OVERLAPPED = 0x40000000
+_FILE_NOTIFY_CHANGE_NOMES = 0x0001 | 0x0002  # FILE_NAME e DIR_NAME
+_FILE_ACTION_ADDED = 1
+_FILE_ACTION_REMOVED = 2
+_FILE_ACTION_RENAMED_OLD_NAME = 4
+_FILE_ACTION_RENAMED_NEW_NAME = 5
+_WAIT_OBJECT_0 = 0
+_WAIT_TIMEOUT = 0x102
+_NOTIFY_HEADER = struct.Struct("III")  # NextEntryOffset, Action, FileNameLength
+_TAMANHO_BUFFER = 64 * 1024
+
+# Sem notificações do sistema: comparar os nomes a cada N segundos
+INTERVALO_POLLING = 30.0
+
+
+def _carregar_inotify():
+    """Retorna a libc com inotify disponível ou None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def _carregar_kernel32():
+    """Retorna a kernel32 com ReadDirectoryChangesW (Windows) ou None"""
+    if sys.platform != "win32":
+        return None
+    try:
+        import ctypes
+        from ctypes import wintypes
+        k32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        k32.CreateFileW.argtypes = [wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID,
+                                    wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE]
+        k32.CreateFileW.restype = wintypes.HANDLE
+        k32.ReadDirectoryChangesW.argtypes = [wintypes.HANDLE, wintypes.LPVOID, wintypes.DWORD,
+                                              wintypes.BOOL, wintypes.DWORD,
+                                              ctypes.POINTER(wintypes.DWORD), wintypes.LPVOID,
+                                              wintypes.LPVOID]
+        k32.ReadDirectoryChangesW.restype = wintypes.BOOL
+        k32.CreateEventW.argtypes = [wintypes.LPVOID, wintypes.BOOL, wintypes.BOOL, wintypes.LPCWSTR]
+        k32.CreateEventW.restype = wintypes.HANDLE
+        k32.WaitForSingleObject.argtypes = [wintypes.HANDLE, wintypes.DWORD]
+        k32.WaitForSingleObject.restype = wintypes.DWORD
+        k32.GetOverlappedResult.argtypes = [wintypes.HANDLE, wintypes.LPVOID,
+                                            ctypes.POINTER(wintypes.DWORD), wintypes.BOOL]
+        k32.GetOverlappedResult.restype = wintypes.BOOL
+        k32.CancelIoEx.argtypes = [wintypes.HANDLE, wintypes.LPVOID]
+        k32.CancelIoEx.restype = wintypes.BOOL
+        k32.CloseHandle.argtypes = [wintypes.HANDLE]
+        k32.CloseHandle.restype = wintypes.BOOL
+        return k32
+    except (OSError, AttributeError):
+        return None
+
+
+class FolderWatcher:
+    """Observa uma pasta e notifica criação/remoção de arquivos DWG"""
+
+    def __init__(self, pasta: str, callback: Callable[[str, Optional[str]], None],
+                 intervalo_polling: float = INTERVALO_POLLING, usar_inotify: bool = True):
+        """
+        Inicializa o observador
+
+        Args:
+            pasta: Pasta a observar
+            callback: Função chamada com (evento, caminho_relativo) na thread do observador
+            intervalo_polling: Intervalo entre comparações no modo polling (segundos)
+            usar_inotify: Permite desativar as notificações do sistema
+                (inotify/ReadDirectoryChangesW; útil para testes)
+        """
+        self.pasta = pasta
+        self.callback = callback
+        self.intervalo_polling = intervalo_polling
+        self.thread = None
+        self.running = False
+        self._libc = _carregar_inotify() if usar_inotify else None
+        self._kernel32 = _carregar_kernel32() if usar_inotify else None
+        self._fd = -1
+        self._pastas = {}  # wd -> caminho relativo da pasta ('' = raiz)
+        self._subpastas: Set[str] = set()  # Windows: subpastas conhecidas ('a/b/')
+        if self._libc:
+            self.modo = "inotify"
+        elif self._kernel32:
+            self.modo = "windows"
+        else:
+            self.modo = "polling"
+
+    def start(self):
+        """Inicia a observação em background"""
+        if self.thread and self.thread.is_alive():
+            return
+
+        self.running = True
+        alvo = {"inotify": self._loop_inotify, "windows": self._loop_windows}.get(
+            self.modo, self._loop_polling)
+        self.thread = threading.Thread(target=alvo, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Para a observação"""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def _emitir(self, evento: str, nome: Optional[str] = None):
+        """Entrega evento ao callback, filtrando arquivos irrelevantes"""
+        if nome is not None and not arquivo_relevante(nome):
+            return
+        try:
+            self.callback(evento, nome)
+        except Exception as e:
+            logger.error("❌ Erro no callback do observador: %s", e)
+
+    # ------------------------------------------------------------------
+    # inotify (Linux)
+    # ------------------------------------------------------------------
+
+    def _loop_inotify(self):
+        """Loop de leitura de eventos inotify (interno)"""
+        import ctypes
+        import select
+
+        fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            logger.warning("⚠️ inotify indisponível (errno %d), usando polling", ctypes.get_errno())
+            self.modo = "polling"
+            self._loop_polling()
+            return
+
+        self._fd = fd
+        self._pastas = {}
+        if not all(self._observar_pasta(relativo) for relativo in listar_subpastas(self.pasta)):
+            os.close(fd)
+            logger.warning("⚠️ Não foi possível observar %s, usando polling", self.pasta)
+            self.modo = "polling"
+            self._loop_polling()
+            return
+
+        try:
+            while self.running:
+                prontos, _, _ = select.select([fd], [], [], 0.5)
+                if not prontos:
+                    continue
+                try:
+                    dados = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                self._processar_inotify(dados)
+        finally:
+            os.close(fd)
+
+    def _observar_pasta(self, relativo: str) -> bool:
+        """Adiciona watch inotify para uma pasta (interno)"""
+        mascara = (_IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO |
+                   _IN_DELETE_SELF | _IN_MOVE_SELF)
+        caminho = os.path.join(self.pasta, relativo) if relativo else self.pasta
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(caminho), mascara)
+        if wd < 0:
+            return False
+        self._pastas[wd] = relativo
+        return True
+
+    def _processar_inotify(self, dados: bytes):
+        """Decodifica um buffer de eventos inotify (interno)"""
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(dados):
+            wd, mask, _, tamanho = _EVENT_HEADER.unpack_from(dados, offset)
+            inicio = offset + _EVENT_HEADER.size
+            nome = os.fsdecode(dados[inicio:inicio + tamanho].rstrip(b"\0"))
+            offset = inicio + tamanho
+            pasta = self._pastas.get(wd)
+
+            if mask & _IN_Q_OVERFLOW:
+                self._emitir(EVENTO_RESSINCRONIZAR)
+            elif mask & _IN_IGNORED:
+                self._pastas.pop(wd, None)
+            elif mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                if pasta == "":
+                    # A própria pasta raiz sumiu: só uma recarga completa resolve
+                    self._emitir(EVENTO_RESSINCRONIZAR)
+            elif pasta is None or not nome:
+                continue
+            elif mask & _IN_ISDIR:
+                self._processar_subpasta(mask, pasta + nome + "/")
+            elif mask & (_IN_CREATE | _IN_MOVED_TO):
+                self._emitir(EVENTO_CRIADO, pasta + nome)
+            elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                self._emitir(EVENTO_REMOVIDO, pasta + nome)
+
+    def _processar_subpasta(self, mask: int, relativo: str):
+        """Trata criação/remoção de subpastas (interno)"""
+        if mask & (_IN_DELETE | _IN_MOVED_FROM):
+            # Não guardamos o conteúdo das subpastas: recarga completa (raro)
+            self._emitir(EVENTO_RESSINCRONIZAR)
+            return
+
+        # Pasta nova (ou movida para dentro): observar e anunciar seu conteúdo
+        caminho = os.path.join(self.pasta, relativo)
+        for subpasta in listar_subpastas(caminho):
+            self._observar_pasta(relativo + subpasta)
+        for nome in varrer_pasta(caminho):
+            self._emitir(EVENTO_CRIADO, relativo + nome)
+
+    # ------------------------------------------------------------------
+    # ReadDirectoryChangesW (Windows)
+    # ------------------------------------------------------------------
+
+    def _loop_windows(self):
+        """Loop de leitura de ReadDirectoryChangesW, com E/S sobreposta (interno)"""
+        import ctypes
+        from ctypes import wintypes
+
+        class OVERLAPPED(ctypes.Structure):
+            _fields_ = [("Internal", ctypes.c_void_p), ("InternalHigh", ctypes.c_void_p),
+                        ("Offset", wintypes.DWORD), ("OffsetHigh", wintypes.DWORD),
+                        ("hEvent", wintypes.HANDLE)]
+
+        k32 = self._kernel32
+        handle = k32.CreateFileW(self.pasta, _FILE_LIST_DIRECTORY, _FILE_SHARE_TODOS, None,
+                                 _OPEN_EXISTING, _FILE_FLAG_BACKUP_SEMANTICS | _FILE_FLAG_OVERLAPPED,
+                                 None)
+        if handle in (None, ctypes.c_void_p(-1).value):
+            logger.warning("⚠️ Não foi possível observar %s (erro %d), usando polling",
+                           self.pasta, ctypes.get_last_error())
+            self.modo = "polling"
+            self._loop_polling()
+            return
+
+        evento = k32.CreateEventW(None, False, False, None)
+        buffer = (wintypes.DWORD * (_TAMANHO_BUFFER // 4))()  # alinhado em DWORD
+        sobreposta = OVERLAPPED(hEvent=evento)
+        lidos = wintypes.DWORD()
+        self._subpastas = set(listar_subpastas(self.pasta)) - {""}
+        falhou = False
+        try:
+            while self.running:
+                if not k32.ReadDirectoryChangesW(handle, buffer, _TAMANHO_BUFFER, True,
+                                                 _FILE_NOTIFY_CHANGE_NOMES, None,
+                                                 ctypes.byref(sobreposta), None):
+                    falhou = True
+                    break
+                # Espera em fatias para perceber stop()
+                while self.running and k32.WaitForSingleObject(evento, 500) == _WAIT_TIMEOUT:
+                    pass
+                if not self.running:
+                    k32.CancelIoEx(handle, ctypes.byref(sobreposta))
+                    k32.GetOverlappedResult(handle, ctypes.byref(sobreposta), ctypes.byref(lidos), True)
+                    break
+                if not k32.GetOverlappedResult(handle, ctypes.byref(sobreposta),
+                                               ctypes.byref(lidos), False):
+                    # A própria pasta sumiu (ou ficou inacessível): só uma recarga completa resolve
+                    self._emitir(EVENTO_RESSINCRONIZAR)
+                    falhou = True
+                    break
+                if lidos.value == 0:
+                    # Buffer cheio: eventos perdidos
+                    self._emitir(EVENTO_RESSINCRONIZAR)
+                else:
+                    self._processar_windows(ctypes.string_at(buffer, lidos.value))
+        finally:
+            k32.CloseHandle(handle)
+            k32.CloseHandle(evento)
+
+        if falhou and self.running:
+            logger.warning("⚠️ ReadDirectoryChangesW falhou (erro %d), usando polling",
+                           ctypes.get_last_error())
+            self.modo = "polling"
+            self._loop_polling()
+
+    def _processar_windows(self, dados: bytes):
+        """Decodifica um buffer de FILE_NOTIFY_INFORMATION (interno)"""
+        offset = 0
+        while offset + _NOTIFY_HEADER.size <= len(dados):
+            proximo, acao, tamanho = _NOTIFY_HEADER.unpack_from(dados, offset)
+            inicio = offset + _NOTIFY_HEADER.size
+            nome = dados[inicio:inicio + tamanho].decode("utf-16-le").replace("\\", "/")
+
+            if acao in (_FILE_ACTION_ADDED, _FILE_ACTION_RENAMED_NEW_NAME):
+                caminho = os.path.join(self.pasta, nome)
+                if os.path.isdir(caminho):
+                    # Pasta nova (ou movida para dentro): anunciar seu conteúdo
+                    self._subpastas.update(nome + "/" + sub for sub in listar_subpastas(caminho))
+                    for arquivo in varrer_pasta(caminho):
+                        self._emitir(EVENTO_CRIADO, nome + "/" + arquivo)
+                else:
+                    self._emitir(EVENTO_CRIADO, nome)
+            elif acao in (_FILE_ACTION_REMOVED, _FILE_ACTION_RENAMED_OLD_NAME):
+                if nome + "/" in self._subpastas:
+                    # Não guardamos o conteúdo das subpastas: recarga completa (raro)
+                    self._subpastas = {p for p in self._subpastas if not p.startswith(nome + "/")}
+                    self._emitir(EVENTO_RESSINCRONIZAR)
+                else:
+                    self._emitir(EVENTO_REMOVIDO, nome)
+
+            if not proximo:
+                break
+            offset += proximo
+
+    # ------------------------------------------------------------------
+    # Polling (fallback)
+    # ------------------------------------------------------------------
+
+    def _loop_polling(self):
+        """Loop de comparação dos nomes (interno; só sem notificações do sistema)"""
+        anterior = set(varrer_pasta(self.pasta))
+        while self.running:
+            # Espera em fatias para perceber stop()
+            limite = time.monotonic() + self.intervalo_polling
+            while self.running and time.monotonic() < limite:
+                time.sleep(min(0.5, self.intervalo_polling))
+            if not self.running:
+                break
+            atual = set(varrer_pasta(self.pasta))
+            for nome in sorted(anterior - atual):
+                self._emitir(EVENTO_REMOVIDO, nome)
+            for nome in sorted(atual - anterior):
+                self._emitir(EVENTO_CRIADO, nome)
+            anterior = atual
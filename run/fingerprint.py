@@ -0,0 +1,162 @@
+"""
+Detecção rápida de mudança em arquivos locais
+
+Este módulo gerencia:
+- Impressão digital rápida (não criptográfica) do conteúdo: xxhash (xxh3)
+  ou BLAKE3 se instalados, senão BLAKE2b da biblioteca padrão
+- Atalho por stat: tamanho e mtime iguais aos da última vez = arquivo não
+  mudou, sem ler nada
+- MD5 (formato do Firebase) só quando a comparação com o remoto precisa
+  dele; quando os dois são necessários, uma única leitura calcula ambos
+- Estado persistente por pasta (EstadoArquivos) para o sync_folder
+
+A impressão leva o nome do algoritmo ("xxh3:...") para nunca comparar
+valores de algoritmos diferentes (ex.: estado gravado antes de instalar o
+xxhash).
+"""
+
+import os
+import json
+import base64
+import hashlib
+import logging
+import tempfile
+from typing import Callable, Dict, Tuple
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+try:
+    import xxhash
+    ALGORITMO = "xxh3"
+except ImportError:
+    xxhash = None
+    try:
+        import blake3
+        ALGORITMO = "blake3"
+    except ImportError:
+        blake3 = None
+        ALGORITMO = "blake2b"
+
+BLOCO = 1024 * 1024
+
+
+def novo_hash():
+    """Objeto de hash da impressão (update/hexdigest)"""
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+    if ALGORITMO == "blake3":
+        return blake3.blake3()
+    return hashlib.blake2b(digest_size=16)
+
+
+def formatar(hash_impressao) -> str:
+    return f"{ALGORITMO}:{hash_impressao.hexdigest()}"
+
+
+def impressao(caminho) -> str:
+    """Impressão digital rápida do conteúdo do arquivo"""
+    h = novo_hash()
+    with metrics.medir("hash.impressao"), open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(BLOCO), b""):
+            h.update(bloco)
+    return formatar(h)
+
+
+def calcular(caminho) -> Tuple[str, str]:
+    """
+    MD5 (base64, como o Firebase) e impressão numa única leitura
+
+    Returns:
+        Tupla (md5, impressao)
+    """
+    h_md5 = hashlib.md5()
+    h = novo_hash()
+    with metrics.medir("hash.md5"), open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(BLOCO), b""):
+            h_md5.update(bloco)
+            h.update(bloco)
+    metrics.contar("hash.arquivos")
+    return base64.b64encode(h_md5.digest()).decode("utf-8"), formatar(h)
+
+
+class EstadoArquivos:
+    """
+    Última impressão e MD5 conhecidos dos arquivos de uma pasta
+
+    Gravado em JSON (escrita atômica) com {nome: {tamanho, mtime_ns,
+    impressao, md5}}. Um arquivo cujo stat não mudou reaproveita o MD5 sem
+    ser lido; se o stat mudou mas a impressão é a mesma (arquivo copiado ou
+    tocado), também.
+    """
+
+    def __init__(self, caminho: str):
+        """
+        Args:
+            caminho: Arquivo JSON do estado (criado ao salvar)
+        """
+        self.caminho = caminho
+        self.alterado = False
+        self._entradas: Dict[str, dict] = {}
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                self._entradas = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning("⚠ Estado de arquivos ignorado (%s): %s", caminho, e)
+
+    def md5(self, nome: str, caminho, calcular_md5: Callable[[str], Tuple[str, str]] = calcular) -> str:
+        """
+        MD5 do arquivo, lendo o mínimo possível
+
+        Args:
+            nome: Chave do arquivo no estado (caminho relativo)
+            caminho: Caminho no disco
+            calcular_md5: Função (caminho) -> (md5, impressao), em uma leitura
+        """
+        st = os.stat(caminho)
+        entrada = self._entradas.get(nome)
+        if entrada and entrada.get("tamanho") == st.st_size:
+            if entrada.get("mtime_ns") == st.st_mtime_ns:
+                metrics.contar("hash.atalho_stat")
+                return entrada["md5"]
+            if entrada.get("impressao", "").startswith(ALGORITMO + ":") and \
+                    impressao(caminho) == entrada["impressao"]:
+                metrics.contar("hash.atalho_impressao")
+                entrada["mtime_ns"] = st.st_mtime_ns
+                self.alterado = True
+                return entrada["md5"]
+
+        md5, impressao_atual = calcular_md5(caminho)
+        self._entradas[nome] = {"tamanho": st.st_size, "mtime_ns": st.st_mtime_ns,
+                                "impressao": impressao_atual, "md5": md5}
+        self.alterado = True
+        return md5
+
+    def esquecer_ausentes(self, nomes):
+        """Remove do estado o que não está em 'nomes' (arquivos apagados)"""
+        presentes = set(nomes)
+        for nome in [n for n in self._entradas if n not in presentes]:
+            del self._entradas[nome]
+            self.alterado = True
+
+    def salvar(self):
+        """Grava o estado se algo mudou (temporário + os.replace)"""
+        if not self.alterado:
+            return
+        pasta = os.path.dirname(self.caminho) or "."
+        try:
+            fd, temporario = tempfile.mkstemp(dir=pasta, prefix=os.path.basename(self.caminho),
+                                              suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self._entradas, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(temporario, self.caminho)
+            except BaseException:
+                os.unlink(temporario)
+                raise
+            self.alterado = False
+        except OSError as e:
+            logger.warning("⚠ Não foi possível salvar o estado de arquivos: %s", e)
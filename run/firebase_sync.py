@@ -3,63 +3,231 @@ Módulo de sincronização de arquivos DWG com Firebase Storage
 
 Este módulo gerencia:
 - Upload e download de arquivos DWG para/do Firebase
-- Cache local de arquivos para acesso offline
-- Sincronização automática periódica
+- Cache local de arquivos para acesso offline, compartilhado entre
+  instâncias (manifesto e trava por arquivo; ver cache_manifest.py)
+- Última listagem remota salva no cache (abrir sem rede)
+- Prioridade das transferências (cópia do usuário antes da sincronização;
+  ver transfer_scheduler.py)
+- Sincronização automática com intervalo adaptativo (mais curto quando há
+  mudanças, mais longo sem elas, recuo exponencial com jitter em erros)
 - Listagem de arquivos disponíveis na nuvem
 """
 
 import os
+import json
+import random
+import logging
 import tempfile
 import threading
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Tuple
 import hashlib
+import importlib.util
 
-try:
-    import firebase_admin
-    from firebase_admin import credentials, storage
+import metrics
+import fingerprint
+from cache_manifest import ManifestoCache
+from scanner import varrer_pasta
+from storage_backends import StorageBackend, FirebaseBackend, OrigemAlterada, TAMANHO_PAGINA
+from transfer_scheduler import AgendadorTransferencias, INTERATIVO, SEGUNDO_PLANO
+
+logger = logging.getLogger(__name__)
+
+# firebase_admin (e os clientes google-cloud que ele puxa) leva segundos para
+# importar; só verificamos se está instalado e importamos ao conectar.
+FIREBASE_AVAILABLE = all(importlib.util.find_spec(m) is not None
+                         for m in ("firebase_admin", "dotenv"))
+if not FIREBASE_AVAILABLE:
+    logger.warning("⚠️ Firebase não disponível. Instale: pip install firebase-admin python-dotenv")
+
+# Sincronização automática: fatores do intervalo adaptativo
+FATOR_COM_MUDANCA = 0.5   # houve mudança: volta mais cedo
+FATOR_SEM_MUDANCA = 1.5   # nada mudou: espaça
+JITTER = 0.1              # ±10% para as estações não sincronizarem juntas
+
+# Última listagem bem-sucedida de PREFIXO_LISTAGEM, guardada na pasta do cache
+ARQUIVO_LISTAGEM = ".listagem_remota.json"
+PREFIXO_LISTAGEM = "CONTROLE/"
+
+
+class ArquivoRemoto:
+    """
+    Item da listagem remota
+
+    Registro compacto (__slots__, sem dicionário por instância). Continua
+    acessível como dicionário (arq['nome'], arq.get('md5_hash'), dict(arq))
+    para quem consumia a listagem antiga.
+    """
+    
+    __slots__ = ('nome', 'caminho', 'tamanho', 'atualizado', 'md5_hash')
+    
+    def __init__(self, nome: str, caminho: str, tamanho: Optional[int] = None,
+                 atualizado: Optional[str] = None, md5_hash: Optional[str] = None):
+        self.nome = nome
+        self.caminho = caminho
+        self.tamanho = tamanho
+        self.atualizado = atualizado
+        self.md5_hash = md5_hash
+    
+    def __getitem__(self, chave: str):
+        try:
+            return getattr(self, chave)
+        except (AttributeError, TypeError):
+            raise KeyError(chave) from None
+    
+    def get(self, chave: str, padrao=None):
+        return getattr(self, chave, padrao)
+    
+    def keys(self):
+        return self.__slots__
+    
+    def __repr__(self):
+        return f"ArquivoRemoto({self.caminho!r})"
+
+
+def _carregar_env(config_path: str = None):
+    """Carrega o .env (se python-dotenv estiver instalado)"""
+    if importlib.util.find_spec("dotenv") is None:
+        return
     from dotenv import load_dotenv
-    FIREBASE_AVAILABLE = True
-except ImportError:
-    FIREBASE_AVAILABLE = False
-    print("⚠️ Firebase não disponível. Instale: pip install firebase-admin python-dotenv")
+    if config_path and os.path.exists(config_path):
+        load_dotenv(config_path)
+    else:
+        load_dotenv()  # Tenta carregar do diretório atual
+
+
+def pasta_cache(cache_path: str = None) -> Path:
+    """
+    Pasta do cache local (cache_path, LOCAL_CACHE_DIR ou temp do sistema)
+    
+    Não cria a pasta nem conecta ao Firebase: serve para abrir o cache sem rede.
+    """
+    if not cache_path and 'LOCAL_CACHE_DIR' not in os.environ:
+        _carregar_env()
+    cache_path = cache_path or os.getenv('LOCAL_CACHE_DIR', '')
+    
+    if cache_path and cache_path.strip():
+        return Path(cache_path).resolve()
+    # Usar diretório temporário do sistema
+    return Path(tempfile.gettempdir()) / "banco_projetos_dwg"
+
+
+def carregar_listagem(cache_dir, prefix: str = PREFIXO_LISTAGEM
+                      ) -> Optional[Tuple[List[ArquivoRemoto], Optional[str]]]:
+    """
+    Lê a última listagem remota salva no cache (ver FirebaseSync.salvar_listagem)
+    
+    Args:
+        cache_dir: Pasta do cache
+        prefix: Prefixo da listagem
+    
+    Returns:
+        Tupla (arquivos, salva_em) com salva_em em ISO 8601, ou None se não
+        há listagem salva para o prefixo
+    """
+    caminho = Path(cache_dir) / ARQUIVO_LISTAGEM
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("⚠ Listagem salva ilegível (%s): %s", caminho, e)
+        return None
+    
+    if dados.get('prefixo') != prefix:
+        return None
+    arquivos = [ArquivoRemoto(nome, prefix + nome) for nome in dados.get('arquivos', [])]
+    return arquivos, dados.get('salva_em')
+
+
+class Mudancas:
+    """
+    Mudanças na listagem remota entre duas sincronizações
+    
+    Nomes relativos ao prefixo (como ArquivoRemoto.nome). Modificados são
+    arquivos que já existiam e foram baixados de novo (conteúdo mudou ou
+    faltava no cache).
+    """
+    
+    __slots__ = ('prefixo', 'adicionados', 'removidos', 'modificados')
+    
+    def __init__(self, prefixo: str, adicionados: List[str] = (), removidos: List[str] = (),
+                 modificados: List[str] = ()):
+        self.prefixo = prefixo
+        self.adicionados = list(adicionados)
+        self.removidos = list(removidos)
+        self.modificados = list(modificados)
+    
+    def __bool__(self) -> bool:
+        return bool(self.adicionados or self.removidos or self.modificados)
+    
+    def __repr__(self):
+        return (f"Mudancas(+{len(self.adicionados)} -{len(self.removidos)} "
+                f"~{len(self.modificados)})")
 
 
 class FirebaseSync:
     """Gerenciador de sincronização com Firebase Storage"""
     
-    def __init__(self, config_path: str = None):
+    def __init__(self, config_path: str = None, backend: StorageBackend = None,
+                 cache_dir: str = None, agendador: AgendadorTransferencias = None):
         """
         Inicializa o gerenciador Firebase
         
         Args:
             config_path: Caminho para o arquivo .env (opcional)
+            backend: Backend de armazenamento já pronto (ex: LocalBackend em
+                testes e benchmarks). Se omitido, conecta ao Firebase Storage.
+            cache_dir: Pasta de cache local (padrão: LOCAL_CACHE_DIR ou temp)
+            agendador: Agendador de transferências (padrão: um novo, com
+                SYNC_TRANSFERENCIAS e SYNC_LIMITE_KBPS do .env)
         """
         self.initialized = False
         self.bucket = None
+        self.backend = None
         self.cache_dir = None
+        self.manifesto: Optional[ManifestoCache] = None
         self.sync_thread = None
         self.running = False
+        self._acordar = threading.Event()   # interrompe a espera (parar/retomar)
+        self._retomado = threading.Event()  # limpo enquanto pausado (janela minimizada)
+        self._retomado.set()
+        self.intervalo_atual: Optional[float] = None
+        # Nomes de PREFIXO_LISTAGEM contra os quais download_all calcula as
+        # Mudancas; só avança dentro de download_all (ou marcar_base), com a trava
+        self._base_mudancas: Optional[set] = None
+        self._trava_download = threading.Lock()
+        self.online: Optional[bool] = None  # resultado da última listagem (None = não listou)
+        self._listagem_salva: Optional[List[str]] = None
+        
+        if backend is not None:
+            self.backend = backend
+            self.initialized = True
+            self.agendador = agendador or self._criar_agendador()
+            self._setup_cache(cache_dir)
+            return
         
         if not FIREBASE_AVAILABLE:
             raise ImportError("Firebase não está instalado. Execute: pip install firebase-admin python-dotenv")
         
         # Carregar variáveis de ambiente
-        if config_path and os.path.exists(config_path):
-            load_dotenv(config_path)
-        else:
-            load_dotenv()  # Tenta carregar do diretório atual
+        _carregar_env(config_path)
+        self.agendador = agendador or self._criar_agendador()
         
         # Inicializar Firebase
         self._initialize_firebase()
         
         # Configurar cache local
-        self._setup_cache()
+        self._setup_cache(cache_dir)
     
     def _initialize_firebase(self):
         """Inicializa conexão com Firebase"""
+        import firebase_admin
+        from firebase_admin import credentials, storage
+        
         try:
             # Buscar configurações
             cred_path = os.getenv('FIREBASE_CREDENTIALS_PATH', 'firebase-credentials.json')
@@ -85,68 +253,169 @@ class FirebaseSync:
                 })
             
             self.bucket = storage.bucket()
+            self.backend = FirebaseBackend(self.bucket)
             self.initialized = True
-            print(f"✓ Conectado ao Firebase Storage: {bucket_name}")
+            logger.info("✓ Conectado ao Firebase Storage: %s", bucket_name)
             
         except Exception as e:
-            print(f"❌ Erro ao inicializar Firebase: {e}")
+            logger.error("❌ Erro ao inicializar Firebase: %s", e)
             raise
     
-    def _setup_cache(self):
+    @staticmethod
+    def _criar_agendador() -> AgendadorTransferencias:
+        """Agendador com os limites do ambiente (.env)"""
+        try:
+            simultaneas = int(os.getenv('SYNC_TRANSFERENCIAS', '4'))
+            limite_kbps = float(os.getenv('SYNC_LIMITE_KBPS', '0'))
+        except ValueError:
+            logger.warning("⚠ SYNC_TRANSFERENCIAS/SYNC_LIMITE_KBPS inválidos no .env, usando padrão")
+            simultaneas, limite_kbps = 4, 0
+        return AgendadorTransferencias(simultaneas, limite_kbps * 1024)
+    
+    def _setup_cache(self, cache_path: str = None):
         """Configura diretório de cache local"""
-        cache_path = os.getenv('LOCAL_CACHE_DIR', '')
+        self.cache_dir = pasta_cache(cache_path)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.manifesto = ManifestoCache(self.cache_dir)
+        
+        # Começando sem rede, a listagem salva é a referência das mudanças:
+        # o que sumiu da nuvem enquanto estava offline sai na próxima download_all
+        salva = carregar_listagem(self.cache_dir)
+        if salva is not None:
+            self._listagem_salva = [arq.nome for arq in salva[0]]
+            self._base_mudancas = set(self._listagem_salva)
+        
+        logger.info("✓ Cache local: %s", self.cache_dir)
+    
+    def iter_files(self, prefix: str = "CONTROLE/", campos: Optional[Iterable[str]] = None,
+                   tamanho_pagina: int = TAMANHO_PAGINA,
+                   prioridade: int = INTERATIVO) -> Iterator[ArquivoRemoto]:
+        """
+        Itera os arquivos DWG do Firebase à medida que as páginas chegam
         
-        if cache_path and cache_path.strip():
-            self.cache_dir = Path(cache_path).resolve()
-            self.cache_dir.mkdir(parents=True, exist_ok=True)
-        else:
-            # Usar diretório temporário do sistema
-            self.cache_dir = Path(tempfile.gettempdir()) / "banco_projetos_dwg"
-            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        A vaga no agendador fica ocupada até o iterador terminar.
+        
+        Args:
+            prefix: Prefixo para filtrar arquivos (pasta)
+            campos: Metadados necessários ('name', 'size', 'updated',
+                'md5_hash'; None = todos). Os demais ficam None.
+            tamanho_pagina: Objetos por requisição de listagem
+            prioridade: Classe no agendador de transferências
+        
+        Yields:
+            ArquivoRemoto; 'nome' é o caminho relativo ao prefixo
+            (preserva subpastas, separador '/')
+        """
+        if not self.initialized:
+            return
         
-        print(f"✓ Cache local: {self.cache_dir}")
+        inicio = time.perf_counter()
+        quantidade = 0
+        try:
+            with self.agendador.reservar(prioridade):
+                for obj in self.backend.list(prefix, campos, tamanho_pagina):
+                    nome = obj['name']
+                    if not nome.lower().endswith('.dwg'):
+                        continue
+                    atualizado = obj['updated']
+                    quantidade += 1
+                    yield ArquivoRemoto(
+                        nome[len(prefix):] if nome.startswith(prefix) else nome,
+                        nome,
+                        obj['size'],
+                        atualizado.isoformat() if atualizado else None,
+                        obj['md5_hash']
+                    )
+        finally:
+            metrics.registrar("firebase.listar", (time.perf_counter() - inicio) * 1000)
+            metrics.contar("firebase.arquivos_listados", quantidade)
     
-    def list_files(self, prefix: str = "CONTROLE/") -> List[Dict[str, any]]:
+    def list_files(self, prefix: str = "CONTROLE/", campos: Optional[Iterable[str]] = None,
+                   prioridade: int = INTERATIVO) -> List[ArquivoRemoto]:
         """
         Lista arquivos DWG disponíveis no Firebase
         
         Args:
             prefix: Prefixo para filtrar arquivos (pasta)
+            campos: Metadados necessários (ver iter_files; None = todos)
+            prioridade: Classe no agendador de transferências
         
         Returns:
-            Lista de dicionários com informações dos arquivos
+            Lista de ArquivoRemoto (acessíveis como dicionário), ou lista
+            vazia em caso de erro (self.online indica qual dos dois)
         """
-        if not self.initialized:
-            return []
-        
+        arquivos = self._listar(prefix, campos, prioridade)
+        return arquivos if arquivos is not None else []
+    
+    def _listar(self, prefix: str, campos: Optional[Iterable[str]],
+                prioridade: int) -> Optional[List[ArquivoRemoto]]:
+        """list_files que devolve None em caso de erro (sem depender de self.online)"""
         try:
-            arquivos = []
-            blobs = self.bucket.list_blobs(prefix=prefix)
-            
-            for blob in blobs:
-                if blob.name.lower().endswith('.dwg'):
-                    arquivos.append({
-                        'nome': os.path.basename(blob.name),
-                        'caminho': blob.name,
-                        'tamanho': blob.size,
-                        'atualizado': blob.updated.isoformat() if blob.updated else None,
-                        'md5_hash': blob.md5_hash
-                    })
-            
-            return arquivos
+            arquivos = list(self.iter_files(prefix, campos, prioridade=prioridade))
             
         except Exception as e:
-            print(f"❌ Erro ao listar arquivos: {e}")
-            return []
+            self.online = False
+            metrics.contar("firebase.erros")
+            logger.error("❌ Erro ao listar arquivos: %s", e)
+            return None
+        
+        self.online = True
+        if prefix == PREFIXO_LISTAGEM:
+            self.salvar_listagem(arquivos, prefix)
+        return arquivos
     
-    def download_file(self, remote_path: str, force: bool = False, verbose: bool = True) -> Optional[str]:
+    def marcar_base(self, arquivos: Iterable[ArquivoRemoto]):
+        """
+        Define a listagem que está na tela como referência das próximas Mudancas
+        
+        Para quem listou por conta própria (ex.: ao conectar) e vai aplicar
+        só as mudanças de download_all dali em diante.
+        """
+        with self._trava_download:
+            self._base_mudancas = {arq.nome for arq in arquivos}
+    
+    def salvar_listagem(self, arquivos: List[ArquivoRemoto], prefix: str = PREFIXO_LISTAGEM):
+        """
+        Guarda os nomes da listagem no cache para abrir sem rede
+        
+        Escrita atômica (arquivo temporário + os.replace); não regrava se os
+        nomes não mudaram desde a última vez. Lida por carregar_listagem.
+        """
+        nomes = [arq.nome for arq in arquivos]
+        if nomes == self._listagem_salva:
+            return
+        
+        dados = {
+            'prefixo': prefix,
+            'salva_em': datetime.now().isoformat(timespec='seconds'),
+            'arquivos': nomes
+        }
+        try:
+            fd, temporario = tempfile.mkstemp(dir=self.cache_dir, prefix=ARQUIVO_LISTAGEM, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(dados, f, ensure_ascii=False, separators=(',', ':'))
+                os.replace(temporario, self.cache_dir / ARQUIVO_LISTAGEM)
+            except BaseException:
+                os.unlink(temporario)
+                raise
+            self._listagem_salva = nomes
+        except OSError as e:
+            logger.warning("⚠ Não foi possível salvar a listagem no cache: %s", e)
+    
+    def download_file(self, remote_path: str, force: bool = False, verbose: bool = True,
+                      prioridade: int = INTERATIVO, md5_hash: Optional[str] = None,
+                      tamanho: Optional[int] = None) -> Optional[str]:
         """
         Baixa arquivo do Firebase para cache local
         
         Args:
             remote_path: Caminho do arquivo no Firebase (ex: CONTROLE/arquivo.dwg)
             force: Forçar download mesmo se já existir no cache
-            verbose: Mostrar mensagens de progresso
+            verbose: Registrar progresso em INFO (senão só em DEBUG)
+            prioridade: Classe no agendador (padrão: pedido do usuário)
+            md5_hash: md5 já conhecido da listagem (evita consultar os metadados)
+            tamanho: Tamanho já conhecido da listagem
         
         Returns:
             Tupla (caminho_local, status) onde status é 'downloaded', 'cached' ou None se falhar
@@ -154,50 +423,113 @@ class FirebaseSync:
         if not self.initialized:
             return None
         
+        with metrics.medir("firebase.baixar"):
+            return self._download_file(remote_path, force, verbose, prioridade, md5_hash, tamanho)
+    
+    def _download_file(self, remote_path: str, force: bool, verbose: bool, prioridade: int,
+                       md5_hash: Optional[str], tamanho: Optional[int]) -> Optional[str]:
+        """Implementação de download_file (medida como firebase.baixar)"""
         try:
             # Definir caminho local
-            local_file = self.cache_dir / os.path.basename(remote_path)
+            local_file = self.caminho_cache(remote_path)
+            nome = local_file.relative_to(self.cache_dir).as_posix()
             
-            # Verificar se já existe no cache
-            if local_file.exists() and not force:
-                # Verificar se precisa atualizar
-                blob = self.bucket.blob(remote_path)
-                if blob.exists():
-                    # Recarregar propriedades do blob para obter o MD5
-                    blob.reload()
-                    
-                    # Comparar hash MD5
-                    local_md5 = self._calculate_md5(local_file)
-                    remote_md5 = blob.md5_hash
-                    
-                    if local_md5 == remote_md5:
-                        # Arquivo já está atualizado no cache
-                        return (str(local_file), 'cached')
-            
-            # Download do arquivo
-            blob = self.bucket.blob(remote_path)
-            if not blob.exists():
-                if verbose:
-                    print(f"❌ Arquivo não encontrado no Firebase: {remote_path}")
+            # Metadados remotos: da listagem, ou uma requisição (None se não existe)
+            if md5_hash is not None:
+                remoto = {'md5_hash': md5_hash, 'size': tamanho}
+            else:
+                with self.agendador.reservar(prioridade):
+                    remoto = self.backend.stat(remote_path)
+            if remoto is None:
+                logger.log(logging.WARNING if verbose else logging.DEBUG,
+                           "❌ Arquivo não encontrado no Firebase: %s", remote_path)
                 return None
             
-            blob.download_to_filename(str(local_file))
-            if verbose:
-                print(f"⬇️ Baixado: {os.path.basename(remote_path)}")
+            # Verificar se já existe no cache
+            if not force and self._cache_em_dia(nome, local_file, remoto['md5_hash']):
+                metrics.contar("firebase.cache_hit")
+                return (str(local_file), 'cached')
+            
+            # Uma instância baixa por vez; quem esperou a trava confere se a
+            # outra já deixou a cópia pronta antes de baixar de novo
+            with self.manifesto.trava(nome):
+                if not force and self.manifesto.confere(nome, local_file, remoto['md5_hash']):
+                    metrics.contar("cache.download_compartilhado")
+                    return (str(local_file), 'cached')
+                
+                with self.agendador.reservar(prioridade, remoto['size'] or 0):
+                    impressao = self._baixar_para_cache(remote_path, local_file)
+                self.manifesto.registrar(nome, local_file, remoto['md5_hash'], impressao=impressao)
+            metrics.contar("firebase.downloads")
+            metrics.contar("firebase.bytes_baixados", remoto['size'] or 0)
+            logger.log(logging.INFO if verbose else logging.DEBUG,
+                       "⬇️ Baixado: %s", remote_path)
             return (str(local_file), 'downloaded')
             
         except Exception as e:
-            if verbose:
-                print(f"❌ Erro ao baixar {remote_path}: {e}")
+            metrics.contar("firebase.erros")
+            logger.log(logging.ERROR if verbose else logging.DEBUG,
+                       "❌ Erro ao baixar %s: %s", remote_path, e)
             return None
     
-    def upload_file(self, local_path: str, remote_path: str = None) -> bool:
+    def _cache_em_dia(self, nome: str, local_file: Path, md5_remoto: Optional[str]) -> bool:
+        """
+        Cópia no cache igual à remota, calculando o md5 só em último caso
+        
+        Ordem: stat igual ao do manifesto; impressão rápida igual (cópia só
+        tocada); md5 (cópia de antes do manifesto ou conteúdo mudou).
+        """
+        if not local_file.exists():
+            return False
+        if self.manifesto.confere(nome, local_file, md5_remoto):
+            return True
+        
+        entrada = self.manifesto.obter(nome)
+        if entrada and entrada.get('md5') == md5_remoto and \
+                entrada.get('impressao', '').startswith(fingerprint.ALGORITMO + ':') and \
+                entrada.get('tamanho') == local_file.stat().st_size and \
+                fingerprint.impressao(local_file) == entrada['impressao']:
+            metrics.contar("hash.atalho_impressao")
+            self.manifesto.atualizar_stat(nome, local_file)
+            return True
+        
+        local_md5, impressao = self._calcular_hashes(local_file)
+        if local_md5 != md5_remoto:
+            return False
+        # Cópia de antes do manifesto: registra para não recalcular
+        self.manifesto.registrar(nome, local_file, md5_remoto, verificado=True, impressao=impressao)
+        return True
+    
+    def _baixar_para_cache(self, remote_path: str, local_file: Path) -> str:
+        """
+        Baixa para um temporário na mesma pasta e troca de uma vez (os.replace)
+        
+        Outra instância lendo o cache nunca vê um DWG pela metade.
+        
+        Returns:
+            Impressão rápida do arquivo baixado (lido ainda no cache do sistema)
+        """
+        local_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, temporario = tempfile.mkstemp(dir=local_file.parent, prefix=local_file.name, suffix=".part")
+        os.close(fd)
+        try:
+            self.backend.download(remote_path, temporario)
+            impressao = fingerprint.impressao(temporario)
+            os.replace(temporario, local_file)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+        return impressao
+    
+    def upload_file(self, local_path: str, remote_path: str = None,
+                    prioridade: int = INTERATIVO) -> bool:
         """
         Faz upload de arquivo local para Firebase
         
         Args:
             local_path: Caminho do arquivo local
             remote_path: Caminho destino no Firebase (opcional, usa CONTROLE/nome.dwg)
+            prioridade: Classe no agendador de transferências
         
         Returns:
             True se sucesso, False se falhar
@@ -207,7 +539,7 @@ class FirebaseSync:
         
         try:
             if not os.path.exists(local_path):
-                print(f"❌ Arquivo local não encontrado: {local_path}")
+                logger.error("❌ Arquivo local não encontrado: %s", local_path)
                 return False
             
             # Definir caminho remoto
@@ -215,159 +547,361 @@ class FirebaseSync:
                 remote_path = f"CONTROLE/{os.path.basename(local_path)}"
             
             # Upload
-            blob = self.bucket.blob(remote_path)
-            blob.upload_from_filename(local_path)
-            print(f"✓ Upload: {os.path.basename(local_path)} → {remote_path}")
+            with self.agendador.reservar(prioridade, os.path.getsize(local_path)), \
+                    metrics.medir("firebase.enviar"):
+                self.backend.upload(local_path, remote_path)
+            metrics.contar("firebase.uploads")
+            logger.debug("✓ Upload: %s → %s", local_path, remote_path)
+            return True
+            
+        except Exception as e:
+            metrics.contar("firebase.erros")
+            logger.error("❌ Erro ao fazer upload de %s: %s", local_path, e)
+            return False
+    
+    def copy_file(self, remote_path: str, new_remote_path: str,
+                  prioridade: int = INTERATIVO, md5_origem: Optional[str] = None) -> bool:
+        """
+        Copia um arquivo para outro caminho no próprio Firebase (sem upload)
+        
+        Args:
+            remote_path: Arquivo existente no Firebase
+            new_remote_path: Caminho da cópia
+            prioridade: Classe no agendador de transferências
+            md5_origem: Se informado, só copia se a origem ainda tiver este
+                md5 (base64); senão a cópia falha
+        
+        Returns:
+            True se sucesso, False se falhar
+        """
+        if not self.initialized:
+            return False
+        
+        try:
+            with self.agendador.reservar(prioridade), metrics.medir("firebase.copiar"):
+                self.backend.copy(remote_path, new_remote_path, md5_origem)
+            metrics.contar("firebase.copias")
+            logger.debug("✓ Cópia no servidor: %s → %s", remote_path, new_remote_path)
             return True
             
+        except OrigemAlterada as e:
+            logger.debug("⚠ Cópia cancelada: %s", e)
+            return False
         except Exception as e:
-            print(f"❌ Erro ao fazer upload de {local_path}: {e}")
+            metrics.contar("firebase.erros")
+            logger.error("❌ Erro ao copiar %s no Firebase: %s", remote_path, e)
             return False
     
     def sync_folder(self, local_folder: str, remote_prefix: str = "CONTROLE/") -> Dict[str, int]:
         """
         Sincroniza pasta local com Firebase (upload de novos/modificados)
         
+        Arquivos cujo conteúdo já existe na nuvem com outro nome (projeto
+        salvo com nome novo) são copiados no servidor em vez de enviados.
+        
         Args:
             local_folder: Pasta local com arquivos DWG
             remote_prefix: Prefixo no Firebase
         
         Returns:
-            Dict com estatísticas: {'uploaded': n, 'skipped': n, 'failed': n}
+            Dict com estatísticas: {'uploaded': n, 'copied': n, 'skipped': n,
+            'failed': n, 'bytes_saved': n} (bytes_saved = não enviados por
+            causa das cópias no servidor)
         """
-        stats = {'uploaded': 0, 'skipped': 0, 'failed': 0}
+        stats = {'uploaded': 0, 'copied': 0, 'skipped': 0, 'failed': 0, 'bytes_saved': 0}
         
         if not os.path.exists(local_folder):
-            print(f"❌ Pasta não encontrada: {local_folder}")
+            logger.error("❌ Pasta não encontrada: %s", local_folder)
             return stats
         
-        print(f"\n🔄 Sincronizando pasta: {local_folder}")
-        print(f"   Destino Firebase: {remote_prefix}")
+        logger.info("🔄 Sincronizando pasta: %s → %s", local_folder, remote_prefix)
+        inicio = time.perf_counter()
         
-        # Listar arquivos locais
-        local_files = [f for f in os.listdir(local_folder) 
-                      if f.lower().endswith('.dwg')]
+        # Listar arquivos locais (recursivo, caminhos relativos com '/')
+        local_files = varrer_pasta(local_folder)
+        # md5 da última vez para arquivos que não mudaram (ver fingerprint.py)
+        estado = fingerprint.EstadoArquivos(self._arquivo_estado(local_folder))
         
-        # Listar arquivos remotos
-        remote_files = {f['nome']: f for f in self.list_files(remote_prefix)}
+        # Listar arquivos remotos (só nome e md5 são necessários)
+        remote_files = {f.nome: f for f in self.list_files(remote_prefix, campos=('name', 'md5_hash'),
+                                                           prioridade=SEGUNDO_PLANO)}
+        # Conteúdo já presente na nuvem: caminho remoto -> md5 e md5 -> caminhos
+        md5_remoto = {f.caminho: f.md5_hash for f in remote_files.values() if f.md5_hash}
+        por_md5: Dict[str, List[str]] = {}
+        for caminho, md5 in md5_remoto.items():
+            por_md5.setdefault(md5, []).append(caminho)
         
         for filename in local_files:
             local_path = os.path.join(local_folder, filename)
             remote_path = f"{remote_prefix}{filename}"
             
-            # Verificar se precisa upload
-            needs_upload = True
-            if filename in remote_files:
-                local_md5 = self._calculate_md5(local_path)
-                if local_md5 == remote_files[filename]['md5_hash']:
-                    needs_upload = False
-                    stats['skipped'] += 1
-                    print(f"⊘ Igual: {filename}")
+            # Verificar se precisa upload (md5 também serve para achar cópias)
+            local_md5 = estado.md5(filename, local_path, self._calcular_hashes)
+            if filename in remote_files and local_md5 == remote_files[filename].md5_hash:
+                stats['skipped'] += 1
+                logger.debug("⊘ Igual: %s", filename)
+                continue
             
-            if needs_upload:
-                if self.upload_file(local_path, remote_path):
-                    stats['uploaded'] += 1
-                else:
-                    stats['failed'] += 1
-        
-        print(f"\n✓ Sincronização completa:")
-        print(f"  • {stats['uploaded']} enviados")
-        print(f"  • {stats['skipped']} já atualizados")
-        print(f"  • {stats['failed']} falharam")
+            # remote_path vai ser sobrescrito: o conteúdo antigo deixa de ser
+            # origem de cópias (senão uma cópia posterior levaria o novo)
+            md5_antigo = md5_remoto.pop(remote_path, None)
+            if md5_antigo:
+                por_md5[md5_antigo].remove(remote_path)
+            
+            # A cópia confere o md5 da origem no servidor; se mudou, envia
+            origem = next(iter(por_md5.get(local_md5, ())), None)
+            if origem and self.copy_file(origem, remote_path, SEGUNDO_PLANO, md5_origem=local_md5):
+                stats['copied'] += 1
+                stats['bytes_saved'] += os.path.getsize(local_path)
+                logger.debug("⧉ Copiado no servidor: %s → %s", origem, remote_path)
+            elif self.upload_file(local_path, remote_path, SEGUNDO_PLANO):
+                stats['uploaded'] += 1
+            else:
+                stats['failed'] += 1
+                continue
+            # Arquivos repetidos mais adiante nesta mesma rodada também viram cópia
+            md5_remoto[remote_path] = local_md5
+            por_md5.setdefault(local_md5, []).append(remote_path)
+        
+        estado.esquecer_ausentes(local_files)
+        estado.salvar()
+        logger.info("✓ Sincronização completa em %.1f s: %d enviados, %d copiados no servidor "
+                    "(%.1f MB não enviados), %d já atualizados, %d falharam",
+                    time.perf_counter() - inicio, stats['uploaded'], stats['copied'],
+                    stats['bytes_saved'] / (1024 * 1024), stats['skipped'], stats['failed'])
         
         return stats
     
-    def download_all(self, force: bool = False) -> Dict[str, int]:
+    def download_all(self, force: bool = False, prioridade: int = SEGUNDO_PLANO
+                     ) -> Tuple[Dict[str, int], Mudancas]:
         """
         Baixa todos os arquivos DWG do Firebase para cache local
         
+        Cada arquivo passa pelo agendador: cópias pedidas pelo usuário
+        furam a fila entre um arquivo e outro. Execuções simultâneas (F5,
+        sincronização automática) esperam uma pela outra, e cada uma devolve
+        as mudanças em relação à anterior: aplicadas em ordem, não se perde
+        nenhuma.
+        
         Args:
             force: Forçar download de todos (ignorar cache)
+            prioridade: Classe no agendador de transferências
         
         Returns:
-            Dicionário com estatísticas: {'downloaded': n, 'cached': n, 'failed': n}
+            Tupla (estatísticas, mudanças): {'downloaded': n, 'cached': n,
+            'failed': n} e Mudancas (vazia se a listagem falhou)
         """
-        arquivos = self.list_files()
+        with self._trava_download:
+            return self._download_all(force, prioridade)
+    
+    def _download_all(self, force: bool, prioridade: int) -> Tuple[Dict[str, int], Mudancas]:
+        """Implementação de download_all (chamar com _trava_download)"""
+        inicio = time.perf_counter()
+        # md5 e tamanho vêm na listagem: download_file não consulta cada arquivo
+        anteriores = self._base_mudancas
+        arquivos = self._listar(PREFIXO_LISTAGEM, ('name', 'size', 'md5_hash'), prioridade)
         stats = {'downloaded': 0, 'cached': 0, 'failed': 0}
+        modificados = []
         
-        print(f"\n🔍 Verificando {len(arquivos)} arquivos...")
+        logger.debug("🔍 Verificando %d arquivos...", len(arquivos or ()))
         
-        for arquivo in arquivos:
-            result = self.download_file(arquivo['caminho'], force, verbose=False)
+        for arquivo in arquivos or ():
+            result = self.download_file(arquivo.caminho, force, verbose=False, prioridade=prioridade,
+                                        md5_hash=arquivo.md5_hash, tamanho=arquivo.tamanho)
             if result:
                 path, status = result
                 if status == 'downloaded':
                     stats['downloaded'] += 1
-                    print(f"  ⬇️ {arquivo['nome']}")
+                    if anteriores is not None and arquivo.nome in anteriores:
+                        modificados.append(arquivo.nome)
                 elif status == 'cached':
                     stats['cached'] += 1
             else:
                 stats['failed'] += 1
+                logger.debug("✗ Falhou: %s", arquivo.caminho)
         
-        # Mensagem resumida
-        print()
+        # Uma linha por operação (detalhes por arquivo só em DEBUG)
+        duracao = time.perf_counter() - inicio
         if stats['downloaded'] > 0:
-            print(f"✓ {stats['downloaded']} novos baixados, {stats['cached']} já estavam atualizados")
+            logger.info("✓ %d novos baixados, %d já estavam atualizados (%.1f s)",
+                        stats['downloaded'], stats['cached'], duracao)
         else:
-            print(f"✓ Todos os {stats['cached']} arquivos já estão atualizados no cache")
+            logger.info("✓ Todos os %d arquivos já estão atualizados no cache (%.1f s)",
+                        stats['cached'], duracao)
         
         if stats['failed'] > 0:
-            print(f"⚠ {stats['failed']} falharam")
+            logger.warning("⚠ %d falharam", stats['failed'])
         
-        return stats
+        if arquivos is None:
+            return stats, Mudancas(PREFIXO_LISTAGEM)
+        
+        # Sem referência (primeira listagem), tudo é novo
+        atuais = {arq.nome for arq in arquivos}
+        anteriores = anteriores if anteriores is not None else set()
+        mudancas = Mudancas(PREFIXO_LISTAGEM, sorted(atuais - anteriores),
+                            sorted(anteriores - atuais), modificados)
+        self._base_mudancas = atuais
+        if mudancas:
+            logger.debug("Mudanças desde a última listagem: %r", mudancas)
+        
+        return stats, mudancas
     
-    def start_auto_sync(self, interval: int = 300):
+    def start_auto_sync(self, interval: int = 300, minimo: float = None, maximo: float = None,
+                        ao_mudar: Callable[[Dict[str, int], Mudancas], None] = None):
         """
         Inicia sincronização automática em background
         
+        O intervalo se adapta: cai pela metade quando a sincronização traz
+        mudanças (até minimo) e cresce 50% quando nada muda (até maximo).
+        Em erro (Firebase fora do ar), recua exponencialmente a partir de
+        interval, com jitter. A primeira sincronização acontece após o
+        primeiro intervalo.
+        
         Args:
-            interval: Intervalo em segundos (padrão: 300 = 5 min)
+            interval: Intervalo inicial em segundos (padrão: 300 = 5 min)
+            minimo: Menor intervalo (padrão: interval / 5)
+            maximo: Maior intervalo, também teto do recuo (padrão: interval * 6)
+            ao_mudar: Chamado (na thread de sincronização) com as estatísticas
+                de download_all e as Mudancas quando algo mudou
         """
         if self.sync_thread and self.sync_thread.is_alive():
-            print("⚠️ Sincronização automática já está rodando")
+            logger.warning("⚠️ Sincronização automática já está rodando")
             return
         
+        minimo = minimo or max(1.0, interval / 5)
+        maximo = maximo or interval * 6
         self.running = True
+        self._acordar.clear()
         self.sync_thread = threading.Thread(
             target=self._auto_sync_loop,
-            args=(interval,),
+            args=(interval, minimo, maximo, ao_mudar),
             daemon=True
         )
         self.sync_thread.start()
-        print(f"✓ Sincronização automática iniciada (intervalo: {interval}s)")
+        logger.info("✓ Sincronização automática iniciada (intervalo: %ds, entre %ds e %ds)",
+                    interval, minimo, maximo)
     
     def stop_auto_sync(self):
         """Para sincronização automática"""
         self.running = False
+        self._acordar.set()
+        self._retomado.set()
         if self.sync_thread:
             self.sync_thread.join(timeout=5)
-        print("✓ Sincronização automática parada")
+        logger.info("✓ Sincronização automática parada")
+    
+    def pausar_auto_sync(self):
+        """Suspende a sincronização automática (ex.: janela minimizada)"""
+        if self._retomado.is_set():
+            self._retomado.clear()
+            logger.debug("⏸ Sincronização automática pausada")
+    
+    def retomar_auto_sync(self):
+        """Retoma a sincronização automática; sincroniza já se o intervalo venceu"""
+        if not self._retomado.is_set():
+            self._retomado.set()
+            logger.debug("▶ Sincronização automática retomada")
     
-    def _auto_sync_loop(self, interval: int):
+    def _sincronizar_uma_vez(self) -> Tuple[Dict[str, int], Mudancas]:
+        """
+        Uma rodada de download_all
+        
+        Returns:
+            (estatísticas, mudanças)
+        
+        Raises:
+            ConnectionError: se a listagem falhou ou nenhum arquivo pôde ser verificado
+        """
+        stats, mudancas = self.download_all()
+        if self.online is False:
+            raise ConnectionError("listagem do Firebase Storage falhou")
+        if stats['failed'] and not (stats['downloaded'] or stats['cached']):
+            raise ConnectionError(f"{stats['failed']} downloads falharam")
+        return stats, mudancas
+    
+    def _auto_sync_loop(self, interval: float, minimo: float, maximo: float,
+                        ao_mudar: Optional[Callable[[Dict[str, int], Mudancas], None]]):
         """Loop de sincronização automática (interno)"""
+        self.intervalo_atual = intervalo = float(interval)
+        falhas = 0
+        espera = intervalo * random.uniform(1 - JITTER, 1 + JITTER)
+        
         while self.running:
+            # Espera interrompível (parar). Pausado, não sincroniza; ao retomar,
+            # sincroniza logo se o prazo já venceu
+            prazo = time.monotonic() + espera
+            while self.running:
+                if not self._retomado.is_set():
+                    self._retomado.wait()
+                    continue
+                restante = prazo - time.monotonic()
+                if restante <= 0:
+                    break
+                # Acorda a cada 5 s para perceber uma pausa iniciada no meio da espera
+                self._acordar.wait(min(restante, 5))
+            if not self.running:
+                break
+            
             try:
-                print(f"\n🔄 Sincronização automática: {datetime.now().strftime('%H:%M:%S')}")
-                self.download_all()
+                logger.info("🔄 Sincronização automática: %s", datetime.now().strftime('%H:%M:%S'))
+                stats, mudancas = self._sincronizar_uma_vez()
             except Exception as e:
-                print(f"❌ Erro na sincronização automática: {e}")
+                falhas += 1
+                # Recuo exponencial com jitter: uniforme entre interval/2 e o teto
+                teto = min(maximo, interval * 2 ** falhas)
+                espera = random.uniform(interval / 2, teto)
+                metrics.contar("sync.falhas")
+                logger.error("❌ Erro na sincronização automática (%d seguida(s)): %s; "
+                             "nova tentativa em %.0f s", falhas, e, espera)
+                continue
             
-            # Aguardar intervalo
-            for _ in range(interval):
-                if not self.running:
-                    break
-                time.sleep(1)
+            falhas = 0
+            mudou = bool(mudancas)
+            fator = FATOR_COM_MUDANCA if mudou else FATOR_SEM_MUDANCA
+            intervalo = min(maximo, max(minimo, intervalo * fator))
+            self.intervalo_atual = intervalo
+            espera = intervalo * random.uniform(1 - JITTER, 1 + JITTER)
+            metrics.contar("sync.rodadas")
+            logger.debug("Próxima sincronização em %.0f s (%s)", espera,
+                         "houve mudanças" if mudou else "sem mudanças")
+            
+            if mudou and ao_mudar:
+                try:
+                    ao_mudar(stats, mudancas)
+                except Exception as e:
+                    logger.error("❌ Erro ao aplicar mudanças da sincronização: %s", e)
     
     def _calculate_md5(self, file_path: str) -> str:
         """Calcula hash MD5 de um arquivo no formato base64 (compatível com Firebase)"""
         import base64
         hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
+        with metrics.medir("hash.md5"), open(file_path, "rb") as f:
             for chunk in iter(lambda: f.read(4096), b""):
                 hash_md5.update(chunk)
+        metrics.contar("hash.arquivos")
         # Retornar em base64 para comparar com Firebase
         return base64.b64encode(hash_md5.digest()).decode('utf-8')
     
+    def _calcular_hashes(self, file_path) -> Tuple[str, str]:
+        """md5 (base64) e impressão rápida numa leitura só (ver fingerprint.calcular)"""
+        return fingerprint.calcular(file_path)
+    
+    def _arquivo_estado(self, pasta: str) -> str:
+        """Estado de hashes de uma pasta local, guardado na pasta do cache"""
+        chave = hashlib.sha1(os.path.abspath(pasta).encode('utf-8')).hexdigest()[:12]
+        return str(self.cache_dir / f".estado_{chave}.json")
+    
+    def caminho_cache(self, remote_path: str, prefix: str = "CONTROLE/") -> Path:
+        """
+        Caminho no cache para um arquivo remoto
+        
+        Subpastas abaixo do prefixo são preservadas, evitando colisão entre
+        arquivos de mesmo nome em pastas diferentes. Arquivos na raiz do
+        prefixo continuam no mesmo lugar de antes.
+        """
+        relativo = remote_path[len(prefix):] if remote_path.startswith(prefix) else remote_path
+        return self.cache_dir.joinpath(*relativo.split('/'))
+    
     def get_cache_path(self, filename: str) -> str:
         """Retorna caminho no cache para um arquivo"""
         return str(self.cache_dir / filename)
@@ -378,13 +912,15 @@ class FirebaseSync:
             import shutil
             shutil.rmtree(self.cache_dir)
             self.cache_dir.mkdir(parents=True, exist_ok=True)
-            print("✓ Cache limpo")
+            logger.info("✓ Cache limpo")
         except Exception as e:
-            print(f"❌ Erro ao limpar cache: {e}")
+            logger.error("❌ Erro ao limpar cache: %s", e)
 
 
 # Função auxiliar para teste
 if __name__ == "__main__":
+    from log_config import configurar_logging
+    configurar_logging()
     print("🔥 Teste do Firebase Sync\n")
     
     try:
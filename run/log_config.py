@@ -0,0 +1,83 @@
+"""
+Configuração de logging do Banco de Projetos
+
+Este módulo gerencia:
+- Handler em fila (QueueHandler): quem registra não espera o disco/console
+- Thread de escrita (QueueListener) para arquivo rotativo e console
+- Níveis por configuração (app_config.json: "nivel_log")
+
+Os módulos usam logging.getLogger(__name__) normalmente; sem chamar
+configurar_logging, só avisos e erros aparecem (padrão do logging).
+No executável --windowed não há console (sys.stderr é None): apenas o
+arquivo é usado.
+"""
+
+import os
+import sys
+import queue
+import atexit
+import logging
+import logging.handlers
+from typing import Optional
+
+FORMATO_ARQUIVO = "%(asctime)s %(levelname)-7s [%(threadName)s] %(name)s: %(message)s"
+FORMATO_CONSOLE = "%(message)s"
+TAMANHO_MAXIMO = 1024 * 1024  # 1 MB por arquivo
+ARQUIVOS_ROTACAO = 5
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configurar_logging(pasta: Optional[str] = None, nivel: str = "INFO",
+                       console: bool = True) -> logging.handlers.QueueListener:
+    """
+    Direciona o logging para uma fila atendida por uma thread de escrita
+
+    Chamadas seguintes retornam o listener já ativo.
+
+    Args:
+        pasta: Pasta dos arquivos de log (None = sem arquivo)
+        nivel: Nível mínimo (DEBUG, INFO, WARNING, ERROR)
+        console: Também escrever em stderr (se existir)
+
+    Returns:
+        QueueListener em execução (parado automaticamente ao sair)
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    destinos = []
+    if pasta:
+        try:
+            os.makedirs(pasta, exist_ok=True)
+            arquivo = logging.handlers.RotatingFileHandler(
+                os.path.join(pasta, "banco_projetos.log"),
+                maxBytes=TAMANHO_MAXIMO, backupCount=ARQUIVOS_ROTACAO, encoding="utf-8"
+            )
+            arquivo.setFormatter(logging.Formatter(FORMATO_ARQUIVO))
+            destinos.append(arquivo)
+        except OSError as e:
+            print(f"⚠️ Log em arquivo indisponível ({e})", file=sys.stderr)
+    if console and sys.stderr is not None:
+        tela = logging.StreamHandler(sys.stderr)
+        tela.setFormatter(logging.Formatter(FORMATO_CONSOLE))
+        destinos.append(tela)
+
+    fila = queue.SimpleQueue()
+    raiz = logging.getLogger()
+    raiz.setLevel(getattr(logging, str(nivel).upper(), logging.INFO))
+    raiz.addHandler(logging.handlers.QueueHandler(fila))
+
+    _listener = logging.handlers.QueueListener(fila, *destinos, respect_handler_level=True)
+    _listener.start()
+    atexit.register(encerrar_logging)
+    return _listener
+
+
+def encerrar_logging():
+    """Esvazia a fila e para a thread de escrita"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
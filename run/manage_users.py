@@ -3,16 +3,117 @@
 Script de gerenciamento de usuários para Banco de Projetos DWG
 
 Use este script para gerenciar usuários sem precisar da interface gráfica.
+
+Uso:
+    python manage_users.py                                # menu interativo
+    python manage_users.py importar usuarios.csv          # cadastro em lote
+    python manage_users.py importar usuarios.json --atualizar
+    python manage_users.py exportar backup_usuarios.json
+
+CSV com cabeçalho: username,password,nome,tipo (ou password_hash no lugar
+de password, como gerado por "exportar"). JSON: lista desses registros ou
+um users.json.
 """
 
+import os
 import sys
+import csv
+import json
 import getpass
+import argparse
+import tempfile
+from typing import Dict, List
+
 from auth import AuthManager
 
+COLUNAS_LOTE = ["username", "password", "password_hash", "nome", "tipo"]
+
+
+def ler_lote(caminho: str) -> List[Dict]:
+    """Lê registros de usuário de um arquivo CSV ou JSON"""
+    if caminho.lower().endswith(".json"):
+        with open(caminho, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+        if isinstance(dados, dict):
+            # Formato do users.json: {"users": {nome: {...}}}
+            return [{"username": username, **info} for username, info in dados.get("users", {}).items()]
+        return dados
+    
+    # utf-8-sig: aceita o BOM que o Excel grava
+    with open(caminho, "r", encoding="utf-8-sig", newline="") as f:
+        return list(csv.DictReader(f))
 
-def main():
+
+def gravar_lote(caminho: str, registros: List[Dict]):
+    """Grava registros em CSV ou JSON de uma vez (arquivo só legível pelo dono)"""
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    fd, temporario = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            if caminho.lower().endswith(".json"):
+                json.dump(registros, f, indent=2, ensure_ascii=False)
+            else:
+                escritor = csv.DictWriter(f, fieldnames=COLUNAS_LOTE, extrasaction="ignore")
+                escritor.writeheader()
+                escritor.writerows(registros)
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+
+def importar(auth, caminho: str, atualizar: bool = False) -> bool:
+    """Importa usuários de um arquivo em uma única transação"""
+    try:
+        registros = ler_lote(caminho)
+        print(f"⏳ Importando {len(registros)} registros de {caminho}...")
+        stats = auth.import_users(registros, atualizar=atualizar)
+    except (OSError, ValueError, TimeoutError) as e:
+        print(f"❌ Importação cancelada, nenhum usuário alterado: {e}")
+        return False
+    print(f"✓ {stats['added']} adicionados, {stats['updated']} atualizados, "
+          f"{stats['skipped']} já existiam")
+    return True
+
+
+def exportar(auth, caminho: str) -> bool:
+    """Exporta usuários (com hash da senha) para CSV ou JSON"""
+    try:
+        registros = auth.export_users()
+        gravar_lote(caminho, registros)
+    except (OSError, TimeoutError) as e:
+        print(f"❌ Erro ao exportar: {e}")
+        return False
+    print(f"✓ {len(registros)} usuários exportados para {caminho}")
+    print("⚠️ O arquivo contém os hashes das senhas: guarde-o com cuidado.")
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gerenciamento de usuários do Banco de Projetos")
+    sub = parser.add_subparsers(dest="comando")
+    p_importar = sub.add_parser("importar", help="Cadastrar usuários de um CSV/JSON")
+    p_importar.add_argument("arquivo")
+    p_importar.add_argument("--atualizar", action="store_true",
+                            help="Atualizar senha/nome/tipo de usuários existentes")
+    p_exportar = sub.add_parser("exportar", help="Exportar usuários para CSV/JSON")
+    p_exportar.add_argument("arquivo")
+    args = parser.parse_args(argv)
+    
     auth = AuthManager()
     
+    if args.comando == "importar":
+        return 0 if importar(auth, args.arquivo, args.atualizar) else 1
+    if args.comando == "exportar":
+        return 0 if exportar(auth, args.arquivo) else 1
+    
+    menu(auth)
+    return 0
+
+
+def menu(auth):
+    """Menu interativo"""
+    
     print("=" * 60)
     print("🔐 GERENCIAMENTO DE USUÁRIOS - Banco de Projetos DWG")
     print("=" * 60)
@@ -23,9 +124,11 @@ def main():
         print("  2. Adicionar usuário")
         print("  3. Alterar senha")
         print("  4. Testar login")
-        print("  5. Sair")
+        print("  5. Importar em lote (CSV/JSON)")
+        print("  6. Exportar usuários")
+        print("  7. Sair")
         
-        escolha = input("\nEscolha uma opção (1-5): ").strip()
+        escolha = input("\nEscolha uma opção (1-7): ").strip()
         
         if escolha == "1":
             listar_usuarios(auth)
@@ -36,6 +139,15 @@ def main():
         elif escolha == "4":
             testar_login(auth)
         elif escolha == "5":
+            caminho = input("Arquivo (.csv ou .json): ").strip()
+            atualizar = input("Atualizar usuários existentes? (s/N): ").strip().lower() == "s"
+            if caminho:
+                importar(auth, caminho, atualizar)
+        elif escolha == "6":
+            caminho = input("Arquivo de destino (.csv ou .json): ").strip()
+            if caminho:
+                exportar(auth, caminho)
+        elif escolha == "7":
             print("\n✓ Até logo!")
             break
         else:
@@ -143,7 +255,7 @@ def testar_login(auth):
 
 if __name__ == "__main__":
     try:
-        main()
+        sys.exit(main())
     except KeyboardInterrupt:
         print("\n\n✓ Operação cancelada pelo usuário.")
         sys.exit(0)
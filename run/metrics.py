@@ -0,0 +1,220 @@
+"""
+Métricas de desempenho em processo
+
+Este módulo gerencia:
+- Contadores (ex: downloads, acertos de cache, bytes)
+- Histogramas de duração em ms (listar, baixar, hash, busca, renderização, cópia)
+- Exportação para JSON (janela de diagnóstico e suporte)
+- Captura opcional de perfil (cProfile ou amostragem), ligada pelo app_config.json
+
+Uso:
+    import metrics
+
+    with metrics.medir("firebase.baixar"):
+        ...
+    metrics.contar("firebase.cache_hit")
+    metrics.salvar_json("diagnostico.json")
+"""
+
+import os
+import sys
+import json
+import time
+import bisect
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+
+# Limites superiores (ms) das faixas do histograma; a última é "acima de"
+FAIXAS_MS = (0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Amostras recentes guardadas por histograma (para p50/p95)
+AMOSTRAS_RECENTES = 1000
+
+
+class Histograma:
+    """Distribuição de durações em ms (faixas fixas + amostras recentes)"""
+
+    __slots__ = ("contagem", "soma", "minimo", "maximo", "faixas", "recentes")
+
+    def __init__(self):
+        self.contagem = 0
+        self.soma = 0.0
+        self.minimo = None
+        self.maximo = None
+        self.faixas = [0] * (len(FAIXAS_MS) + 1)
+        self.recentes = deque(maxlen=AMOSTRAS_RECENTES)
+
+    def registrar(self, ms: float):
+        self.contagem += 1
+        self.soma += ms
+        self.minimo = ms if self.minimo is None else min(self.minimo, ms)
+        self.maximo = ms if self.maximo is None else max(self.maximo, ms)
+        self.faixas[bisect.bisect_left(FAIXAS_MS, ms)] += 1
+        self.recentes.append(ms)
+
+    def resumo(self) -> Dict:
+        ordenadas = sorted(self.recentes)
+
+        def percentil(p):
+            if not ordenadas:
+                return 0.0
+            return ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))]
+
+        return {
+            "contagem": self.contagem,
+            "total_ms": round(self.soma, 3),
+            "media_ms": round(self.soma / self.contagem, 3) if self.contagem else 0.0,
+            "min_ms": round(self.minimo or 0.0, 3),
+            "p50_ms": round(percentil(0.50), 3),
+            "p95_ms": round(percentil(0.95), 3),
+            "max_ms": round(self.maximo or 0.0, 3),
+            "faixas": {
+                (f"<={limite}" if i < len(FAIXAS_MS) else f">{FAIXAS_MS[-1]}"): n
+                for i, (limite, n) in enumerate(zip(FAIXAS_MS + (None,), self.faixas)) if n
+            },
+        }
+
+
+class Metricas:
+    """Registro de contadores e histogramas, seguro entre threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.inicio = time.time()
+        self.contadores: Dict[str, float] = {}
+        self.histogramas: Dict[str, Histograma] = {}
+
+    def contar(self, nome: str, valor: float = 1):
+        """Soma `valor` ao contador"""
+        with self._lock:
+            self.contadores[nome] = self.contadores.get(nome, 0) + valor
+
+    def registrar(self, nome: str, ms: float):
+        """Adiciona uma duração (ms) ao histograma"""
+        with self._lock:
+            histograma = self.histogramas.get(nome)
+            if histograma is None:
+                histograma = self.histogramas[nome] = Histograma()
+            histograma.registrar(ms)
+
+    @contextmanager
+    def medir(self, nome: str):
+        """Mede o bloco e registra no histograma `nome` (também em caso de erro)"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nome, (time.perf_counter() - inicio) * 1000)
+
+    def zerar(self):
+        """Descarta todos os valores"""
+        with self._lock:
+            self.inicio = time.time()
+            self.contadores = {}
+            self.histogramas = {}
+
+    def snapshot(self) -> Dict:
+        """Cópia serializável do estado atual"""
+        with self._lock:
+            return {
+                "gerado_em": datetime.now().isoformat(timespec="seconds"),
+                "desde": datetime.fromtimestamp(self.inicio).isoformat(timespec="seconds"),
+                "pid": os.getpid(),
+                "contadores": dict(sorted(self.contadores.items())),
+                "histogramas": {nome: h.resumo() for nome, h in sorted(self.histogramas.items())},
+            }
+
+
+METRICAS = Metricas()
+contar = METRICAS.contar
+registrar = METRICAS.registrar
+medir = METRICAS.medir
+snapshot = METRICAS.snapshot
+zerar = METRICAS.zerar
+
+
+def salvar_json(caminho: str) -> str:
+    """Grava o snapshot das métricas em JSON e retorna o caminho"""
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    os.makedirs(pasta, exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2, ensure_ascii=False)
+    return caminho
+
+
+# ======= CAPTURA DE PERFIL =======
+
+class Perfilador:
+    """
+    Captura de perfil opcional
+
+    Modos:
+        "cprofile"    cProfile na thread principal (Tk); grava .prof (pstats/snakeviz)
+        "amostragem"  amostra as pilhas de todas as threads a cada `intervalo`
+                      segundos; grava pilhas agregadas no formato "collapsed"
+                      (uma linha por pilha, compatível com flamegraph.pl/speedscope)
+    """
+
+    MODOS = ("cprofile", "amostragem")
+
+    def __init__(self, modo: str, pasta_saida: str, intervalo: float = 0.005):
+        if modo not in self.MODOS:
+            raise ValueError(f"Modo de perfil desconhecido: {modo}")
+        self.modo = modo
+        self.pasta_saida = pasta_saida
+        self.intervalo = intervalo
+        self._perfil = None
+        self._pilhas = Counter()
+        self._rodando = False
+        self._thread = None
+
+    def iniciar(self):
+        self._rodando = True
+        if self.modo == "cprofile":
+            import cProfile
+            self._perfil = cProfile.Profile()
+            self._perfil.enable()
+        else:
+            self._thread = threading.Thread(target=self._amostrar, daemon=True)
+            self._thread.start()
+
+    def _amostrar(self):
+        propria = threading.get_ident()
+        nomes = {}
+        while self._rodando:
+            nomes.update({t.ident: t.name for t in threading.enumerate()})
+            for ident, frame in sys._current_frames().items():
+                if ident == propria:
+                    continue
+                pilha = []
+                while frame is not None:
+                    codigo = frame.f_code
+                    pilha.append(f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                pilha.append(nomes.get(ident, str(ident)))
+                self._pilhas[";".join(reversed(pilha))] += 1
+            time.sleep(self.intervalo)
+
+    def parar(self) -> Optional[str]:
+        """Encerra a captura e grava o resultado; retorna o caminho gravado"""
+        if not self._rodando:
+            return None
+        self._rodando = False
+        os.makedirs(self.pasta_saida, exist_ok=True)
+        carimbo = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        if self.modo == "cprofile":
+            self._perfil.disable()
+            caminho = os.path.join(self.pasta_saida, f"perfil_{carimbo}.prof")
+            self._perfil.dump_stats(caminho)
+            return caminho
+
+        self._thread.join(timeout=1)
+        caminho = os.path.join(self.pasta_saida, f"amostras_{carimbo}.txt")
+        with open(caminho, "w", encoding="utf-8") as f:
+            for pilha, n in self._pilhas.most_common():
+                f.write(f"{pilha} {n}\n")
+        return caminho
@@ -0,0 +1,121 @@
+"""
+Módulo de varredura recursiva da pasta de projetos DWG
+
+Este módulo gerencia:
+- Varredura recursiva com os.scandir (sem stat extra por arquivo no Windows)
+- Paralelismo por diretório (útil em compartilhamentos de rede, onde cada
+  listagem espera pelo servidor e os.scandir libera o GIL)
+- Caminhos relativos com separador '/', iguais aos caminhos remotos do Firebase
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def arquivo_relevante(nome: str) -> bool:
+    """Filtro padrão do catálogo: apenas .dwg, ignorando .bak"""
+    return nome.lower().endswith(".dwg") and not nome.endswith(".bak")
+
+
+def _workers_padrao() -> int:
+    """Varredura é limitada por I/O: usa mais threads que CPUs"""
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def _listar_diretorio(caminho: str, relativo: str, filtro: Callable[[str], bool],
+                      com_stat: bool) -> Tuple[list, List[Tuple[str, str]]]:
+    """
+    Lista um único diretório
+
+    Returns:
+        Tupla (arquivos, subdiretórios) onde subdiretórios são (caminho, relativo)
+    """
+    arquivos = []
+    subdirs = []
+    try:
+        with os.scandir(caminho) as entradas:
+            for entrada in entradas:
+                try:
+                    if entrada.is_dir(follow_symlinks=False):
+                        subdirs.append((entrada.path, relativo + entrada.name + "/"))
+                    elif filtro(entrada.name) and entrada.is_file():
+                        nome = relativo + entrada.name
+                        if com_stat:
+                            st = entrada.stat()
+                            arquivos.append((nome, st.st_size, st.st_mtime_ns))
+                        else:
+                            arquivos.append(nome)
+                except OSError:
+                    continue
+    except OSError:
+        # Diretório removido ou sem permissão durante a varredura
+        pass
+    return arquivos, subdirs
+
+
+def _varrer(raiz: str, filtro: Callable[[str], bool], max_workers: Optional[int],
+            com_stat: bool) -> list:
+    """Percorre a árvore distribuindo um diretório por tarefa (interno)"""
+    workers = max_workers or _workers_padrao()
+    resultado = []
+
+    if workers <= 1:
+        pilha = [(raiz, "")]
+        while pilha:
+            arquivos, subdirs = _listar_diretorio(*pilha.pop(), filtro, com_stat)
+            resultado.extend(arquivos)
+            pilha.extend(subdirs)
+        return resultado
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pendentes = {pool.submit(_listar_diretorio, raiz, "", filtro, com_stat)}
+        while pendentes:
+            prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                arquivos, subdirs = futuro.result()
+                resultado.extend(arquivos)
+                for caminho, relativo in subdirs:
+                    pendentes.add(pool.submit(_listar_diretorio, caminho, relativo,
+                                              filtro, com_stat))
+    return resultado
+
+
+def varrer_pasta(raiz: str, filtro: Callable[[str], bool] = arquivo_relevante,
+                 max_workers: Optional[int] = None) -> List[str]:
+    """
+    Lista recursivamente os arquivos de uma pasta
+
+    Args:
+        raiz: Pasta raiz
+        filtro: Função que recebe o nome do arquivo e decide se entra na lista
+        max_workers: Threads de varredura (1 = sequencial)
+
+    Returns:
+        Caminhos relativos à raiz, com '/', em ordem alfabética
+    """
+    return sorted(_varrer(raiz, filtro, max_workers, com_stat=False))
+
+
+def varrer_pasta_stat(raiz: str, filtro: Callable[[str], bool] = arquivo_relevante,
+                      max_workers: Optional[int] = None) -> Dict[str, Tuple[int, int]]:
+    """
+    Lista recursivamente os arquivos com tamanho e data de modificação
+
+    Returns:
+        Dicionário {caminho_relativo: (tamanho, mtime_ns)}
+    """
+    return {nome: (tamanho, mtime) for nome, tamanho, mtime
+            in _varrer(raiz, filtro, max_workers, com_stat=True)}
+
+
+def listar_subpastas(raiz: str) -> List[str]:
+    """Retorna caminhos relativos ('' para a raiz) de todas as subpastas"""
+    pastas = [""]
+    pilha = [(raiz, "")]
+    while pilha:
+        _, subdirs = _listar_diretorio(*pilha.pop(), lambda nome: False, False)
+        for caminho, relativo in subdirs:
+            pastas.append(relativo)
+            pilha.append((caminho, relativo))
+    return pastas
@@ -0,0 +1,78 @@
+"""
+Sonda de tempo de inicialização
+
+Inativa por padrão (custo zero). Quando a variável de ambiente
+BANCO_PROJETOS_SONDA aponta para um arquivo, a aplicação grava nele uma linha
+JSON por marco de inicialização ({"evento": ..., "t": time.time()}), e o
+harness benchmarks/bench_startup.py calcula os tempos a partir do lançamento.
+
+Variáveis de ambiente:
+    BANCO_PROJETOS_SONDA          Arquivo de saída dos marcos
+    BANCO_PROJETOS_SONDA_LOGIN    "usuario:senha" para preencher o login
+                                  (a autenticação acontece normalmente)
+    BANCO_PROJETOS_SONDA_TIMEOUT  Segundos até fechar sozinha (padrão: 30)
+"""
+
+import os
+import json
+import time
+
+ARQUIVO_SONDA = os.environ.get("BANCO_PROJETOS_SONDA")
+
+# Marcos registrados
+INICIO = "inicio"
+LOGIN_VISIVEL = "login_visivel"
+LOGIN_OK = "login_ok"
+PRINCIPAL_VISIVEL = "principal_visivel"
+PRIMEIROS_RESULTADOS = "primeiros_resultados"
+
+_registrados = set()
+
+
+def ativa() -> bool:
+    """Indica se a sonda está ligada"""
+    return bool(ARQUIVO_SONDA)
+
+
+def marcar(evento: str):
+    """Registra um marco (apenas a primeira ocorrência de cada evento)"""
+    if not ARQUIVO_SONDA or evento in _registrados:
+        return
+    _registrados.add(evento)
+    try:
+        with open(ARQUIVO_SONDA, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"evento": evento, "t": time.time()}) + "\n")
+    except OSError:
+        pass
+
+
+def marcar_ao_mapear(widget, evento: str):
+    """Registra o marco quando a janela for efetivamente mapeada na tela"""
+    if ARQUIVO_SONDA:
+        widget.bind("<Map>", lambda e: marcar(evento), add="+")
+
+
+def credenciais():
+    """Retorna (usuario, senha) para login automático da sonda, ou None"""
+    valor = os.environ.get("BANCO_PROJETOS_SONDA_LOGIN", "") if ARQUIVO_SONDA else ""
+    if ":" not in valor:
+        return None
+    usuario, senha = valor.split(":", 1)
+    return usuario, senha
+
+
+def resultados_exibidos(root):
+    """Registra os primeiros resultados e encerra a execução medida"""
+    if ARQUIVO_SONDA and PRIMEIROS_RESULTADOS not in _registrados:
+        marcar(PRIMEIROS_RESULTADOS)
+        root.after(100, root.destroy)
+
+
+def agendar_encerramento(root):
+    """Fecha a janela após o timeout da sonda (evita processos presos)"""
+    if ARQUIVO_SONDA:
+        segundos = float(os.environ.get("BANCO_PROJETOS_SONDA_TIMEOUT", "30"))
+        root.after(int(segundos * 1000), root.destroy)
+
+
+marcar(INICIO)
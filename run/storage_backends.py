@@ -0,0 +1,263 @@
+"""
+Backends de armazenamento usados pelo FirebaseSync
+
+Este módulo gerencia:
+- Interface comum (listar, stat, baixar, enviar, copiar no servidor,
+  leitura parcial)
+- FirebaseBackend: Firebase Storage (bucket do firebase_admin)
+- LocalBackend: pasta local que emula o bucket (md5 em base64, data de
+  atualização, latência e banda configuráveis) para testes e benchmarks
+  determinísticos sem rede
+
+Metadados de objeto são dicionários com as chaves:
+    name       caminho no bucket (ex: CONTROLE/arquivo.dwg)
+    size       tamanho em bytes
+    updated    datetime (UTC) da última atualização, ou None
+    md5_hash   md5 em base64, no formato do Firebase/GCS
+
+A listagem é paginada e aceita projeção de campos: chaves não pedidas vêm
+como None (e não custam nada ao servidor nem ao LocalBackend).
+"""
+
+import os
+import time
+import base64
+import hashlib
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, Optional
+
+from scanner import varrer_pasta
+
+CAMPOS = ('name', 'size', 'updated', 'md5_hash')
+TAMANHO_PAGINA = 1000
+
+
+class OrigemAlterada(Exception):
+    """A origem de uma cópia não tem mais o conteúdo esperado"""
+
+
+class StorageBackend(ABC):
+    """Interface mínima de armazenamento de objetos"""
+
+    @abstractmethod
+    def list(self, prefix: str = "", campos: Optional[Iterable[str]] = None,
+             tamanho_pagina: int = TAMANHO_PAGINA) -> Iterator[Dict]:
+        """
+        Itera os metadados dos objetos com o prefixo, página a página
+
+        Args:
+            prefix: Prefixo dos objetos
+            campos: Chaves de metadados necessárias (None = todas)
+            tamanho_pagina: Objetos por requisição
+        """
+
+    @abstractmethod
+    def stat(self, path: str) -> Optional[Dict]:
+        """Metadados de um objeto, ou None se não existir"""
+
+    @abstractmethod
+    def download(self, path: str, local_path: str):
+        """Baixa o objeto para um arquivo local"""
+
+    @abstractmethod
+    def upload(self, local_path: str, path: str):
+        """Envia um arquivo local para o objeto"""
+
+    @abstractmethod
+    def copy(self, path: str, new_path: str, md5_origem: Optional[str] = None):
+        """
+        Copia o objeto para outro caminho no próprio servidor (sem transferir os bytes)
+
+        Args:
+            path: Objeto de origem
+            new_path: Caminho da cópia
+            md5_origem: Se informado, a cópia só acontece se a origem ainda
+                tiver este md5; senão levanta OrigemAlterada
+        """
+
+    @abstractmethod
+    def read_range(self, path: str, start: int, end: int) -> bytes:
+        """Lê os bytes [start, end) do objeto"""
+
+
+class FirebaseBackend(StorageBackend):
+    """Firebase Storage via firebase_admin"""
+
+    # Nome dos campos na API JSON do GCS (parâmetro fields)
+    _CAMPOS_GCS = {'name': 'name', 'size': 'size', 'updated': 'updated', 'md5_hash': 'md5Hash'}
+
+    def __init__(self, bucket):
+        """
+        Args:
+            bucket: Bucket retornado por firebase_admin.storage.bucket()
+        """
+        self.bucket = bucket
+
+    @staticmethod
+    def _metadados(blob) -> Dict:
+        return {
+            'name': blob.name,
+            'size': blob.size,
+            'updated': blob.updated,
+            'md5_hash': blob.md5_hash,
+        }
+
+    def list(self, prefix: str = "", campos: Optional[Iterable[str]] = None,
+             tamanho_pagina: int = TAMANHO_PAGINA) -> Iterator[Dict]:
+        pedidos = {'name'} | set(campos or CAMPOS)
+        fields = "items(%s),nextPageToken" % ",".join(sorted(self._CAMPOS_GCS[c] for c in pedidos))
+        # O iterador busca a próxima página só quando a anterior é consumida
+        for blob in self.bucket.list_blobs(prefix=prefix, page_size=tamanho_pagina, fields=fields):
+            yield self._metadados(blob)
+
+    def stat(self, path: str) -> Optional[Dict]:
+        # get_blob faz uma única requisição (exists() + reload() faziam duas)
+        blob = self.bucket.get_blob(path)
+        return self._metadados(blob) if blob is not None else None
+
+    def download(self, path: str, local_path: str):
+        self.bucket.blob(path).download_to_filename(local_path)
+
+    def upload(self, local_path: str, path: str):
+        self.bucket.blob(path).upload_from_filename(local_path)
+
+    def copy(self, path: str, new_path: str, md5_origem: Optional[str] = None):
+        # Cópia dentro do bucket: feita pelo servidor, nada passa pela rede local
+        if md5_origem is None:
+            self.bucket.copy_blob(self.bucket.blob(path), self.bucket, new_path)
+            return
+        blob = self.bucket.get_blob(path)
+        if blob is None or blob.md5_hash != md5_origem:
+            raise OrigemAlterada(f"Conteúdo de {path} mudou")
+        # A geração garante que o servidor copia a mesma versão conferida
+        self.bucket.copy_blob(blob, self.bucket, new_path,
+                              if_source_generation_match=blob.generation)
+
+    def read_range(self, path: str, start: int, end: int) -> bytes:
+        # GCS usa fim inclusivo
+        return self.bucket.blob(path).download_as_bytes(start=start, end=end - 1)
+
+
+class LocalBackend(StorageBackend):
+    """
+    Pasta local que se comporta como o bucket
+
+    Cada operação espera `latencia` segundos (ida e volta) e as transferências
+    são limitadas a `banda` bytes/s, de forma determinística. Os contadores
+    permitem medir requisições e bytes transferidos em benchmarks.
+    """
+
+    def __init__(self, raiz: str, latencia: float = 0.0, banda: Optional[float] = None):
+        """
+        Args:
+            raiz: Pasta que faz o papel do bucket (criada se não existir)
+            latencia: Segundos de espera por requisição
+            banda: Bytes por segundo nas transferências (None = ilimitado)
+        """
+        self.raiz = os.path.abspath(raiz)
+        self.latencia = latencia
+        self.banda = banda
+        os.makedirs(self.raiz, exist_ok=True)
+        self._md5_cache = {}  # caminho -> ((tamanho, mtime_ns), md5)
+        self._lock = threading.Lock()
+        self.contadores = {}
+        self.zerar_contadores()
+
+    def zerar_contadores(self):
+        """Zera requisições e bytes transferidos"""
+        with self._lock:
+            self.contadores = {'requisicoes': 0, 'bytes_baixados': 0, 'bytes_enviados': 0}
+
+    def _caminho(self, path: str) -> str:
+        partes = [p for p in path.split('/') if p not in ('', '.', '..')]
+        return os.path.join(self.raiz, *partes)
+
+    def _requisicao(self, bytes_baixados: int = 0, bytes_enviados: int = 0):
+        """Contabiliza e simula o custo de uma requisição"""
+        with self._lock:
+            self.contadores['requisicoes'] += 1
+            self.contadores['bytes_baixados'] += bytes_baixados
+            self.contadores['bytes_enviados'] += bytes_enviados
+        espera = self.latencia
+        if self.banda:
+            espera += (bytes_baixados + bytes_enviados) / self.banda
+        if espera > 0:
+            time.sleep(espera)
+
+    def _md5(self, local: str, st: os.stat_result) -> str:
+        """md5 base64, recalculado só quando tamanho/mtime mudam"""
+        chave = (st.st_size, st.st_mtime_ns)
+        with self._lock:
+            em_cache = self._md5_cache.get(local)
+        if em_cache and em_cache[0] == chave:
+            return em_cache[1]
+        hash_md5 = hashlib.md5()
+        with open(local, 'rb') as f:
+            for bloco in iter(lambda: f.read(1024 * 1024), b""):
+                hash_md5.update(bloco)
+        md5 = base64.b64encode(hash_md5.digest()).decode('utf-8')
+        with self._lock:
+            self._md5_cache[local] = (chave, md5)
+        return md5
+
+    def _metadados(self, path: str, local: str, campos: Iterable[str] = CAMPOS) -> Dict:
+        metadados = {'name': path, 'size': None, 'updated': None, 'md5_hash': None}
+        if 'size' in campos or 'updated' in campos or 'md5_hash' in campos:
+            st = os.stat(local)
+            metadados['size'] = st.st_size
+            metadados['updated'] = datetime.fromtimestamp(st.st_mtime, tz=timezone.utc)
+            if 'md5_hash' in campos:
+                metadados['md5_hash'] = self._md5(local, st)
+        return metadados
+
+    def list(self, prefix: str = "", campos: Optional[Iterable[str]] = None,
+             tamanho_pagina: int = TAMANHO_PAGINA) -> Iterator[Dict]:
+        campos = set(campos or CAMPOS)
+        nomes = [n for n in varrer_pasta(self.raiz, filtro=lambda n: True) if n.startswith(prefix)]
+        self._requisicao()  # primeira página (mesmo se vazia)
+        for i, nome in enumerate(nomes):
+            if i and i % tamanho_pagina == 0:
+                self._requisicao()  # próxima página
+            yield self._metadados(nome, self._caminho(nome), campos)
+
+    def stat(self, path: str) -> Optional[Dict]:
+        self._requisicao()
+        local = self._caminho(path)
+        if not os.path.isfile(local):
+            return None
+        return self._metadados(path, local)
+
+    def download(self, path: str, local_path: str):
+        origem = self._caminho(path)
+        if not os.path.isfile(origem):
+            self._requisicao()
+            raise FileNotFoundError(f"Objeto não encontrado: {path}")
+        self._requisicao(bytes_baixados=os.path.getsize(origem))
+        shutil.copyfile(origem, local_path)
+
+    def upload(self, local_path: str, path: str):
+        destino = self._caminho(path)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        self._requisicao(bytes_enviados=os.path.getsize(local_path))
+        shutil.copyfile(local_path, destino)
+
+    def copy(self, path: str, new_path: str, md5_origem: Optional[str] = None):
+        origem = self._caminho(path)
+        self._requisicao()  # só a requisição: os bytes não saem do servidor
+        if not os.path.isfile(origem):
+            raise FileNotFoundError(f"Objeto não encontrado: {path}")
+        if md5_origem is not None and self._md5(origem, os.stat(origem)) != md5_origem:
+            raise OrigemAlterada(f"Conteúdo de {path} mudou")
+        destino = self._caminho(new_path)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        shutil.copyfile(origem, destino)
+
+    def read_range(self, path: str, start: int, end: int) -> bytes:
+        with open(self._caminho(path), 'rb') as f:
+            f.seek(start)
+            dados = f.read(max(0, end - start))
+        self._requisicao(bytes_baixados=len(dados))
+        return dados
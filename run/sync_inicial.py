@@ -16,6 +16,8 @@ import os
 import sys
 import argparse
 from firebase_sync import FirebaseSync
+from log_config import configurar_logging
+from scanner import varrer_pasta
 
 
 def main():
@@ -32,6 +34,11 @@ def main():
         action='store_true',
         help='Força upload de todos os arquivos, mesmo que já existam'
     )
+    parser.add_argument(
+        '--verbose',
+        action='store_true',
+        help='Mostra uma linha por arquivo durante o envio'
+    )
     parser.add_argument(
         '--folder',
         default='../CONTROLE',
@@ -39,6 +46,7 @@ def main():
     )
     
     args = parser.parse_args()
+    configurar_logging(nivel="DEBUG" if args.verbose else "INFO")
     
     print("=" * 60)
     print("🔥 SINCRONIZAÇÃO INICIAL COM FIREBASE STORAGE")
@@ -52,9 +60,8 @@ def main():
         print("  python sync_inicial.py --folder /caminho/para/CONTROLE")
         return 1
     
-    # Contar arquivos DWG
-    arquivos_dwg = [f for f in os.listdir(pasta_controle) 
-                    if f.lower().endswith('.dwg') and not f.endswith('.bak')]
+    # Contar arquivos DWG (inclui subpastas)
+    arquivos_dwg = varrer_pasta(pasta_controle)
     
     print(f"\n📂 Pasta: {pasta_controle}")
     print(f"📄 Arquivos DWG encontrados: {len(arquivos_dwg)}")
@@ -118,6 +125,9 @@ def main():
         print("✅ SINCRONIZAÇÃO CONCLUÍDA!")
         print("=" * 60)
         print(f"  ✓ {stats['uploaded']} arquivos enviados")
+        if stats['copied'] > 0:
+            print(f"  ⧉ {stats['copied']} copiados na nuvem a partir de arquivos iguais "
+                  f"({stats['bytes_saved'] / (1024 * 1024):.1f} MB não enviados)")
         print(f"  ⊘ {stats['skipped']} já estavam atualizados")
         if stats['failed'] > 0:
             print(f"  ✗ {stats['failed']} falharam")
@@ -125,7 +135,7 @@ def main():
         
         # Listar arquivos no Firebase
         print("\n📦 Arquivos na nuvem:")
-        arquivos_cloud = sync.list_files()
+        arquivos_cloud = sync.list_files(campos=('name', 'size'))
         print(f"   Total: {len(arquivos_cloud)} arquivos")
         
         # Calcular tamanho total
@@ -0,0 +1,144 @@
+"""Testes do AuthManager: migração de hash, sessões assinadas e importação"""
+
+import hashlib
+import json
+import time
+
+import pytest
+
+import auth
+from auth import AuthManager
+
+
+def _gravar_usuarios(caminho, users):
+    caminho.write_text(json.dumps({"users": users}), encoding="utf-8")
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """AuthManager com um usuário no formato antigo (SHA-256 sem salt)"""
+    users_file = tmp_path / "users.json"
+    _gravar_usuarios(users_file, {
+        "ana": {"password_hash": hashlib.sha256(b"senha123").hexdigest(),
+                "nome": "Ana", "tipo": "user"}
+    })
+    return AuthManager(str(users_file), session_dir=str(tmp_path / "sessao"))
+
+
+def _hash_salvo(manager, username):
+    with open(manager.users_file, encoding="utf-8") as f:
+        return json.load(f)["users"][username]["password_hash"]
+
+
+def test_login_com_hash_antigo_regrava_em_pbkdf2(manager):
+    assert manager.authenticate("ana", "senha123")
+
+    novo_hash = _hash_salvo(manager, "ana")
+    assert novo_hash.startswith(auth.ALGORITMO + "$")
+    assert not AuthManager._needs_rehash(novo_hash)
+    # O hash novo continua aceitando a mesma senha
+    assert AuthManager(manager.users_file, session_dir=manager.session_dir).authenticate("ana", "senha123")
+
+
+def test_senha_errada_e_rejeitada(manager):
+    assert not manager.authenticate("ana", "senha errada")
+    assert not manager.authenticate("ana", "")
+    assert not manager.authenticate("beto", "senha123")
+    # Falha de login não migra o hash
+    assert _hash_salvo(manager, "ana") == hashlib.sha256(b"senha123").hexdigest()
+
+
+def test_sessao_valida_e_retomada(manager):
+    assert manager.create_session("ana", 3600)
+    assert manager.resume_session(3600) == "ana"
+
+
+def test_sessao_adulterada_e_rejeitada(manager):
+    assert manager.create_session("ana", 3600)
+    with open(manager.session_file, encoding="ascii") as f:
+        carga, assinatura = f.read().split(".")
+
+    # Troca o usuário da carga mantendo a assinatura original
+    dados = json.loads(auth._b64_decode(carga))
+    dados["usuario"] = "admin"
+    adulterada = auth._b64(json.dumps(dados, separators=(',', ':')).encode("utf-8"))
+    with open(manager.session_file, "w", encoding="ascii") as f:
+        f.write(f"{adulterada}.{assinatura}")
+
+    assert manager.resume_session(3600) is None
+
+
+def test_sessao_com_assinatura_invalida_e_rejeitada(manager):
+    assert manager.create_session("ana", 3600)
+    with open(manager.session_file, encoding="ascii") as f:
+        carga, _ = f.read().split(".")
+    with open(manager.session_file, "w", encoding="ascii") as f:
+        f.write(f"{carga}.{auth._b64(b'x' * 32)}")
+
+    assert manager.resume_session(3600) is None
+
+
+def test_sessao_expirada_e_rejeitada(manager, monkeypatch):
+    assert manager.create_session("ana", 60)
+
+    agora = time.time()
+    monkeypatch.setattr(auth.time, "time", lambda: agora + 120)
+    assert manager.resume_session(3600) is None
+    # Sessão inválida é apagada
+    monkeypatch.setattr(auth.time, "time", lambda: agora)
+    assert manager.resume_session(3600) is None
+
+
+def test_sessao_mais_velha_que_a_validade_atual_e_rejeitada(manager, monkeypatch):
+    assert manager.create_session("ana", 8 * 3600)
+
+    agora = time.time()
+    monkeypatch.setattr(auth.time, "time", lambda: agora + 2 * 3600)
+    assert manager.resume_session(3600) is None
+
+
+def test_validade_zero_encerra_a_sessao(manager):
+    assert manager.create_session("ana", 3600)
+    assert manager.resume_session(0) is None
+    assert manager.resume_session(3600) is None
+
+
+def test_trocar_senha_invalida_a_sessao(manager):
+    assert manager.create_session("ana", 3600)
+    assert manager.change_password("ana", "senha123", "nova456")
+    assert manager.resume_session(3600) is None
+
+
+def test_exportar_e_importar_preserva_usuarios(manager, tmp_path):
+    manager.import_users([{"username": "beto", "password": "abcd1234",
+                           "nome": "Beto", "tipo": "admin"}])
+    exportados = manager.export_users()
+
+    destino = tmp_path / "outro" / "users.json"
+    destino.parent.mkdir()
+    _gravar_usuarios(destino, {})
+    outro = AuthManager(str(destino), session_dir=str(tmp_path / "sessao2"))
+    stats = outro.import_users(exportados)
+
+    assert stats == {'added': 2, 'updated': 0, 'skipped': 0}
+    assert sorted(outro.export_users(), key=lambda r: r["username"]) == \
+        sorted(exportados, key=lambda r: r["username"])
+    assert outro.authenticate("ana", "senha123")
+    assert outro.authenticate("beto", "abcd1234")
+    assert outro.get_user_info("beto")["tipo"] == "admin"
+
+
+def test_importar_existentes_sem_atualizar_ignora(manager):
+    stats = manager.import_users([{"username": "ana", "password": "outra123"}])
+
+    assert stats == {'added': 0, 'updated': 0, 'skipped': 1}
+    assert manager.authenticate("ana", "senha123")
+
+
+def test_importar_registro_invalido_nao_altera_nada(manager):
+    antes = manager.export_users()
+    with pytest.raises(ValueError):
+        manager.import_users([{"username": "carla", "password": "abcd1234"},
+                              {"username": "davi", "password": "12"}])
+
+    assert manager.export_users() == antes
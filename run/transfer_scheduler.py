@@ -0,0 +1,148 @@
+"""
+Agendador de transferências do FirebaseSync
+
+Este módulo gerencia:
+- Classes de prioridade: interativo (cópia pedida pelo usuário) > pré-carga
+  > segundo plano (download_all, sincronização automática, upload em lote)
+- Limite de transferências simultâneas, com uma vaga sempre reservada para
+  pedidos interativos
+- Pausa do segundo plano enquanto houver pedido interativo em andamento ou
+  na fila: a banda fica toda para o usuário
+- Limite de banda (bytes/s) para pré-carga e segundo plano, dividido entre
+  as classes ativas por peso (PESOS_BANDA): cada classe tem seu próprio
+  relógio virtual, então um arquivo grande do segundo plano só atrasa o
+  próximo arquivo do segundo plano, não a pré-carga
+
+Transferências já iniciadas não são interrompidas (o SDK baixa o arquivo
+inteiro); a preempção acontece entre arquivos. Pelo mesmo motivo, dentro de
+uma classe a banda é dividida por arquivo, em ordem de chegada (não há
+blocos para alternar entre transferências). Cada operação roda na thread
+de quem pediu: o agendador só decide quando ela pode começar.
+
+Uso:
+    agendador = AgendadorTransferencias(max_simultaneas=4)
+    with agendador.reservar(SEGUNDO_PLANO, tamanho):
+        backend.download(caminho, destino)
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import metrics
+
+INTERATIVO = 0
+PRE_CARGA = 1
+SEGUNDO_PLANO = 2
+
+NOMES = {INTERATIVO: "interativo", PRE_CARGA: "pre_carga", SEGUNDO_PLANO: "segundo_plano"}
+
+# Parte do limite de banda de cada classe quando as duas estão ativas
+# (sozinha, a classe usa o limite inteiro)
+PESOS_BANDA = {PRE_CARGA: 2, SEGUNDO_PLANO: 1}
+
+
+class AgendadorTransferencias:
+    """Fila de prioridade para as operações de rede do FirebaseSync"""
+
+    def __init__(self, max_simultaneas: int = 4, limite_banda: Optional[float] = None):
+        """
+        Args:
+            max_simultaneas: Transferências ao mesmo tempo (todas as classes)
+            limite_banda: Bytes/s para pré-carga e segundo plano somados,
+                divididos por PESOS_BANDA entre as classes ativas (None ou
+                0 = sem limite; pedidos interativos nunca são limitados)
+        """
+        self.max_simultaneas = max(1, int(max_simultaneas))
+        self.limite_banda = limite_banda or None
+        self._cond = threading.Condition()
+        self._fila = []  # heap de (prioridade, ordem de chegada)
+        self._ordem = itertools.count()
+        self._ativas = {INTERATIVO: 0, PRE_CARGA: 0, SEGUNDO_PLANO: 0}
+        self._banda_lock = threading.Lock()
+        self._livre_em = {classe: 0.0 for classe in PESOS_BANDA}  # relógio virtual por classe
+        self._na_banda = {classe: 0 for classe in PESOS_BANDA}    # transferências limitadas em curso
+
+    def _pode_iniciar(self, prioridade: int) -> bool:
+        """Regra de admissão (chamar com self._cond adquirido)"""
+        total = sum(self._ativas.values())
+        if prioridade == INTERATIVO:
+            return total < self.max_simultaneas
+        # Demais classes: deixam uma vaga livre e cedem a vez ao usuário
+        vagas = self.max_simultaneas - 1 if self.max_simultaneas > 1 else 1
+        return total < vagas and self._ativas[INTERATIVO] == 0
+
+    def _cadenciar(self, prioridade: int, tamanho: int):
+        """
+        Espera a vez na cota de banda da classe
+        
+        A taxa da classe é a sua parte do limite entre as classes ativas
+        (com transferência em curso ou cota ainda não vencida), calculada
+        no momento em que o arquivo entra na fila.
+        """
+        with self._banda_lock:
+            agora = time.monotonic()
+            ativas = [classe for classe in PESOS_BANDA
+                      if classe == prioridade or self._na_banda[classe] or self._livre_em[classe] > agora]
+            taxa = self.limite_banda * PESOS_BANDA[prioridade] / sum(PESOS_BANDA[c] for c in ativas)
+            inicio = max(agora, self._livre_em[prioridade])
+            self._livre_em[prioridade] = inicio + tamanho / taxa
+            self._na_banda[prioridade] += 1
+        if inicio > agora:
+            time.sleep(inicio - agora)
+
+    @contextmanager
+    def reservar(self, prioridade: int = INTERATIVO, tamanho: int = 0):
+        """
+        Bloqueia até a transferência poder começar e ocupa a vaga até o fim do bloco
+
+        Args:
+            prioridade: INTERATIVO, PRE_CARGA ou SEGUNDO_PLANO
+            tamanho: Bytes a transferir (para o limite de banda; 0 = só metadados)
+        """
+        inicio = time.perf_counter()
+        limitada = prioridade != INTERATIVO and bool(self.limite_banda) and tamanho > 0
+        if limitada:
+            self._cadenciar(prioridade, tamanho)
+        try:
+            with self._cond:
+                item = (prioridade, next(self._ordem))
+                heapq.heappush(self._fila, item)
+                while self._fila[0] != item or not self._pode_iniciar(prioridade):
+                    self._cond.wait()
+                heapq.heappop(self._fila)
+                self._ativas[prioridade] += 1
+                # O próximo da fila pode caber também
+                self._cond.notify_all()
+
+            metrics.registrar(f"transferencia.espera_{NOMES[prioridade]}",
+                              (time.perf_counter() - inicio) * 1000)
+            try:
+                yield
+            finally:
+                with self._cond:
+                    self._ativas[prioridade] -= 1
+                    self._cond.notify_all()
+        finally:
+            if limitada:
+                with self._banda_lock:
+                    self._na_banda[prioridade] -= 1
+
+    def ocioso(self) -> bool:
+        """Nenhum pedido interativo em andamento ou na fila"""
+        with self._cond:
+            return not self._ativas[INTERATIVO] and all(p != INTERATIVO for p, _ in self._fila)
+
+    def estado(self) -> dict:
+        """Transferências ativas e na fila por classe (diagnóstico)"""
+        with self._cond:
+            na_fila = {nome: 0 for nome in NOMES.values()}
+            for prioridade, _ in self._fila:
+                na_fila[NOMES[prioridade]] += 1
+            return {
+                "ativas": {NOMES[p]: n for p, n in self._ativas.items()},
+                "na_fila": na_fila
+            }